@@ -0,0 +1,140 @@
+"""
+Non-interactive batch mode: ``python -m app.calculator_repl --batch FILE``.
+
+Commands stream through a generator pipeline (read -> execute -> write), so
+memory stays flat however long the input is. Persistence is deferred to
+checkpoints every checkpoint_every lines and at the end of the run instead
+of happening after every calculation.
+"""
+from __future__ import annotations
+import csv
+import json
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, TextIO, Tuple
+
+from app.operations import FACTORY
+
+OUTPUT_FORMATS = ("csv", "jsonl")
+OUTPUT_COLUMNS = ["line", "command", "result", "error"]
+
+# commands that change calculator state rather than compute a value
+_STATE_COMMANDS = {
+    "undo": "undo",
+    "redo": "redo",
+    "clear": "clear",
+    "save": "save_history",
+    "load": "load_history",
+}
+
+
+@dataclass
+class BatchResult:
+    line: int
+    command: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchSummary:
+    lines: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    checkpoints: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (f"Processed {self.lines} commands in {self.elapsed:.3f}s "
+                f"({self.throughput:,.0f}/s), {self.errors} errors, {self.checkpoints} checkpoints")
+
+
+def read_commands(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """(line number, command) pairs; blank lines and # comments are skipped, exit stops."""
+    for lineno, raw in enumerate(lines, 1):
+        cmd = raw.strip()
+        if not cmd or cmd.startswith("#"):
+            continue
+        if cmd == "exit":
+            return
+        yield lineno, cmd
+
+
+def run_command(calc: "Calculator", cmd: str) -> Optional[str]:
+    """Execute one command; returns the text of its result (None for clear/load)."""
+    if cmd in _STATE_COMMANDS:
+        out = getattr(calc, _STATE_COMMANDS[cmd])()
+        return None if out is None else str(out)
+    parts = cmd.split()
+    if len(parts) == 3 and parts[0].lower() in FACTORY:
+        return str(calc.perform(*parts))
+    return str(calc.evaluate(cmd))
+
+
+def execute(
+    calc: "Calculator",
+    commands: Iterable[Tuple[int, str]],
+    summary: BatchSummary,
+    *,
+    checkpoint_every: int = 1000,
+    fail_fast: bool = False,
+) -> Iterator[BatchResult]:
+    for lineno, cmd in commands:
+        summary.lines += 1
+        try:
+            yield BatchResult(lineno, cmd, result=run_command(calc, cmd))
+        except Exception as e:
+            summary.errors += 1
+            yield BatchResult(lineno, cmd, error=str(e))
+            if fail_fast:
+                return
+        if checkpoint_every and summary.lines % checkpoint_every == 0:
+            checkpoint(calc)
+            summary.checkpoints += 1
+
+
+def checkpoint(calc: "Calculator") -> None:
+    """Persist history: observers flush their buffers, snapshot mode rewrites the history file."""
+    calc.flush()
+    if calc.config.auto_save and calc.config.auto_save_mode == "snapshot":
+        calc.save_history()
+
+
+def write_results(results: Iterable[BatchResult], out: TextIO, fmt: str = "csv") -> None:
+    if fmt == "jsonl":
+        for r in results:
+            rec = {"line": r.line, "command": r.command}
+            rec.update({"error": r.error} if r.error is not None else {"result": r.result})
+            out.write(json.dumps(rec) + "\n")
+        return
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(OUTPUT_COLUMNS)
+    for r in results:
+        writer.writerow([r.line, r.command, r.result or "", r.error or ""])
+
+
+def run_batch(
+    calc: "Calculator",
+    lines: Iterable[str],
+    out: TextIO,
+    *,
+    fmt: str = "csv",
+    checkpoint_every: int = 1000,
+    fail_fast: bool = False,
+) -> BatchSummary:
+    """Run every command in lines, writing one result row per command to out."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {fmt}")
+    summary = BatchSummary()
+    start = time.perf_counter()
+    results = execute(
+        calc, read_commands(lines), summary, checkpoint_every=checkpoint_every, fail_fast=fail_fast
+    )
+    write_results(results, out, fmt)
+    checkpoint(calc)
+    summary.checkpoints += 1
+    summary.elapsed = time.perf_counter() - start
+    return summary
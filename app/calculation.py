@@ -2,7 +2,7 @@ from dataclasses import dataclass, asdict
 from decimal import Decimal
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Calculation:
     operation: str
     operand1: Decimal
@@ -19,11 +19,12 @@ class Calculation:
         return d
 
     @classmethod
-    def from_dict(cls, d: dict) -> "Calculation":
+    def from_dict(cls, d: dict, number=Decimal) -> "Calculation":
+        """number parses the values back (Decimal, float or Fraction; see app.numeric)."""
         return cls(
             operation=d["operation"],
-            operand1=Decimal(str(d["operand1"])),
-            operand2=Decimal(str(d["operand2"])),
-            result=Decimal(str(d["result"])),
+            operand1=number(str(d["operand1"])),
+            operand2=number(str(d["operand2"])),
+            result=number(str(d["result"])),
             timestamp=datetime.fromisoformat(str(d["timestamp"])),
         )
@@ -1,20 +1,64 @@
 from __future__ import annotations
-from decimal import Decimal, getcontext
+from decimal import Context, localcontext
 from pathlib import Path
-from typing import List
-import pandas as pd
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import replace
+from functools import partial
+from itertools import chain, islice, repeat
+from typing import TYPE_CHECKING, Deque, Iterator, List, Sequence, Tuple
 from datetime import datetime, UTC
+import threading
 
 from app.calculation import Calculation
 from app.calculator_config import CalculatorConfig
 from app.calculator_memento import CalculatorMemento
+from app.calculator_snapshot import read_snapshot, write_snapshot
 from app.exceptions import OperationError, ValidationError
-from app.history import HistoryObserver
-from app.operations import get_operation
+from app.expression import CompiledExpression, compile_expression
+from app.history import HistoryObserver, journal_segments, rebuild_history
+from app.history_aggregates import HistoryAggregates
+from app.history_archive import HistoryArchive
+from app.history_buffer import HistoryBuffer
+from app.history_index import HistoryIndex
+from app.history_segments import SegmentWriter, load_segments
+from app.history_storage import HISTORY_COLUMNS, get_storage, storage_for_path
+from app.operations import FACTORY, Operation, get_operation
+from app.instrumentation import Metrics, clock
 from app.logger import get_logger
+from app.numeric import Number, get_backend
+from app.observer_dispatch import AsyncDispatcher
+from app.result_cache import ResultCache
+
+if TYPE_CHECKING:  # pandas is imported on first use; it dominates startup time
+    import pandas as pd
+
+
+def _chain_skipping(window: Iterator[Calculation], archived, offset: int, newest_first: bool):
+    """The archive's matches then the window's (reversed when newest_first), skipping offset."""
+    if newest_first:
+        skipped = sum(1 for _ in islice(window, offset))
+        yield from window
+        yield from archived(skip=offset - skipped)
+    else:
+        skipped = yield from archived(skip=offset)
+        yield from islice(window, offset - skipped, None)
 
 
 class Calculator:
+    """
+    Every calculator computes under its own decimal.Context (self.context,
+    built from config.precision), so calculators with different settings can
+    coexist in one process and the global decimal context is never touched.
+    Numbers are Decimals unless config.numeric_backend picks float or
+    Fraction (see app.numeric).
+
+    Thread safety: with config.thread_safe (or async_observers) history,
+    undo/redo state and the result cache are guarded by an internal lock, so
+    one calculator can be shared by a thread pool. The arithmetic itself runs
+    outside the lock. Without it, a calculator belongs to one thread at a time.
+    """
+
     def __init__(self, base_dir: Path | CalculatorConfig | None = None):
         """
         Accept either:
@@ -28,15 +72,58 @@ class Calculator:
             self.config = CalculatorConfig.from_env(base_dir)
 
         self.config.validate()
-        self.logger = get_logger(self.config.log_dir)
-
-        # precision
-        getcontext().prec = self.config.precision
+        self.logger = get_logger(
+            self.config.log_dir,
+            fmt=self.config.log_format,
+            use_queue=self.config.log_queue,
+            max_bytes=self.config.log_max_bytes,
+            backup_count=self.config.log_backup_count,
+        )
+        self._configure_numbers()
+        self.cache = ResultCache(self.config.cache_size)
+        # None unless instrumentation is on, so the hot paths pay one check
+        self.metrics: Metrics | None = Metrics() if self.config.instrumentation else None
 
-        self.history: List[Calculation] = []
+        self.history = HistoryBuffer(self.config.max_history_size)
+        # per-operation and time lookups for query_history, updated with every history change
+        self.index = HistoryIndex(self.history)
+        self.aggregates = HistoryAggregates(self.history, self.backend.name)
+        # with history_archive, evicted entries spill to disk instead of being dropped
+        self.archive: HistoryArchive | None = None
+        if self.config.history_archive:
+            self.archive = HistoryArchive(self.config.archive_dir, self.backend.number)
+            self.history.add_listener(self.archive)
+        # with multi_writer, saves commit this process's new entries as segments
+        self.segments: SegmentWriter | None = None
+        if self.config.multi_writer:
+            self.segments = SegmentWriter(self.config, self.storage, self.history)
         self.observers: List[HistoryObserver] = []
-        self.undo_stack: List[CalculatorMemento] = []
-        self.redo_stack: List[CalculatorMemento] = []
+        # each entry is a delta, so memory is linear in history size;
+        # the oldest steps fall off once max_undo_depth is reached
+        self.undo_stack: Deque[CalculatorMemento] = deque(maxlen=self.config.max_undo_depth)
+        self.redo_stack: Deque[CalculatorMemento] = deque(maxlen=self.config.max_undo_depth)
+
+        # with asynchronous observers, history is read from the dispatch thread,
+        # so mutations and history_snapshot() go through a lock
+        self._dispatcher: AsyncDispatcher | None = None
+        self._lock = nullcontext()
+        if self.config.thread_safe or self.config.async_observers:
+            self._lock = threading.RLock()
+        if self.config.async_observers:
+            self._dispatcher = AsyncDispatcher(
+                self, self.config.observer_queue_size, self.config.observer_backpressure
+            )
+
+    def _configure_numbers(self) -> None:
+        """Derive the backend, history storage, context and input limit from config."""
+        self.backend = get_backend(self.config.numeric_backend)
+        self.storage = get_storage(
+            self.config.history_format, self.config.default_encoding, self.backend.number
+        )
+        # the exponent range doubles as the result-magnitude budget that power checks up front
+        digits = self.config.max_result_digits
+        self.context = Context(prec=self.config.precision, Emax=digits, Emin=-digits)
+        self._limit = self.backend.parse(self.config.max_input_value)
 
     # ---- observers
     def add_observer(self, observer: HistoryObserver) -> None:
@@ -44,92 +131,493 @@ class Calculator:
         self.logger.info("Observer added: %s", observer.__class__.__name__)
 
     def notify(self, calc: Calculation) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.submit((calc,))
+            return
         for ob in self.observers:
             ob.update(self, calc)
 
+    def notify_many(self, calcs: Sequence[Calculation]) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.submit(calcs)
+            return
+        for ob in self.observers:
+            ob.update_many(self, calcs)
+
+    def _emit(self, event: str, memento: CalculatorMemento | None = None) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.submit_event(event, memento)
+            return
+        for ob in self.observers:
+            ob.on_event(self, event, memento)
+
+    def flush(self) -> None:
+        """Deliver queued notifications, then ask every observer to persist its buffers."""
+        if self._dispatcher is not None:
+            self._dispatcher.drain()
+        for ob in self.observers:
+            ob.flush()
+        if self.archive is not None:
+            with self._lock:
+                self.archive.flush()
+
+    def close(self) -> None:
+        """Flush and stop the dispatch thread; call once the calculator is done."""
+        self.flush()
+        if self._dispatcher is not None:
+            self._dispatcher.close()
+            self._dispatcher = None
+        if self.archive is not None:
+            self.archive.close()
+        self.write_metrics()
+
+    def history_snapshot(self) -> List[Calculation]:
+        """A consistent copy of the history, safe to take from observer threads."""
+        with self._lock:
+            return list(self.history)
+
     # ---- utils
-    def _validate_number(self, x: str | int | float) -> Decimal:
+    def _validate_number(self, x: str | int | float) -> Number:
         try:
-            d = Decimal(str(x))
-        except Exception as e:  # pragma: no cover - Decimal edge parse
+            d = self.backend.parse(x)
+        except Exception as e:
             raise ValidationError(f"Invalid number: {x}") from e
-        if abs(d) > Decimal(str(self.config.max_input_value)):
+        if self.backend.magnitude(d) > self._limit:
             raise ValidationError(f"Value out of bounds: {x}")
         return d
 
+    def _validate_many(self, xs) -> List[Number]:
+        """Bulk _validate_number for lists, NumPy arrays and pandas Series."""
+        if hasattr(xs, "tolist"):
+            xs = xs.tolist()
+        # one pass, so generators work too; a failure names its position
+        parse = self.backend.parse
+        ds: List[Number] = []
+        append = ds.append
+        for i, x in enumerate(xs):
+            try:
+                append(parse(x))
+            except Exception as e:
+                raise ValidationError(f"Invalid number: {x} (index {i})") from e
+        magnitude = self.backend.magnitude
+        if ds and max(map(magnitude, ds)) > self._limit:
+            i = next(i for i, d in enumerate(ds) if magnitude(d) > self._limit)
+            raise ValidationError(f"Value out of bounds: {ds[i]} (index {i})")
+        return ds
+
+    def _execute(self, op: Operation, op_name: str, da: Number, db: Number) -> Number:
+        """Run op on validated operands, consulting the result cache first."""
+        ctx = self.context
+        key = (op_name.lower(), str(da), str(db), ctx.prec, ctx.rounding)
+        with self._lock:
+            result = self.cache.get(key)
+        if result is None:
+            try:
+                with localcontext(ctx):
+                    result = op.execute(da, db)
+            except Exception as e:
+                raise OperationError(str(e)) from e
+            with self._lock:
+                self.cache.put(key, result)
+        return result
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters of the result cache."""
+        with self._lock:
+            return self.cache.stats()
+
+    def stats(self) -> dict:
+        """Per-phase call counts and latency percentiles (empty unless config.instrumentation)."""
+        return self.metrics.snapshot() if self.metrics is not None else {}
+
+    def write_metrics(self, path: Path | None = None) -> Path | None:
+        """Dump the metrics in Prometheus text format (default: config.metrics_file)."""
+        if self.metrics is None:
+            return None
+        return self.metrics.write_prometheus(path or self.config.metrics_file)
+
     # ---- public API
-    def perform(self, op_name: str, a, b) -> Decimal:
+    def perform(self, op_name: str, a, b) -> Number:
+        if self.metrics is not None:
+            return self._perform_timed(op_name, a, b)
+        calc = self.calculate(op_name, a, b)
+        self._record(calc)
+        return calc.result
+
+    def _perform_timed(self, op_name: str, a, b) -> Number:
+        """perform() with each phase timed into self.metrics."""
+        label = op_name.lower() if op_name.lower() in FACTORY else "unknown"
+        try:
+            t0 = clock()
+            op = get_operation(op_name)
+            da, db = self._validate_number(a), self._validate_number(b)
+            t1 = clock()
+            result = self._execute(op, op_name, da, db)
+            t2 = clock()
+        except Exception:
+            self.metrics.error("perform", label)
+            raise
+        calc = Calculation(op_name, da, db, result, datetime.now(UTC))
+        self._commit(calc)
+        t3 = clock()
+        self.notify(calc)
+        self.metrics.record("perform", label, (
+            ("validate", t1 - t0), ("execute", t2 - t1), ("record", t3 - t2), ("notify", clock() - t3),
+        ))
+        return result
+
+    def calculate(self, op_name: str, a, b) -> Calculation:
+        """Validate and compute like perform(), without touching history or observers."""
         op = get_operation(op_name)
         da, db = self._validate_number(a), self._validate_number(b)
+        result = self._execute(op, op_name, da, db)
+        return Calculation(op_name, da, db, result, datetime.now(UTC))
+
+    def _record(self, calc: Calculation) -> None:
+        self._commit(calc)
+        # observers
+        self.notify(calc)
+
+    def _commit(self, calc: Calculation) -> None:
+        with self._lock:
+            # the ring buffer drops the oldest entry once max_history_size is reached
+            old = self.history.append(calc)
+            evicted = (old,) if old is not None else ()
+
+            # save the delta for undo
+            self.undo_stack.append(CalculatorMemento((calc,), evicted))
+            self.redo_stack.clear()
+
+    def evaluate(self, expr: str, **variables) -> Number:
+        """
+        Evaluate an infix expression such as "(3 + 4) * 2 ^ 5 % 7" (see
+        app.expression) and record it as one history entry. The entry's
+        operation is the canonical expression text and its operands are those
+        of the outermost operation. Keyword arguments bind variables; ans
+        defaults to the last result.
+        """
+        calc = self.calculate_expression(expr, **variables)
+        self._record(calc)
+        return calc.result
 
-        # save state for undo
-        self.undo_stack.append(CalculatorMemento(self.history.copy()))
-        self.redo_stack.clear()
+    def compile(self, expr: str) -> CompiledExpression:
+        """The cached plan for expr under this calculator's context and input limit."""
+        ctx = self.context
+        return compile_expression(expr, ctx.prec, ctx.rounding, self.backend.name, ctx.Emax, self._limit)
 
+    def calculate_expression(self, expr: str, **variables) -> Calculation:
+        """Compile and run expr like evaluate(), without touching history or observers."""
+        plan = self.compile(expr)
+        values = {name: self._validate_number(v) for name, v in variables.items()}
+        if "ans" in plan.names and "ans" not in values:
+            with self._lock:
+                values["ans"] = self.history[-1].result if self.history else self.backend.parse(0)
+        missing = plan.names - values.keys()
+        if missing:
+            raise ValidationError(f"Unbound variable(s): {', '.join(sorted(missing))}")
         try:
-            result = op.execute(da, db)
+            with localcontext(self.context):
+                result, a, b = plan.run(values)
         except Exception as e:
             raise OperationError(str(e)) from e
 
-        calc = Calculation(op_name, da, db, result, datetime.now(UTC))
-        self.history.append(calc)
-        # truncate history if needed
-        if len(self.history) > self.config.max_history_size:
-            self.history.pop(0)
+        return Calculation(plan.source, a, b, result, datetime.now(UTC))
 
-        # observers
-        self.notify(calc)
-        return result
+    def perform_many(self, op_name: str, a_seq, b_seq) -> List[Number]:
+        """
+        Apply one operation pairwise over two operand sequences (lists, NumPy
+        arrays or pandas Series). Nothing is recorded unless every pair
+        succeeds; the batch is then one undo step and one observer notification.
+        """
+        op = get_operation(op_name)
+        da, db = self._validate_many(a_seq), self._validate_many(b_seq)
+        if len(da) != len(db):
+            raise ValidationError(f"Operand lengths differ: {len(da)} != {len(db)}")
+        if not da:
+            return []
+
+        try:
+            with localcontext(self.context):
+                results = op.execute_many(da, db)
+        except Exception as e:
+            raise OperationError(str(e)) from e
+
+        now = datetime.now(UTC)
+        self.record_many(tuple(map(Calculation, repeat(op_name), da, db, results, repeat(now))))
+        return results
+
+    def record_many(self, calcs: Sequence[Calculation]) -> None:
+        """
+        Append calcs as one undo step and one observer notification; also how
+        calculations made elsewhere (app.parallel workers) are merged in.
+        """
+        # entries that would be evicted by the same batch never reach the buffer
+        kept = tuple(calcs[-self.history.capacity:])
+        # ...unless there is an archive to catch them
+        spilled = len(calcs) - len(kept) if self.archive is not None else 0
+        with self._lock:
+            evicted = self.history.extend(kept)
+            if spilled:
+                self.archive.extend(calcs[:spilled])
+            self.undo_stack.append(CalculatorMemento(kept, tuple(evicted), spilled))
+            self.redo_stack.clear()
+
+        self.notify_many(calcs)
 
     def undo(self) -> bool:
-        if not self.undo_stack:
-            return False
-        m = self.undo_stack.pop()
-        self.redo_stack.append(CalculatorMemento(self.history.copy()))
-        self.history = m.history.copy()
+        mt = self.metrics
+        t0 = clock() if mt else 0
+        with self._lock:
+            if not self.undo_stack:
+                return False
+            m = self.undo_stack.pop()
+            if m.spilled:
+                self.archive.unspill(m.spilled)
+            for _ in m.appended:
+                self.history.pop()
+            for c in reversed(m.evicted):
+                self.history.appendleft(c)
+            self.redo_stack.append(m)
+        t1 = clock() if mt else 0
+        self._emit("undo", m)
+        if mt:
+            mt.record("undo", "all", (("apply", t1 - t0), ("notify", clock() - t1)))
         return True
 
     def redo(self) -> bool:
-        if not self.redo_stack:
-            return False
-        m = self.redo_stack.pop()
-        self.undo_stack.append(CalculatorMemento(self.history.copy()))
-        self.history = m.history.copy()
+        mt = self.metrics
+        t0 = clock() if mt else 0
+        with self._lock:
+            if not self.redo_stack:
+                return False
+            m = self.redo_stack.pop()
+            self.history.extend(m.appended)
+            if m.spilled:
+                self.archive.respill(m.spilled)
+            self.undo_stack.append(m)
+        t1 = clock() if mt else 0
+        self._emit("redo", m)
+        if mt:
+            mt.record("redo", "all", (("apply", t1 - t0), ("notify", clock() - t1)))
         return True
 
         # persistence
     def save_history(self) -> Path:
-        df = self.get_history_dataframe()
-        path = Path(self.config.history_file)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(path, index=False, encoding=self.config.default_encoding)
+        """
+        Write the history to config.history_file. In multi_writer mode only the
+        entries added since the last save are written, as a new segment (see
+        app.history_segments); the segment directory is returned if there were none.
+        """
+        mt = self.metrics
+        t0 = clock() if mt else 0
+        if self.segments is not None:
+            path = self.commit_history() or self.segments.directory
+        else:
+            # deliver queued records first, so no compaction can start after the write
+            if self._dispatcher is not None:
+                self._dispatcher.drain()
+            for ob in self.observers:
+                ob.before_save(self)
+            path = Path(self.config.history_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.storage.write(self.history_snapshot(), path)
         self.logger.info("History saved to %s", path)
+        t1 = clock() if mt else 0
+        self._emit("save")
+        if mt:
+            mt.record("save_history", "all", (("write", t1 - t0), ("notify", clock() - t1)))
         return path
 
+    def commit_history(self) -> Path | None:
+        """multi_writer mode: write entries added since the last commit as a segment; its path, or None."""
+        with self._lock:
+            return self.segments.commit()
+
+    def iter_history(self, chunksize: int = 10_000, path: Path | None = None) -> Iterator[List[Calculation]]:
+        """Stream a history file (default: config.history_file) in batches without loading it all."""
+        path = Path(path) if path is not None else Path(self.config.history_file)
+        return self.storage.read(path, chunksize)
+
     def load_history(self) -> None:
+        """
+        Load the history snapshot, then replay any journal written in journal
+        auto-save mode, or merge in every process's segments in multi_writer
+        mode. Only the newest max_history_size entries are kept.
+        """
         path = Path(self.config.history_file)
-        if not path.exists():
+        segments = journal_segments(self.config)
+        if not path.exists() and not segments and self.segments is None:
             self.logger.info("No history file at %s", path)
             return
-        df = pd.read_csv(path)
-        self.history = [
-            Calculation.from_dict({
-                "operation": r["operation"],
-                "operand1": r["operand1"],
-                "operand2": r["operand2"],
-                "result": r["result"],
-                "timestamp": r["timestamp"],
-            })
-            for _, r in df.iterrows()
-        ]
-        self.logger.info("Loaded %d history records", len(self.history))
+        mt = self.metrics
+        t0 = clock() if mt else 0
+        if self.segments is not None:
+            history, events = load_segments(self.config, self.storage), 0
+        else:
+            history, events = rebuild_history(self.config, self.storage, segments)
+        t1 = clock() if mt else 0
+        with self._lock:
+            self._adopt_history(history)
+            # undo deltas refer to the history we just replaced
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+        if mt:
+            mt.record("load_history", "all", (("read", t1 - t0), ("swap", clock() - t1)))
+        self.logger.info("Loaded %d history records (%d journal events)", len(self.history), events)
+
+    def _adopt_history(self, history: HistoryBuffer, committed: bool = True) -> None:
+        self.history = history
+        # rebuilt on first use, so loading or restoring stays a bulk copy
+        self.index: HistoryIndex | None = None
+        self.aggregates: HistoryAggregates | None = None
+        if self.archive is not None:
+            history.add_listener(self.archive)
+        if self.segments is not None:
+            self.segments.attach(history, committed)
+
+    def _indexes(self) -> Tuple[HistoryIndex, HistoryAggregates]:
+        """The history's index and aggregates, built now if a load or restore left them out (hold the lock)."""
+        if self.index is None:
+            self.index = HistoryIndex(self.history)
+            self.aggregates = HistoryAggregates(self.history, self.backend.name)
+        return self.index, self.aggregates
+
+    def snapshot(self, path: Path | None = None) -> Path:
+        """
+        Write the history, the undo/redo stacks and the settings they depend on
+        to one binary file (default: config.snapshot_file; see
+        app.calculator_snapshot) for restore(). Not available with
+        history_archive, whose spilled rows the undo steps depend on.
+        """
+        if self.archive is not None:
+            raise ValueError("snapshots do not capture the history archive; turn history_archive off")
+        path = Path(path) if path is not None else Path(self.config.snapshot_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            write_snapshot(path, self.config, self.history, self.undo_stack, self.redo_stack)
+        self.logger.info("Snapshot written to %s", path)
+        return path
+
+    def restore(self, path: Path | None = None) -> None:
+        """
+        Bring back the state saved by snapshot(): history, undo/redo stacks,
+        numeric backend, precision, size limits. The settings go into a copy
+        of config, so a config shared with other calculators is left alone.
+        Observers get a "restore" event whose memento holds the new history.
+        """
+        mt = self.metrics
+        t0 = clock() if mt else 0
+        path = Path(path) if path is not None else Path(self.config.snapshot_file)
+        snap = read_snapshot(path)
+        t1 = clock() if mt else 0
+        with self._lock:
+            self.config = replace(self.config, **snap.settings)
+            self._configure_numbers()
+            if self.segments is not None:
+                self.segments.config, self.segments.storage = self.config, self.storage
+            # cache keys do not include the backend
+            self.cache.clear()
+            # restored rows may be newer than anything in history_dir: commit them with the next save
+            self._adopt_history(HistoryBuffer(self.config.max_history_size, snap.history), committed=False)
+            self.undo_stack = deque(snap.undo, maxlen=self.config.max_undo_depth)
+            self.redo_stack = deque(snap.redo, maxlen=self.config.max_undo_depth)
+            restored = CalculatorMemento(tuple(self.history))
+        self._emit("restore", restored)
+        if mt:
+            mt.record("restore", "all", (("read", t1 - t0), ("swap", clock() - t1)))
+        self.logger.info("Restored %d history records and %d/%d undo/redo steps from %s",
+                         len(snap.history), len(snap.undo), len(snap.redo), path)
 
     def clear(self) -> None:
-        self.history.clear()
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        with self._lock:
+            self.history.clear()
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+        self._emit("clear")
         self.logger.info("History cleared")
 
-    def get_history_dataframe(self) -> pd.DataFrame:
-        rows = [c.to_dict() for c in self.history]
-        return pd.DataFrame(rows, columns=["operation", "operand1", "operand2", "result", "timestamp"])
+    def query_history(
+        self,
+        op: str | None = None,
+        since: datetime | str | None = None,
+        until: datetime | str | None = None,
+        result_range: Tuple[object, object] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        newest_first: bool = False,
+        include_archive: bool = False,
+    ) -> List[Calculation]:
+        """
+        Filter and page through the history without copying it: op matches
+        the operation name (or expression text) case-insensitively, since
+        (inclusive) and until (exclusive) take datetimes or ISO strings, naive
+        ones meaning UTC, and result_range is an inclusive (low, high) pair
+        where either end may be None. Uses the incremental indexes in
+        app.history_index, so a page costs about O(log n + offset + limit).
+        include_archive also searches entries spilled to the history archive,
+        which come before the in-memory ones.
+        """
+        since, until = self._query_time(since), self._query_time(until)
+        if result_range is not None:
+            if len(result_range) != 2:
+                raise ValidationError("result_range must be a (low, high) pair")
+            try:
+                result_range = tuple(None if v is None else self.backend.parse(v) for v in result_range)
+            except Exception as e:
+                raise ValidationError(f"Invalid result range: {result_range}") from e
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValidationError("limit and offset must not be negative")
+        with self._lock:
+            index, _ = self._indexes()
+            if not include_archive or self.archive is None:
+                return index.query(op, since, until, result_range, limit, offset, newest_first)
+            window = index.matches(op, since, until, result_range, newest_first)
+            archived = partial(self.archive.matches, op, since, until, result_range, newest_first)
+            rows = _chain_skipping(window, archived, offset, newest_first)
+            return list(islice(rows, limit))
+
+    @staticmethod
+    def _query_time(t: datetime | str | None) -> datetime | None:
+        if t is None:
+            return None
+        if isinstance(t, str):
+            try:
+                t = datetime.fromisoformat(t)
+            except ValueError as e:
+                raise ValidationError(f"Invalid timestamp: {t}") from e
+        return t if t.tzinfo is not None else t.replace(tzinfo=UTC)
+
+    def summary(self, op: str | None = None) -> dict:
+        """
+        {operation: {count, sum, min, max, mean}} over the current history, for
+        one operation or all of them. Maintained as entries come and go (see
+        app.history_aggregates); sum and mean are rounded to the calculator's
+        precision.
+        """
+        with self._lock:
+            _, aggregates = self._indexes()
+            snapshot = aggregates.snapshot(op)
+        return aggregates.finish(snapshot, self.context)
+
+    def get_history_dataframe(self, include_archive: bool = False) -> "pd.DataFrame":
+        import pandas as pd
+
+        if include_archive and self.archive is not None:
+            history = self.query_history(include_archive=True)
+        else:
+            history = self.history_snapshot()
+        return pd.DataFrame([c.to_dict() for c in history], columns=HISTORY_COLUMNS)
+
+    def export_history(self, path: Path, include_archive: bool = True) -> Path:
+        """
+        Write the archived and in-memory history, oldest first, to path in the
+        format its suffix names (.csv or .bin). Archived rows are streamed, not
+        loaded all at once.
+        """
+        path = Path(path)
+        with self._lock:
+            rows = iter(self.history_snapshot())
+            if include_archive and self.archive is not None:
+                rows = chain(self.archive.matches(), rows)
+            storage_for_path(path, self.config.default_encoding).write(rows, path)
+        return path
@@ -23,29 +23,102 @@ class CalculatorConfig:
       CALCULATOR_LOG_DIR
       CALCULATOR_HISTORY_DIR
       CALCULATOR_MAX_HISTORY_SIZE
+      CALCULATOR_MAX_UNDO_DEPTH
       CALCULATOR_AUTO_SAVE           (true/false)
+      CALCULATOR_AUTO_SAVE_MODE      (snapshot/journal)
+      CALCULATOR_JOURNAL_FLUSH_EVERY
+      CALCULATOR_JOURNAL_COMPACT_EVERY
+      CALCULATOR_HISTORY_FORMAT      (csv/binary)
+      CALCULATOR_HISTORY_ARCHIVE     (true/false; spill evicted history to history_dir/archive)
+      CALCULATOR_MULTI_WRITER        (true/false; several processes share history_dir)
+      CALCULATOR_SEGMENT_COMPACT_EVERY (fold segments into the snapshot once there are this many)
+      CALCULATOR_ASYNC_OBSERVERS     (true/false)
+      CALCULATOR_OBSERVER_QUEUE_SIZE
+      CALCULATOR_OBSERVER_BACKPRESSURE (block/drop/coalesce)
+      CALCULATOR_NUMERIC_BACKEND     (decimal/float/fraction)
       CALCULATOR_PRECISION
+      CALCULATOR_THREAD_SAFE         (true/false; lock history/undo state for use from many threads)
       CALCULATOR_MAX_INPUT_VALUE
+      CALCULATOR_MAX_RESULT_DIGITS   (largest |decimal exponent| of a result; bounds power)
+      CALCULATOR_CACHE_SIZE          (0 disables the result cache)
+      CALCULATOR_PARALLEL_WORKERS    (worker processes for app.parallel; 0 = one per CPU)
+      CALCULATOR_PARALLEL_CHUNKSIZE  (calculations sent to a worker at a time)
       CALCULATOR_DEFAULT_ENCODING
+      CALCULATOR_LOG_FORMAT          (text/json)
+      CALCULATOR_LOG_QUEUE           (true/false; write the log from a background thread)
+      CALCULATOR_LOG_MAX_BYTES       (rotate the log at this size; 0 = never)
+      CALCULATOR_LOG_BACKUP_COUNT
+      CALCULATOR_LOG_SAMPLE_EVERY    (log 1 of every N calculations)
+      CALCULATOR_LOG_RATE_LIMIT      (max calculation records per second; 0 = unlimited)
+      CALCULATOR_INSTRUMENTATION     (true/false; per-phase timings for Calculator.stats())
     """
 
     base_dir: Path
     log_dir: Optional[Path] = None
     history_dir: Optional[Path] = None
     max_history_size: int = 100
+    max_undo_depth: int = 100
     auto_save: bool = True
+    auto_save_mode: str = "snapshot"
+    journal_flush_every: int = 50
+    journal_compact_every: int = 1000
+    history_format: str = "csv"
+    history_archive: bool = False
+    multi_writer: bool = False
+    segment_compact_every: int = 64
+    async_observers: bool = False
+    observer_queue_size: int = 1024
+    observer_backpressure: str = "block"
+    numeric_backend: str = "decimal"
     precision: int = 6
+    thread_safe: bool = False
     max_input_value: float = 1e12
+    max_result_digits: int = 100_000
+    cache_size: int = 1024
+    parallel_workers: int = 0
+    parallel_chunksize: int = 10_000
     default_encoding: str = "utf-8"
+    log_format: str = "text"
+    log_queue: bool = False
+    log_max_bytes: int = 0
+    log_backup_count: int = 3
+    log_sample_every: int = 1
+    log_rate_limit: float = 0.0
+    instrumentation: bool = False
 
     # Derived file paths
     @property
     def log_file(self) -> Path:
         return self.log_dir / "calculator.log"  # type: ignore[arg-type]
 
+    @property
+    def metrics_file(self) -> Path:
+        return self.log_dir / "metrics.prom"  # type: ignore[arg-type]
+
     @property
     def history_file(self) -> Path:
-        return self.history_dir / "history.csv"  # type: ignore[arg-type]
+        suffix = ".bin" if self.history_format == "binary" else ".csv"
+        return self.history_dir / f"history{suffix}"  # type: ignore[arg-type]
+
+    @property
+    def archive_dir(self) -> Path:
+        return self.history_dir / "archive"  # type: ignore[operator]
+
+    @property
+    def snapshot_file(self) -> Path:
+        return self.history_dir / "calculator.snapshot"  # type: ignore[operator]
+
+    @property
+    def segment_dir(self) -> Path:
+        return self.history_dir / "segments"  # type: ignore[operator]
+
+    @property
+    def lock_file(self) -> Path:
+        return self.history_dir / "history.lock"  # type: ignore[operator]
+
+    @property
+    def journal_file(self) -> Path:
+        return self.history_dir / "history.journal"  # type: ignore[arg-type]
 
     def __post_init__(self) -> None:
         # Normalize to Path and set default dirs if not provided
@@ -61,12 +134,52 @@ class CalculatorConfig:
         self.history_dir.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
         if self.max_history_size <= 0:
             self.max_history_size = 100
-        if self.precision < 0:
+        if self.max_undo_depth <= 0:
+            self.max_undo_depth = 100
+        if self.auto_save_mode not in {"snapshot", "journal"}:
+            self.auto_save_mode = "snapshot"
+        if self.journal_flush_every <= 0:
+            self.journal_flush_every = 50
+        if self.journal_compact_every <= 0:
+            self.journal_compact_every = 1000
+        if self.history_format not in {"csv", "binary"}:
+            self.history_format = "csv"
+        if self.multi_writer:
+            # the journal and the archive each assume a single writing process
+            self.auto_save_mode = "snapshot"
+            self.history_archive = False
+        if self.segment_compact_every <= 0:
+            self.segment_compact_every = 64
+        if self.observer_queue_size <= 0:
+            self.observer_queue_size = 1024
+        if self.observer_backpressure not in {"block", "drop", "coalesce"}:
+            self.observer_backpressure = "block"
+        if self.numeric_backend not in {"decimal", "float", "fraction"}:
+            self.numeric_backend = "decimal"
+        if self.precision <= 0:
             self.precision = 6
         if self.max_input_value <= 0:
             self.max_input_value = 1e12
+        if self.max_result_digits <= 0:
+            self.max_result_digits = 100_000
+        if self.cache_size < 0:
+            self.cache_size = 1024
+        if self.parallel_workers < 0:
+            self.parallel_workers = 0
+        if self.parallel_chunksize <= 0:
+            self.parallel_chunksize = 10_000
         if not self.default_encoding:
             self.default_encoding = "utf-8"
+        if self.log_format not in {"text", "json"}:
+            self.log_format = "text"
+        if self.log_max_bytes < 0:
+            self.log_max_bytes = 0
+        if self.log_backup_count < 0:
+            self.log_backup_count = 3
+        if self.log_sample_every <= 0:
+            self.log_sample_every = 1
+        if self.log_rate_limit < 0:
+            self.log_rate_limit = 0.0
 
     @classmethod
     def from_env(cls, base_dir: Path | None = None) -> "CalculatorConfig":
@@ -102,18 +215,66 @@ class CalculatorConfig:
         log_dir = _get_path("CALCULATOR_LOG_DIR", "logs")
         history_dir = _get_path("CALCULATOR_HISTORY_DIR", "history")
         max_history_size = _get_int("CALCULATOR_MAX_HISTORY_SIZE", 100)
+        max_undo_depth = _get_int("CALCULATOR_MAX_UNDO_DEPTH", 100)
         auto_save = _get_bool("CALCULATOR_AUTO_SAVE", True)
+        auto_save_mode = os.getenv("CALCULATOR_AUTO_SAVE_MODE", "snapshot").strip().lower()
+        journal_flush_every = _get_int("CALCULATOR_JOURNAL_FLUSH_EVERY", 50)
+        journal_compact_every = _get_int("CALCULATOR_JOURNAL_COMPACT_EVERY", 1000)
+        history_format = os.getenv("CALCULATOR_HISTORY_FORMAT", "csv").strip().lower()
+        history_archive = _get_bool("CALCULATOR_HISTORY_ARCHIVE", False)
+        multi_writer = _get_bool("CALCULATOR_MULTI_WRITER", False)
+        segment_compact_every = _get_int("CALCULATOR_SEGMENT_COMPACT_EVERY", 64)
+        async_observers = _get_bool("CALCULATOR_ASYNC_OBSERVERS", False)
+        observer_queue_size = _get_int("CALCULATOR_OBSERVER_QUEUE_SIZE", 1024)
+        observer_backpressure = os.getenv("CALCULATOR_OBSERVER_BACKPRESSURE", "block").strip().lower()
+        numeric_backend = os.getenv("CALCULATOR_NUMERIC_BACKEND", "decimal").strip().lower()
         precision = _get_int("CALCULATOR_PRECISION", 6)
+        thread_safe = _get_bool("CALCULATOR_THREAD_SAFE", False)
         max_input_value = _get_float("CALCULATOR_MAX_INPUT_VALUE", 1e12)
+        max_result_digits = _get_int("CALCULATOR_MAX_RESULT_DIGITS", 100_000)
+        cache_size = _get_int("CALCULATOR_CACHE_SIZE", 1024)
+        parallel_workers = _get_int("CALCULATOR_PARALLEL_WORKERS", 0)
+        parallel_chunksize = _get_int("CALCULATOR_PARALLEL_CHUNKSIZE", 10_000)
         default_encoding = os.getenv("CALCULATOR_DEFAULT_ENCODING", "utf-8")
+        log_format = os.getenv("CALCULATOR_LOG_FORMAT", "text").strip().lower()
+        log_queue = _get_bool("CALCULATOR_LOG_QUEUE", False)
+        log_max_bytes = _get_int("CALCULATOR_LOG_MAX_BYTES", 0)
+        log_backup_count = _get_int("CALCULATOR_LOG_BACKUP_COUNT", 3)
+        log_sample_every = _get_int("CALCULATOR_LOG_SAMPLE_EVERY", 1)
+        log_rate_limit = _get_float("CALCULATOR_LOG_RATE_LIMIT", 0.0)
+        instrumentation = _get_bool("CALCULATOR_INSTRUMENTATION", False)
 
         return cls(
             base_dir=bd,
             log_dir=log_dir,
             history_dir=history_dir,
             max_history_size=max_history_size,
+            max_undo_depth=max_undo_depth,
             auto_save=auto_save,
+            auto_save_mode=auto_save_mode,
+            journal_flush_every=journal_flush_every,
+            journal_compact_every=journal_compact_every,
+            history_format=history_format,
+            history_archive=history_archive,
+            multi_writer=multi_writer,
+            segment_compact_every=segment_compact_every,
+            async_observers=async_observers,
+            observer_queue_size=observer_queue_size,
+            observer_backpressure=observer_backpressure,
+            numeric_backend=numeric_backend,
             precision=precision,
+            thread_safe=thread_safe,
             max_input_value=max_input_value,
+            max_result_digits=max_result_digits,
+            cache_size=cache_size,
+            parallel_workers=parallel_workers,
+            parallel_chunksize=parallel_chunksize,
             default_encoding=default_encoding,
+            log_format=log_format,
+            log_queue=log_queue,
+            log_max_bytes=log_max_bytes,
+            log_backup_count=log_backup_count,
+            log_sample_every=log_sample_every,
+            log_rate_limit=log_rate_limit,
+            instrumentation=instrumentation,
         )
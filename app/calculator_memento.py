@@ -1,7 +1,15 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Tuple
 from app.calculation import Calculation
 
-@dataclass
+@dataclass(frozen=True)
 class CalculatorMemento:
-    history: List[Calculation]
+    """
+    One undoable step, stored as a delta instead of a history copy:
+    the calculations appended to the tail and the ones that fell off the head.
+    spilled counts the leading calculations of a batch wider than the history
+    that went straight to the spill archive (see app.history_archive).
+    """
+    appended: Tuple[Calculation, ...]
+    evicted: Tuple[Calculation, ...] = ()
+    spilled: int = 0
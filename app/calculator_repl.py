@@ -1,12 +1,93 @@
+import argparse
+import sys
+
+from app.batch import OUTPUT_FORMATS, run_batch
 from app.calculator import Calculator
-from app.history import LoggingObserver, AutoSaveObserver
+from app.operations import FACTORY
+from app.history import LoggingObserver, AutoSaveObserver, JournalObserver
+from app.instrumentation import format_stats
+
+HISTORY_PAGE_SIZE = 20
+
+def parse_history_filters(args) -> dict:
+    """history [OP] [since=ISO] [until=ISO] [min=N] [max=N] [newest] [all] -> query_history() keywords."""
+    query, low, high = {}, None, None
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            if arg == "newest":
+                query["newest_first"] = True
+            elif arg == "all":
+                query["include_archive"] = True
+            else:
+                query["op"] = arg
+        elif key in ("since", "until"):
+            query[key] = value
+        elif key == "min":
+            low = value
+        elif key == "max":
+            high = value
+        else:
+            raise ValueError(f"Unknown history filter: {key}")
+    if low is not None or high is not None:
+        query["result_range"] = (low, high)
+    return query
+
+def print_history(calc, args) -> None:
+    """Print matching entries a page at a time, prompting between pages."""
+    query = parse_history_filters(args)
+    offset = 0
+    while True:
+        # one extra row tells whether another page follows
+        page = calc.query_history(**query, limit=HISTORY_PAGE_SIZE + 1, offset=offset)
+        for c in page[:HISTORY_PAGE_SIZE]:
+            if c.operation in FACTORY:
+                print(f"{c.operation}({c.operand1}, {c.operand2}) = {c.result} @ {c.timestamp.isoformat()}")
+            else:
+                print(f"{c.operation} = {c.result} @ {c.timestamp.isoformat()}")
+        if not page and not offset:
+            print("No matching history.")
+        if len(page) <= HISTORY_PAGE_SIZE:
+            return
+        offset += HISTORY_PAGE_SIZE
+        if input("-- more (Enter: next page, q: stop) -- ").strip().lower() == "q":
+            return
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Advanced calculator REPL.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) without prompting")
+    parser.add_argument("--output", choices=OUTPUT_FORMATS, default="csv",
+                        help="batch result format written to stdout")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, metavar="N",
+                        help="persist history every N batch commands (0: only at the end)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop the batch at the first failing command")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     calc = Calculator()
     # observers
     calc.add_observer(LoggingObserver())
     if calc.config.auto_save:
-        calc.add_observer(AutoSaveObserver())
+        if calc.config.auto_save_mode == "journal":
+            calc.add_observer(JournalObserver())
+        elif not args.batch:
+            # batch mode saves at checkpoints instead of after every line
+            calc.add_observer(AutoSaveObserver())
+
+    if args.batch:
+        src = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+        try:
+            summary = run_batch(calc, src, sys.stdout, fmt=args.output,
+                                checkpoint_every=args.checkpoint_every, fail_fast=args.fail_fast)
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            calc.close()
+        print(summary, file=sys.stderr)
+        return 1 if summary.errors else 0
 
     print("Calculator started. Type 'help' for commands.")
     while True:
@@ -17,15 +98,30 @@ def main():
             print("""
 Available commands:
   add, subtract, multiply, divide, power, root, modulus, int_divide, percent, abs_diff
-  history, clear, undo, redo, save, load, exit
+  history [OP] [since=ISO] [until=ISO] [min=N] [max=N] [newest] [all]
+  summary [OP]
+  clear, undo, redo, save, load, cache, stats, exit
+  snapshot [PATH], restore [PATH]
+Or type an expression, e.g. (3 + 4) * 2 ^ 5 % 7, root(ans, 2)
 """)
             continue
         if cmd == "exit":
+            calc.close()
             print("Goodbye!")
             break
-        if cmd == "history":
-            for row in calc.get_history_dataframe().itertuples(index=False):
-                print(f"{row.operation}({row.operand1}, {row.operand2}) = {row.result} @ {row.timestamp}")
+        if cmd == "history" or cmd.startswith("history "):
+            try:
+                print_history(calc, cmd.split()[1:])
+            except Exception as e:
+                print(f"Error: {e}")
+            continue
+        if cmd == "summary" or cmd.startswith("summary "):
+            rows = calc.summary(*cmd.split()[1:2])
+            for op, st in rows.items():
+                print(f"{op}: count {st['count']}, sum {st['sum']}, min {st['min']}, "
+                      f"max {st['max']}, mean {st['mean']}")
+            if not rows:
+                print("No matching history.")
             continue
         if cmd == "clear":
             calc.clear(); print("History cleared."); continue
@@ -37,18 +133,40 @@ Available commands:
             p = calc.save_history(); print(f"Saved to {p}"); continue
         if cmd == "load":
             calc.load_history(); print("History loaded."); continue
-
-        # operation commands: op a b
-        parts = cmd.split()
-        if len(parts) == 3:
-            op, a, b = parts
+        if cmd.split()[0] in ("snapshot", "restore"):
+            name, *rest = cmd.split()
             try:
-                result = calc.perform(op, a, b)
-                print(f"= {result}")
-            except Exception as e:
+                if name == "snapshot":
+                    print(f"Snapshot written to {calc.snapshot(*rest[:1])}")
+                else:
+                    calc.restore(*rest[:1]); print("State restored.")
+            except (OSError, ValueError) as e:
                 print(f"Error: {e}")
-        else:
-            print("Unknown command. Type 'help'.")
+            continue
+        if cmd == "cache":
+            st = calc.cache_stats()
+            print(f"Cache: {st['hits']} hits, {st['misses']} misses, {st['evictions']} evictions, "
+                  f"{st['size']}/{st['maxsize']} entries")
+            continue
+        if cmd == "stats":
+            if calc.metrics is None:
+                print("Instrumentation is off (set CALCULATOR_INSTRUMENTATION=true).")
+                continue
+            for line in format_stats(calc.stats()) or ["No calls recorded yet."]:
+                print(line)
+            print(f"Prometheus metrics written to {calc.write_metrics()}")
+            continue
+
+        # operation commands: op a b; anything else is an expression
+        parts = cmd.split()
+        try:
+            if len(parts) == 3 and parts[0].lower() in FACTORY:
+                result = calc.perform(*parts)
+            else:
+                result = calc.evaluate(cmd)
+            print(f"= {result}")
+        except Exception as e:
+            print(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Warm-restart snapshots: history, undo/redo stacks and the settings they
+depend on in one versioned binary file (Calculator.snapshot / restore).
+
+    header      "<8sHIIIII"  magic, version, settings length, history length,
+                undo steps, redo steps, step references
+    settings    JSON: numeric backend, precision and the history/undo/limit sizes
+    history     u32 table row per entry, oldest first
+    steps       (u32 appended, u32 evicted, u32 spilled) per undo step, oldest
+                first, then per redo step
+    step refs   u32 table rows: each step's appended then evicted calculations
+    table       every distinct Calculation once, as an embedded binary history
+                image (see BinaryHistoryStorage), history rows first
+
+A calculation shared by the history and the stacks (an undo step's appended
+entries are usually still in the history) is stored once, and restore hands
+back the same object in every place. Restore maps the file and decodes the
+table column by column, so there is no per-row text parsing; the rest is
+integer lookups.
+"""
+from __future__ import annotations
+from array import array
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Sequence
+
+from app.calculation import Calculation
+from app.calculator_memento import CalculatorMemento
+from app.history_storage import BinaryHistoryStorage, _atomic_path, _column, _le_bytes
+from app.numeric import get_backend
+
+MAGIC = b"CALCSNAP"
+VERSION = 1
+_HEADER = struct.Struct("<8sHIIIII")
+
+# the settings a restored history and undo stack only make sense with
+SETTINGS = (
+    "numeric_backend", "precision", "max_history_size", "max_undo_depth",
+    "max_input_value", "max_result_digits",
+)
+
+
+class Snapshot(NamedTuple):
+    settings: Dict[str, object]
+    history: List[Calculation]
+    undo: List[CalculatorMemento]
+    redo: List[CalculatorMemento]
+
+
+def write_snapshot(
+    path: Path,
+    config,
+    history: Iterable[Calculation],
+    undo: Sequence[CalculatorMemento],
+    redo: Sequence[CalculatorMemento],
+) -> None:
+    """Write a snapshot to path atomically (temp file + rename)."""
+    table: List[Calculation] = []
+    rows: Dict[int, int] = {}
+
+    def row(c: Calculation) -> int:
+        i = rows.get(id(c))
+        if i is None:
+            i = rows[id(c)] = len(table)
+            table.append(c)
+        return i
+
+    entries = array("I", map(row, history))
+    steps, refs = array("I"), array("I")
+    for m in (*undo, *redo):
+        steps.extend((len(m.appended), len(m.evicted), m.spilled))
+        refs.extend(map(row, m.appended))
+        refs.extend(map(row, m.evicted))
+    settings = json.dumps({name: getattr(config, name) for name in SETTINGS}).encode("utf-8")
+
+    tmp = _atomic_path(path)
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, VERSION, len(settings), len(entries), len(undo), len(redo), len(refs)))
+        fh.write(settings)
+        for col in (entries, steps, refs):
+            fh.write(_le_bytes(col))
+        BinaryHistoryStorage().dump(table, fh)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: Path) -> Snapshot:
+    """Read a snapshot; ValueError if path is not one, or is truncated or corrupt."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size < _HEADER.size:
+            raise ValueError(f"{path} is not a calculator snapshot")
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+            try:
+                return _decode(buf, path)
+            except (struct.error, IndexError, KeyError, TypeError, ArithmeticError) as e:
+                # raised outside the with: the traceback's frames still hold views of buf
+                error = f"{path} is truncated or corrupt: {e!r}"
+    raise ValueError(error)
+
+
+def _decode(buf: memoryview, path: Path) -> Snapshot:
+    magic, version, n_settings, n_history, n_undo, n_redo, n_refs = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a calculator snapshot this version can read")
+    pos = _HEADER.size
+    stored = json.loads(bytes(buf[pos:pos + n_settings]).decode("utf-8"))
+    settings = {name: stored[name] for name in SETTINGS}
+    if not isinstance(settings["numeric_backend"], str) or not all(
+        isinstance(settings[name], (int, float)) for name in SETTINGS[1:]
+    ):
+        raise TypeError(f"bad settings: {stored}")
+    pos += n_settings
+    cols = []
+    for n in (n_history, 3 * (n_undo + n_redo), n_refs):
+        view, pos = _column(buf, pos, "I", n)
+        cols.append(view.tolist())
+        view.release()
+    entries, steps, refs = cols
+
+    storage = BinaryHistoryStorage(get_backend(settings["numeric_backend"]).number)
+    with buf[pos:] as image:
+        table = [c for chunk in storage.load(image, str(path), chunksize=1 << 30) for c in chunk]
+    history = [table[i] for i in entries]
+    mementos = []
+    at = 0
+    for k in range(0, len(steps), 3):
+        appended, evicted, spilled = steps[k:k + 3]
+        mid, end = at + appended, at + appended + evicted
+        mementos.append(CalculatorMemento(
+            tuple(table[i] for i in refs[at:mid]), tuple(table[i] for i in refs[mid:end]), spilled,
+        ))
+        at = end
+    return Snapshot(settings, history, mementos[:n_undo], mementos[n_undo:])
@@ -0,0 +1,286 @@
+"""
+Infix expressions over the FACTORY operations, e.g. ``(3 + 4) * 2 ^ 5 % 7``.
+
+Operators: ``+ - * / // % ^`` (``^`` is right-associative and binds tighter
+than unary minus), parentheses, and any factory operation as a two-argument
+function such as ``root(9, 2)``. Names other than functions are variables;
+``ans`` is bound by Calculator.evaluate to the last result.
+
+Source text is parsed into an AST, constant sub-expressions are folded, and
+the result is flattened into a stack-machine plan. Plans are cached per
+(source, precision, rounding, numeric backend), so re-evaluating a template
+skips parsing.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from functools import lru_cache
+import re
+from typing import FrozenSet, List, Mapping, Tuple
+
+from app.exceptions import ValidationError
+from app.numeric import get_backend
+from app.operations import FACTORY, get_operation
+
+BINARY_OPERATORS = {
+    "+": "add",
+    "-": "subtract",
+    "*": "multiply",
+    "/": "divide",
+    "//": "int_divide",
+    "%": "modulus",
+    "^": "power",
+}
+_SYMBOLS = {name: sym for sym, name in BINARY_OPERATORS.items()}
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "//": 2, "%": 2, "neg": 3, "^": 4}
+_ATOM = 5
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z_]\w*)|(//|[-+*/%^(),]))")
+
+# instruction codes of a compiled plan
+PUSH, LOAD, NEG, CALL = range(4)
+
+
+def tokenize(source: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        m = _TOKEN.match(source, pos)
+        if not m:
+            raise ValidationError(f"Unexpected character {source[pos:].lstrip()[:1]!r} in expression")
+        number, name, symbol = m.groups()
+        if number is not None:
+            tokens.append(("num", number))
+        elif name is not None:
+            tokens.append(("name", name))
+        else:
+            tokens.append(("sym", symbol))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing tuples: ("num", Decimal), ("var", name),
+    ("neg", node) and ("op", factory_name, left, right)."""
+
+    def __init__(self, tokens: List[Tuple[str, str]], number=Decimal):
+        self.tokens = tokens
+        self.number = number
+        self.i = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise ValidationError("Empty expression")
+        node = self.expr()
+        if self.i < len(self.tokens):
+            raise ValidationError(f"Unexpected {self.tokens[self.i][1]!r} in expression")
+        return node
+
+    def peek(self):
+        return self.tokens[self.i][1] if self.i < len(self.tokens) else None
+
+    def take(self, expected: str | None = None) -> Tuple[str, str]:
+        if self.i >= len(self.tokens):
+            raise ValidationError("Unexpected end of expression")
+        tok = self.tokens[self.i]
+        if expected is not None and tok[1] != expected:
+            raise ValidationError(f"Expected {expected!r} but found {tok[1]!r}")
+        self.i += 1
+        return tok
+
+    def expr(self):
+        node = self.term()
+        while self.peek() in ("+", "-"):
+            sym = self.take()[1]
+            node = ("op", BINARY_OPERATORS[sym], node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek() in ("*", "/", "//", "%"):
+            sym = self.take()[1]
+            node = ("op", BINARY_OPERATORS[sym], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == "-":
+            self.take()
+            return ("neg", self.unary())
+        if self.peek() == "+":
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        node = self.primary()
+        if self.peek() == "^":
+            self.take()
+            node = ("op", "power", node, self.unary())
+        return node
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "num":
+            return ("num", self.number(text))
+        if kind == "name":
+            if self.peek() != "(":
+                return ("var", text)
+            name = text.lower()
+            if name not in FACTORY:
+                raise ValidationError(f"Unknown function: {text}")
+            self.take("(")
+            left = self.expr()
+            self.take(",")
+            right = self.expr()
+            self.take(")")
+            return ("op", name, left, right)
+        if text == "(":
+            node = self.expr()
+            self.take(")")
+            return node
+        raise ValidationError(f"Unexpected {text!r} in expression")
+
+
+def _prec(node) -> int:
+    if node[0] == "neg":
+        return _PRECEDENCE["neg"]
+    if node[0] == "op" and node[1] in _SYMBOLS:
+        return _PRECEDENCE[_SYMBOLS[node[1]]]
+    return _ATOM
+
+
+def unparse(node) -> str:
+    """Canonical text of an AST, with only the parentheses it needs."""
+    kind = node[0]
+    if kind == "num":
+        return str(node[1])
+    if kind == "var":
+        return node[1]
+    if kind == "neg":
+        inner = unparse(node[1])
+        return f"-{inner}" if _prec(node[1]) >= _PRECEDENCE["neg"] else f"-({inner})"
+    _, name, left, right = node
+    if name not in _SYMBOLS:
+        return f"{name}({unparse(left)}, {unparse(right)})"
+    sym = _SYMBOLS[name]
+    p = _PRECEDENCE[sym]
+    if sym == "^":
+        left_ok, right_ok = _prec(left) > p, _prec(right) >= _PRECEDENCE["neg"]
+    else:
+        left_ok, right_ok = _prec(left) >= p, _prec(right) > p
+    lhs = unparse(left) if left_ok else f"({unparse(left)})"
+    rhs = unparse(right) if right_ok else f"({unparse(right)})"
+    return f"{lhs} {sym} {rhs}"
+
+
+def _fold(node):
+    """Collapse constant sub-expressions; anything that would raise is left for run time."""
+    kind = node[0]
+    if kind == "neg":
+        inner = _fold(node[1])
+        if inner[0] == "num":
+            return ("num", -inner[1])
+        return ("neg", inner)
+    if kind != "op":
+        return node
+    _, name, left, right = node
+    left, right = _fold(left), _fold(right)
+    if left[0] == "num" and right[0] == "num":
+        try:
+            return ("num", get_operation(name).execute(left[1], right[1]))
+        except (ArithmeticError, ValueError):
+            pass
+    return ("op", name, left, right)
+
+
+def _emit(node, code: list) -> None:
+    kind = node[0]
+    if kind == "num":
+        code.append((PUSH, node[1]))
+    elif kind == "var":
+        code.append((LOAD, node[1]))
+    elif kind == "neg":
+        _emit(node[1], code)
+        code.append((NEG, None))
+    else:
+        _emit(node[2], code)
+        _emit(node[3], code)
+        code.append((CALL, get_operation(node[1])))
+
+
+def _names(node, out: set) -> None:
+    if node[0] == "var":
+        out.add(node[1])
+    elif node[0] == "neg":
+        _names(node[1], out)
+    elif node[0] == "op":
+        _names(node[2], out)
+        _names(node[3], out)
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    source: str
+    code: Tuple[Tuple[int, object], ...]
+    names: FrozenSet[str]
+
+    def run(self, variables: Mapping[str, Decimal]) -> Tuple[Decimal, Decimal, Decimal]:
+        """
+        Execute the plan under the current decimal context. Returns the result
+        and the operands of the last (outermost) operation; for a bare value
+        those are the value itself and 0.
+        """
+        stack: List[Decimal] = []
+        last = None
+        for code, arg in self.code:
+            if code == PUSH:
+                stack.append(arg)
+            elif code == LOAD:
+                stack.append(variables[arg])
+            elif code == NEG:
+                stack.append(-stack.pop())
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                last = (a, b)
+                stack.append(arg.execute(a, b))
+        result = stack.pop()
+        if self.code[-1][0] != CALL:
+            last = (result, type(result)(0))
+        return result, last[0], last[1]
+
+
+@lru_cache(maxsize=512)
+def compile_expression(
+    source: str, prec: int, rounding: str, backend: str = "decimal", emax: int = 999_999, limit=None
+) -> CompiledExpression:
+    """
+    Parse, fold and flatten source; folding runs under the given context.
+    Literals beyond 10**emax or with a magnitude over limit are rejected while
+    parsing, so folding never starts on operands the calculator would refuse.
+    """
+    be = get_backend(backend)
+
+    def literal(text: str):
+        if Decimal(text).adjusted() > emax:
+            raise ValidationError(f"Value out of bounds: {text}")
+        value = be.parse(text)
+        if limit is not None and be.magnitude(value) > limit:
+            raise ValidationError(f"Value out of bounds: {text}")
+        return value
+
+    tree = _Parser(tokenize(source), literal).parse()
+    with localcontext() as ctx:
+        ctx.prec, ctx.rounding, ctx.Emax, ctx.Emin = prec, rounding, emax, -emax
+        # the outermost operation stays unfolded so its operands can be recorded
+        if tree[0] == "op":
+            folded = ("op", tree[1], _fold(tree[2]), _fold(tree[3]))
+        else:
+            folded = _fold(tree)
+    code: list = []
+    _emit(folded, code)
+    names: set = set()
+    _names(tree, names)
+    return CompiledExpression(unparse(tree), tuple(code), frozenset(names))
+
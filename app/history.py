@@ -1,24 +1,293 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-import pandas as pd
+from decimal import Decimal
+import json
+import os
+import shutil
+import threading
+import time
 from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
 from app.calculation import Calculation
+from app.history_buffer import HistoryBuffer
+from app.history_storage import get_storage
+from app.numeric import get_backend
 
 class HistoryObserver(ABC):
     @abstractmethod
     def update(self, calculator: "Calculator", calc: Calculation) -> None: ...
 
+    def update_many(self, calculator: "Calculator", calcs: Sequence[Calculation]) -> None:
+        """Called once per perform_many batch; defaults to one update() per calculation."""
+        for calc in calcs:
+            self.update(calculator, calc)
+
+    def on_event(self, calculator: "Calculator", event: str, memento: Optional["CalculatorMemento"] = None) -> None:
+        """
+        Called on undo/redo (with the memento being applied), on restore (with
+        the restored history as memento.appended) and on clear/save; observers
+        that don't care can ignore it.
+        """
+
+    def before_save(self, calculator: "Calculator") -> None:
+        """Called by save_history before it writes the full history; no-op by default."""
+
+    def flush(self) -> None:
+        """Persist anything still buffered; no-op by default."""
+
 class LoggingObserver(HistoryObserver):
+    """
+    Logs each calculation, thinned out by config.log_sample_every (keep 1 in N)
+    and config.log_rate_limit (token bucket, records per second). Records
+    skipped either way are counted in .suppressed.
+    """
+
+    def __init__(self) -> None:
+        self.seen = 0
+        self.suppressed = 0
+        self._tokens: Optional[float] = None
+        self._last = 0.0
+
     def update(self, calculator: "Calculator", calc: Calculation) -> None:
+        if not self._admit(calculator.config):
+            return
+        # %-style args + the record attribute keep formatting lazy (and off-thread with a queue)
         calculator.logger.info(
             "Calculated %s(%s, %s) = %s",
-            calc.operation, calc.operand1, calc.operand2, calc.result
+            calc.operation, calc.operand1, calc.operand2, calc.result,
+            extra={"calculation": calc},
         )
 
+    def _admit(self, config) -> bool:
+        self.seen += 1
+        if (self.seen - 1) % config.log_sample_every:
+            self.suppressed += 1
+            return False
+        rate = config.log_rate_limit
+        if rate > 0:
+            now = time.monotonic()
+            burst = max(rate, 1.0)
+            if self._tokens is None:
+                self._tokens = burst
+            else:
+                self._tokens = min(burst, self._tokens + (now - self._last) * rate)
+            self._last = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return False
+            self._tokens -= 1
+        return True
+
 class AutoSaveObserver(HistoryObserver):
     def update(self, calculator: "Calculator", calc: Calculation) -> None:
-        # Save entire history to CSV
-        df = calculator.get_history_dataframe()
-        path = Path(calculator.config.history_dir) / "calculator_history.csv"
-        df.to_csv(path, index=False, encoding=calculator.config.default_encoding)
+        if calculator.segments is not None:
+            # shared history_dir: commit only what this process added
+            path = calculator.commit_history()
+            calculator.logger.info("Auto-saved history to %s", path)
+            return
+        # Save entire history in the configured format
+        storage = calculator.storage
+        path = Path(calculator.config.history_dir) / f"calculator_history{storage.suffix}"
+        storage.write(calculator.history_snapshot(), path)
         calculator.logger.info("Auto-saved history to %s", path)
+
+    def update_many(self, calculator: "Calculator", calcs: Sequence[Calculation]) -> None:
+        # the whole history is rewritten anyway, so once per batch is enough
+        if calcs:
+            self.update(calculator, calcs[-1])
+
+
+# ---- append-only journal
+
+def _pending_path(journal: Path) -> Path:
+    return journal.with_name(journal.name + ".compacting")
+
+def journal_segments(config) -> List[Path]:
+    """
+    Journal files that still have to be replayed on top of config.history_file,
+    oldest first. A ".compacting" segment left behind by an interrupted
+    compaction only counts if the snapshot was not rewritten after it.
+    """
+    journal = Path(config.journal_file)
+    pending = _pending_path(journal)
+    snapshot = Path(config.history_file)
+    segments = []
+    if pending.exists() and (
+        not snapshot.exists() or pending.stat().st_mtime_ns > snapshot.stat().st_mtime_ns
+    ):
+        segments.append(pending)
+    if journal.exists():
+        segments.append(journal)
+    return segments
+
+def rebuild_history(config, storage, segments: Iterable[Path]) -> Tuple[HistoryBuffer, int]:
+    """
+    Read the snapshot at config.history_file (keeping only the newest
+    max_history_size entries) and replay journal segments on top of it.
+    Returns the history and the number of journal events applied.
+    """
+    history = HistoryBuffer(config.max_history_size)
+    snapshot = Path(config.history_file)
+    if snapshot.exists():
+        for chunk in storage.read(snapshot):
+            history.extend(chunk[-history.capacity:])
+    return history, replay_journal(history, segments, storage.number)
+
+def replay_journal(history: HistoryBuffer, paths: Iterable[Path], number=Decimal) -> int:
+    """
+    Apply journal events to history in place; returns the number of events
+    applied. Raises ValueError, naming the file and line, at an undo the
+    history cannot take back (a journal that does not belong to the snapshot,
+    or a max_history_size smaller than when it was written).
+    """
+    applied = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn write at the tail of the file
+                event = rec.pop("event")
+                if event == "append":
+                    history.append(Calculation.from_dict(rec, number))
+                elif event == "undo":
+                    left = len(history) - rec["appended"]
+                    if left < 0 or left + len(rec["evicted"]) > history.capacity:
+                        raise ValueError(
+                            f"{path}:{lineno}: journal undo does not match the history "
+                            f"({len(history)} of {history.capacity} entries, undoing {rec['appended']}, "
+                            f"restoring {len(rec['evicted'])}); remove the journal to load the snapshot alone"
+                        )
+                    for _ in range(rec["appended"]):
+                        history.pop()
+                    for d in reversed(rec["evicted"]):
+                        history.appendleft(Calculation.from_dict(d, number))
+                elif event == "redo":
+                    history.extend(Calculation.from_dict(d, number) for d in rec["appended"])
+                elif event == "clear":
+                    history.clear()
+                applied += 1
+    return applied
+
+class JournalObserver(HistoryObserver):
+    """
+    Append-only auto-save. Every calculation, undo, redo and clear becomes one
+    JSON line in config.journal_file, written in groups of journal_flush_every.
+    After journal_compact_every records the journal is rotated and folded into
+    config.history_file on a background thread.
+    """
+
+    def __init__(self) -> None:
+        self._config = None
+        self._logger = None
+        self._buffer: List[str] = []
+        self._records = 0
+        self._compactor: Optional[threading.Thread] = None
+
+    def update(self, calculator: "Calculator", calc: Calculation) -> None:
+        self._record(calculator, {"event": "append", **calc.to_dict()})
+
+    def update_many(self, calculator: "Calculator", calcs: Sequence[Calculation]) -> None:
+        self._record_many(calculator, [{"event": "append", **c.to_dict()} for c in calcs])
+
+    def on_event(self, calculator: "Calculator", event: str, memento: Optional["CalculatorMemento"] = None) -> None:
+        if event in ("save", "restore"):
+            # a full snapshot supersedes the journal: save_history just wrote
+            # one, and a restore replaced the history the journal describes
+            self._bind(calculator)
+            self._join()
+            if event == "restore":
+                # restore swaps in a config copy; compaction must use its backend and sizes
+                self._config = calculator.config
+                calculator.storage.write(memento.appended, Path(self._config.history_file))
+            self._buffer.clear()
+            self._records = 0
+            journal = Path(self._config.journal_file)
+            journal.unlink(missing_ok=True)
+            _pending_path(journal).unlink(missing_ok=True)
+        elif event == "undo":
+            self._record(calculator, {
+                "event": "undo",
+                "appended": len(memento.appended),
+                "evicted": [c.to_dict() for c in memento.evicted],
+            })
+        elif event == "redo":
+            self._record(calculator, {
+                "event": "redo",
+                "appended": [c.to_dict() for c in memento.appended],
+                "evicted": len(memento.evicted),
+            })
+        elif event == "clear":
+            self._record(calculator, {"event": "clear"})
+
+    def before_save(self, calculator: "Calculator") -> None:
+        # a running compaction would overwrite the new snapshot with an older rebuild
+        self._join()
+
+    def flush(self) -> None:
+        self._write_buffer()
+        self._join()
+
+    # ---- internals
+    def _bind(self, calculator: "Calculator") -> None:
+        if self._config is None:
+            self._config = calculator.config
+            self._logger = calculator.logger
+
+    def _record(self, calculator: "Calculator", rec: dict) -> None:
+        self._record_many(calculator, [rec])
+
+    def _record_many(self, calculator: "Calculator", recs: List[dict]) -> None:
+        self._bind(calculator)
+        self._buffer.extend(map(json.dumps, recs))
+        self._records += len(recs)
+        if len(self._buffer) >= self._config.journal_flush_every:
+            self._write_buffer()
+        if self._records >= self._config.journal_compact_every:
+            self._compact()
+
+    def _write_buffer(self) -> None:
+        if not self._buffer:
+            return
+        with open(self._config.journal_file, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(self._buffer) + "\n")
+        self._buffer.clear()
+
+    def _join(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def _compact(self) -> None:
+        self._join()
+        self._write_buffer()
+        journal = Path(self._config.journal_file)
+        pending = _pending_path(journal)
+        if pending.exists():
+            # a previous compaction failed; keep its records in front of ours
+            with open(pending, "a", encoding="utf-8") as dst, open(journal, encoding="utf-8") as src:
+                shutil.copyfileobj(src, dst)
+            journal.unlink()
+        else:
+            os.replace(journal, pending)
+        os.utime(pending)
+        self._records = 0
+        self._compactor = threading.Thread(target=self._fold_segment, args=(pending,), daemon=True)
+        self._compactor.start()
+
+    def _fold_segment(self, pending: Path) -> None:
+        # Rebuild from snapshot + segment rather than copying the live history:
+        # with asynchronous dispatch the calculator may already be ahead of
+        # what has been journaled.
+        try:
+            number = get_backend(self._config.numeric_backend).number
+            storage = get_storage(self._config.history_format, self._config.default_encoding, number)
+            history, _ = rebuild_history(self._config, storage, [pending])
+            storage.write(history, Path(self._config.history_file))
+            pending.unlink(missing_ok=True)
+            self._logger.info("Compacted %d records into %s", len(history), self._config.history_file)
+        except Exception:  # pragma: no cover - disk errors
+            self._logger.exception("Journal compaction failed; keeping %s", pending)
@@ -0,0 +1,200 @@
+"""
+Running count/sum/min/max/mean of results per operation, kept current
+through HistoryBuffer's listener hooks (see app.history_index), so
+Calculator.summary() never exports or scans the history.
+
+Sums are exact: Decimals, and floats (which convert to Decimal exactly), add
+under an unbounded context, and Fractions are exact already, so removing an
+evicted or undone entry leaves no rounding drift. Only the reported sum and
+mean are rounded, to the calculator's precision.
+
+Infinite and NaN floats are counted apart from the exact sum, since
+subtracting one infinity from another is undefined; while any are present
+the sum and mean report inf, -inf or NaN.
+
+Min and max live in a two-stack deque, since entries leave from both ends:
+evictions at the oldest end, undo at the newest.
+"""
+from __future__ import annotations
+from decimal import Context, Decimal, MAX_EMAX, MAX_PREC, MIN_EMIN
+from fractions import Fraction
+import math
+import operator
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.calculation import Calculation
+from app.history_buffer import HistoryBuffer
+from app.numeric import Number
+
+_EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+
+class _Sums(NamedTuple):
+    zero: object
+    add: Callable
+    sub: Callable
+    # (exact total, count, calculator context) -> (sum, mean) as backend numbers
+    finish: Callable
+
+
+def _float_total(t: tuple, v: float, sign: int) -> tuple:
+    # (exact sum of finite values, count of inf, of -inf, of nan): inf - inf
+    # would make the exact sum invalid, so non-finite results are only counted
+    total, pos, neg, nan = t
+    if math.isfinite(v):
+        return (_EXACT.add(total, Decimal(v)) if sign > 0 else _EXACT.subtract(total, Decimal(v)), pos, neg, nan)
+    if v != v:
+        return (total, pos, neg, nan + sign)
+    if v > 0:
+        return (total, pos + sign, neg, nan)
+    return (total, pos, neg + sign, nan)
+
+
+def _float_finish(t: tuple, n: int, ctx: Context) -> Tuple[float, float]:
+    total, pos, neg, nan = t
+    if nan or (pos and neg):
+        return math.nan, math.nan
+    if pos or neg:
+        inf = math.inf if pos else -math.inf
+        return inf, inf
+    return float(ctx.plus(total)), float(ctx.divide(total, n))
+
+
+_SUMS: Dict[str, _Sums] = {
+    "decimal": _Sums(
+        Decimal(0), _EXACT.add, _EXACT.subtract,
+        lambda t, n, ctx: (ctx.plus(t), ctx.divide(t, n)),
+    ),
+    "float": _Sums(
+        (Decimal(0), 0, 0, 0),
+        lambda t, v: _float_total(t, v, 1),
+        lambda t, v: _float_total(t, v, -1),
+        lambda t, n, ctx: _float_finish(t, n, ctx),
+    ),
+    "fraction": _Sums(Fraction(0), operator.add, operator.sub, lambda t, n, ctx: (t, t / n)),
+}
+
+
+# stack entry: (value, min, max) over the stack from its bottom up to this entry
+_Entry = Tuple[Number, Number, Number]
+
+
+def _push(stack: List[_Entry], v: Number) -> None:
+    if stack:
+        _, lo, hi = stack[-1]
+        stack.append((v, v if v < lo else lo, v if v > hi else hi))
+    else:
+        stack.append((v, v, v))
+
+
+class _OperationStats:
+    """
+    count and exact total, plus the operation's results as a deque split
+    into two stacks: front holds the oldest entries (oldest on top), back
+    the newest (newest on top). Popping an empty side moves half of the
+    other one over, so every operation is amortised O(1).
+    """
+
+    __slots__ = ("count", "total", "front", "back")
+
+    def __init__(self, zero) -> None:
+        self.count = 0
+        self.total = zero
+        self.front: List[_Entry] = []
+        self.back: List[_Entry] = []
+
+    def _rebalance(self, src: List[_Entry], dst: List[_Entry]) -> None:
+        # src holds everything; its bottom half (nearest dst's end) moves to dst
+        half = (len(src) + 1) // 2
+        moved = [e[0] for e in src[:half]]
+        kept = [e[0] for e in src[half:]]
+        src.clear()
+        for v in kept:
+            _push(src, v)
+        for v in reversed(moved):
+            _push(dst, v)
+
+    def pop_back(self) -> None:
+        if not self.back:
+            self._rebalance(self.front, self.back)
+        self.back.pop()
+
+    def pop_front(self) -> None:
+        if not self.front:
+            self._rebalance(self.back, self.front)
+        self.front.pop()
+
+    def min(self) -> Number:
+        return min(s[-1][1] for s in (self.front, self.back) if s)
+
+    def max(self) -> Number:
+        return max(s[-1][2] for s in (self.front, self.back) if s)
+
+
+class HistoryAggregates:
+    def __init__(self, history: HistoryBuffer, backend: str = "decimal"):
+        self.sums = _SUMS[backend]
+        self.ops: Dict[str, _OperationStats] = {}
+        for calc in history:
+            self.on_append(0, calc)
+        history.add_listener(self)
+
+    def _stats(self, calc: Calculation) -> _OperationStats:
+        key = calc.operation.lower()
+        s = self.ops.get(key)
+        if s is None:
+            s = self.ops[key] = _OperationStats(self.sums.zero)
+        return s
+
+    def _remove(self, calc: Calculation) -> _OperationStats:
+        key = calc.operation.lower()
+        s = self.ops[key]
+        s.count -= 1
+        if not s.count:
+            del self.ops[key]
+        else:
+            s.total = self.sums.sub(s.total, calc.result)
+        return s
+
+    # ---- BufferListener
+    def on_append(self, seq: int, calc: Calculation) -> None:
+        s = self._stats(calc)
+        s.count += 1
+        s.total = self.sums.add(s.total, calc.result)
+        _push(s.back, calc.result)
+
+    def on_appendleft(self, seq: int, calc: Calculation) -> None:
+        s = self._stats(calc)
+        s.count += 1
+        s.total = self.sums.add(s.total, calc.result)
+        _push(s.front, calc.result)
+
+    def on_pop(self, seq: int, calc: Calculation) -> None:
+        s = self._remove(calc)
+        if s.count:
+            s.pop_back()
+
+    def on_popleft(self, seq: int, calc: Calculation) -> None:
+        s = self._remove(calc)
+        if s.count:
+            s.pop_front()
+
+    def on_clear(self) -> None:
+        self.ops.clear()
+
+    # ---- reporting
+    def snapshot(self, op: Optional[str] = None) -> Dict[str, tuple]:
+        """{operation: (count, exact total, min, max)}, for one operation or all."""
+        keys = [op.lower()] if op is not None else sorted(self.ops)
+        return {
+            k: (s.count, s.total, s.min(), s.max())
+            for k in keys if (s := self.ops.get(k)) is not None
+        }
+
+    def finish(self, snapshot: Dict[str, tuple], context: Context) -> Dict[str, Dict[str, object]]:
+        """Turn a snapshot into {operation: {count, sum, min, max, mean}}, rounding under context."""
+        out = {}
+        for k, (count, total, lo, hi) in snapshot.items():
+            total, mean = self.sums.finish(total, count, context)
+            out[k] = {"count": count, "sum": total, "min": lo, "max": hi, "mean": mean}
+        return out
@@ -0,0 +1,270 @@
+"""
+Disk-backed archive of calculations evicted from the in-memory history.
+
+With config.history_archive on, the calculator attaches a HistoryArchive to
+its HistoryBuffer. Every entry that falls off the head past
+max_history_size is appended here instead of being dropped, so memory stays
+bounded by the window while the full history stays queryable. Files live
+under history_dir/archive:
+
+    index.bin   header "<8sIIQ"   magic, version, ordered flag, row count
+                then one fixed 24-byte record "<qQIB3x" per row:
+                timestamp (us since the epoch), end offset in data.txt,
+                op code, tz flag (1 = aware, stored as UTC)
+    data.txt    "operand1 operand2 result\\n" per row (the str() of each)
+    ops.txt     operation names, one per line; the line number is the op code
+
+Rows are fixed width, so reads go by row number through mmap without
+scanning, and time ranges are bisected while the rows are in time order.
+Appends are buffered and written in batches. Undoing a step that evicted
+entries takes them back off the tail, and only the row count in the header
+moves. The bytes stay put, so a redo can restore the rows unchanged.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from decimal import Decimal
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Set, Tuple
+
+from app.calculation import Calculation
+from app.history_storage import _EPOCH, _MICROSECOND, _NAIVE_EPOCH
+from app.numeric import Number
+
+_HEADER = struct.Struct("<8sIIQ")
+_RECORD = struct.Struct("<qQIB3x")
+_WORDS = _RECORD.size // 8  # a record is three 8-byte words: timestamp, end offset, code + tz
+
+
+def _write_at(fh, data: bytes, pos: int) -> None:
+    fh.seek(pos)
+    fh.write(data)
+    fh.flush()
+
+
+class HistoryArchive:
+    MAGIC = b"CALCARCH"
+    VERSION = 1
+    FLUSH_EVERY = 256
+
+    def __init__(self, directory: Path, number=Decimal):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.number = number
+        self.index_path = self.directory / "index.bin"
+        self.data_path = self.directory / "data.txt"
+        self.ops_path = self.directory / "ops.txt"
+
+        for path in (self.index_path, self.data_path):
+            path.touch()
+        self._index = open(self.index_path, "r+b")
+        self._data = open(self.data_path, "r+b")
+        if os.fstat(self._index.fileno()).st_size < _HEADER.size:
+            _write_at(self._index, _HEADER.pack(self.MAGIC, self.VERSION, 1, 0), 0)
+        self._index.seek(0)
+        magic, version, ordered, rows = _HEADER.unpack(self._index.read(_HEADER.size))
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{self.index_path} is not a history archive this version can read")
+        self.rows = rows
+        self.ordered = bool(ordered)
+        self._data_end = self._end_of(rows - 1)
+        self._last_us: Optional[int] = self._stamp_of(rows - 1)
+
+        self.names: List[str] = []
+        if self.ops_path.exists():
+            self.names = self.ops_path.read_text(encoding="utf-8").splitlines()
+        self._codes: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self._pending: List[Calculation] = []
+
+    def __len__(self) -> int:
+        return self.rows + len(self._pending)
+
+    def _record_at(self, row: int) -> Optional[Tuple[int, int, int, int]]:
+        if row < 0:
+            return None
+        self._index.seek(_HEADER.size + row * _RECORD.size)
+        return _RECORD.unpack(self._index.read(_RECORD.size))
+
+    def _end_of(self, row: int) -> int:
+        rec = self._record_at(row)
+        return rec[1] if rec else 0
+
+    def _stamp_of(self, row: int) -> Optional[int]:
+        rec = self._record_at(row)
+        return rec[0] if rec else None
+
+    # ---- BufferListener: only the oldest end of the window concerns the archive
+    def on_popleft(self, seq: int, calc: Calculation) -> None:
+        self.append(calc)
+
+    def on_appendleft(self, seq: int, calc: Calculation) -> None:
+        # undo is putting back the entry evicted most recently
+        if self._pending:
+            self._pending.pop()
+        else:
+            self.unspill(1)
+
+    def on_append(self, seq: int, calc: Calculation) -> None:
+        pass
+
+    def on_pop(self, seq: int, calc: Calculation) -> None:
+        pass
+
+    def on_clear(self) -> None:
+        pass
+
+    # ---- writing
+    def append(self, calc: Calculation) -> None:
+        self._pending.append(calc)
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def extend(self, calcs: Iterable[Calculation]) -> None:
+        self._pending.extend(calcs)
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def unspill(self, n: int) -> None:
+        """Drop the newest n rows; their bytes stay on disk for respill()."""
+        self.flush()
+        self.rows -= n
+        self._data_end = self._end_of(self.rows - 1)
+        self._last_us = self._stamp_of(self.rows - 1)
+        self._write_header()
+
+    def respill(self, n: int) -> None:
+        """Restore n rows dropped by unspill(), provided nothing was appended since."""
+        self.flush()
+        self.rows += n
+        self._data_end = self._end_of(self.rows - 1)
+        self._last_us = self._stamp_of(self.rows - 1)
+        self._write_header()
+
+    def flush(self) -> None:
+        """Write buffered rows: data first, then index records, then the header's row count."""
+        if not self._pending:
+            return
+        new_names = []
+        records, lines = bytearray(), bytearray()
+        end, last = self._data_end, self._last_us
+        for c in self._pending:
+            code = self._codes.get(c.operation)
+            if code is None:
+                code = self._codes[c.operation] = len(self.names)
+                self.names.append(c.operation)
+                new_names.append(c.operation)
+            line = f"{c.operand1} {c.operand2} {c.result}\n".encode("ascii")
+            lines += line
+            end += len(line)
+            ts = c.timestamp
+            aware = ts.tzinfo is not None
+            us = ((ts - _EPOCH) if aware else (ts - _NAIVE_EPOCH)) // _MICROSECOND
+            if last is not None and us < last:
+                self.ordered = False
+            last = us
+            records += _RECORD.pack(us, end, code, aware)
+        if new_names:
+            with open(self.ops_path, "a", encoding="utf-8") as fh:
+                fh.write("".join(name + "\n" for name in new_names))
+        _write_at(self._data, lines, self._data_end)
+        _write_at(self._index, records, _HEADER.size + self.rows * _RECORD.size)
+        self.rows += len(self._pending)
+        self._data_end, self._last_us = end, last
+        self._pending.clear()
+        self._write_header()
+
+    def _write_header(self) -> None:
+        _write_at(self._index, _HEADER.pack(self.MAGIC, self.VERSION, self.ordered, self.rows), 0)
+
+    def close(self) -> None:
+        self.flush()
+        self._index.close()
+        self._data.close()
+
+    # ---- reading
+    def matches(
+        self,
+        op: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        result_range: Optional[Tuple[Optional[Number], Optional[Number]]] = None,
+        newest_first: bool = False,
+        skip: int = 0,
+    ) -> Generator[Calculation, None, int]:
+        """
+        Lazily yield archived rows matching every filter, with the semantics of
+        HistoryIndex.query, after passing over the first skip matches. Rows are
+        decoded one at a time straight from the mapped files; skipped rows are
+        not decoded unless result_range needs their value. Returns the number
+        of matches skipped (less than skip when the archive ran out first).
+        """
+        self.flush()
+        rows = self.rows
+        codes: Optional[Set[int]] = None
+        if op is not None:
+            codes = {i for i, name in enumerate(self.names) if name.lower() == op.lower()}
+        if not rows or codes == set():
+            return 0
+        since_us = None if since is None else (since - _EPOCH) // _MICROSECOND
+        until_us = None if until is None else (until - _EPOCH) // _MICROSECOND
+        low, high = result_range if result_range is not None else (None, None)
+        number = self.number
+
+        with open(self.index_path, "rb") as fi, open(self.data_path, "rb") as fd, \
+                mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mi, \
+                mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as md:
+            full = memoryview(mi)
+            view = full[_HEADER.size:_HEADER.size + rows * _RECORD.size]
+            words, halves = view.cast("q"), view.cast("I")
+            try:
+                lo, hi = 0, rows
+                scan_time = since_us is not None or until_us is not None
+                if scan_time and self.ordered:
+                    stamp = lambda i: words[_WORDS * i]  # noqa: E731
+                    if since_us is not None:
+                        lo = bisect_left(range(rows), since_us, key=stamp)
+                    if until_us is not None:
+                        hi = max(lo, bisect_left(range(rows), until_us, lo, key=stamp))
+                    scan_time = False
+                if codes is None and not scan_time and result_range is None:
+                    # every row in [lo, hi) matches: skip by arithmetic
+                    skipped = min(skip, hi - lo)
+                    if newest_first:
+                        hi -= skipped
+                    else:
+                        lo += skipped
+                else:
+                    skipped = 0
+                for i in (reversed(range(lo, hi)) if newest_first else range(lo, hi)):
+                    base = _WORDS * i
+                    code = halves[2 * base + 4]
+                    if codes is not None and code not in codes:
+                        continue
+                    us = words[base]
+                    if scan_time and (
+                        (since_us is not None and us < since_us) or (until_us is not None and us >= until_us)
+                    ):
+                        continue
+                    if skipped < skip and result_range is None:
+                        skipped += 1
+                        continue
+                    begin = words[base - _WORDS + 1] if i else 0
+                    a, b, r = md[begin:words[base + 1] - 1].decode("ascii").split(" ")
+                    result = number(r)
+                    if (low is not None and result < low) or (high is not None and result > high):
+                        continue
+                    if skipped < skip:
+                        skipped += 1
+                        continue
+                    aware = halves[2 * base + 5] & 0xFF
+                    ts = (_EPOCH if aware else _NAIVE_EPOCH) + timedelta(microseconds=us)
+                    yield Calculation(self.names[code], number(a), number(b), result, ts)
+            finally:
+                halves.release()
+                words.release()
+                view.release()
+                full.release()
+        return skipped
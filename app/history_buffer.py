@@ -0,0 +1,173 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Optional, Protocol, overload
+
+from app.calculation import Calculation
+
+
+class BufferListener(Protocol):
+    """
+    Receives every mutation of a HistoryBuffer, with the sequence number of
+    the entry involved (see HistoryBuffer.first_seq).
+    """
+
+    def on_append(self, seq: int, calc: Calculation) -> None: ...
+    def on_appendleft(self, seq: int, calc: Calculation) -> None: ...
+    def on_pop(self, seq: int, calc: Calculation) -> None: ...
+    def on_popleft(self, seq: int, calc: Calculation) -> None: ...
+    def on_clear(self) -> None: ...
+
+
+class HistoryBuffer:
+    """
+    Fixed-capacity ring buffer of calculations.
+
+    Appending past capacity evicts (and returns) the oldest entry in O(1);
+    indexing, slicing, iteration and len() behave like the list it replaces.
+    Every entry also has a sequence number that stays put while older
+    entries are evicted: entry i has number first_seq + i.
+
+    The slots are allocated as entries arrive, doubling up to capacity, so
+    a large max_history_size costs nothing until it is used.
+    """
+
+    __slots__ = ("_items", "_capacity", "_head", "_size", "_base", "_listeners")
+
+    def __init__(self, capacity: int, items: Iterable[Calculation] = ()):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        self._listeners: List[BufferListener] = []
+        # nobody is listening yet: the newest entries become the slots directly
+        items = list(items)
+        self._items: List[Optional[Calculation]] = items[-capacity:]
+        self._head = 0
+        self._size = len(self._items)
+        self._base = len(items) - self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest entry (of the next entry when empty)."""
+        return self._base
+
+    def add_listener(self, listener: BufferListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: BufferListener) -> None:
+        self._listeners.remove(listener)
+
+    def _slot(self, i: int) -> int:
+        return (self._head + i) % len(self._items)
+
+    def _grow(self) -> None:
+        # every slot is taken: unroll the ring to start at 0, then add free slots
+        items = self._items
+        self._items = items[self._head:] + items[:self._head]
+        self._items += [None] * (min(self._capacity, max(8, 2 * len(items))) - len(items))
+        self._head = 0
+
+    # ---- list-like API
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Calculation]:
+        for i in range(self._size):
+            yield self._items[self._slot(i)]
+
+    def __reversed__(self) -> Iterator[Calculation]:
+        for i in range(self._size - 1, -1, -1):
+            yield self._items[self._slot(i)]
+
+    @overload
+    def __getitem__(self, i: int) -> Calculation: ...
+    @overload
+    def __getitem__(self, i: slice) -> List[Calculation]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._items[self._slot(j)] for j in range(*i.indices(self._size))]
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("history index out of range")
+        return self._items[self._slot(i)]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (HistoryBuffer, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoryBuffer(capacity={self.capacity}, {list(self)!r})"
+
+    def copy(self) -> List[Calculation]:
+        return list(self)
+
+    # ---- mutation
+    def append(self, calc: Calculation) -> Optional[Calculation]:
+        """Add calc at the tail; returns the evicted head when the buffer was full."""
+        evicted = None
+        if self._size == len(self._items):
+            if self._size == self._capacity:
+                evicted = self.popleft()
+            else:
+                self._grow()
+        self._items[self._slot(self._size)] = calc
+        self._size += 1
+        for listener in self._listeners:
+            listener.on_append(self._base + self._size - 1, calc)
+        return evicted
+
+    def extend(self, calcs: Iterable[Calculation]) -> List[Calculation]:
+        """Append every calc; returns the evicted entries, oldest first."""
+        evicted = []
+        for calc in calcs:
+            old = self.append(calc)
+            if old is not None:
+                evicted.append(old)
+        return evicted
+
+    def appendleft(self, calc: Calculation) -> None:
+        if self._size == self._capacity:
+            raise IndexError("history buffer is full")
+        if self._size == len(self._items):
+            self._grow()
+        self._head = (self._head - 1) % len(self._items)
+        self._items[self._head] = calc
+        self._size += 1
+        self._base -= 1
+        for listener in self._listeners:
+            listener.on_appendleft(self._base, calc)
+
+    def pop(self) -> Calculation:
+        if not self._size:
+            raise IndexError("pop from empty history")
+        self._size -= 1
+        slot = self._slot(self._size)
+        calc, self._items[slot] = self._items[slot], None
+        for listener in self._listeners:
+            listener.on_pop(self._base + self._size, calc)
+        return calc
+
+    def popleft(self) -> Calculation:
+        if not self._size:
+            raise IndexError("pop from empty history")
+        calc, self._items[self._head] = self._items[self._head], None
+        self._head = (self._head + 1) % len(self._items)
+        self._size -= 1
+        self._base += 1
+        for listener in self._listeners:
+            listener.on_popleft(self._base - 1, calc)
+        return calc
+
+    def clear(self) -> None:
+        # drop the slots too; they are allocated again as entries arrive
+        self._items = []
+        self._head = 0
+        self._base += self._size
+        self._size = 0
+        for listener in self._listeners:
+            listener.on_clear()
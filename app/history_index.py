@@ -0,0 +1,182 @@
+"""
+Indexes over a HistoryBuffer, kept current through its listener hooks so
+Calculator.query_history never has to scan or copy the whole history:
+
+  - per-operation lists of sequence numbers, in history order
+  - the number of neighbouring entries whose timestamps are out of order;
+    while it is zero, since/until bounds are found by bisection
+
+Every buffer mutation (append, eviction, undo, redo, clear) updates them in
+amortised O(1). A loaded history gets a fresh index.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.calculation import Calculation
+from app.history_buffer import HistoryBuffer
+from app.numeric import Number
+
+_timestamp = attrgetter("timestamp")
+
+
+class _SeqList:
+    """Sorted sequence numbers; the oldest are dropped by advancing start, compacted lazily."""
+
+    __slots__ = ("seqs", "start")
+
+    def __init__(self) -> None:
+        self.seqs: List[int] = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.start
+
+    def popleft(self) -> None:
+        self.start += 1
+        if self.start * 2 >= len(self.seqs):
+            del self.seqs[:self.start]
+            self.start = 0
+
+    def appendleft(self, seq: int) -> None:
+        if self.start:
+            self.start -= 1
+            self.seqs[self.start] = seq
+        else:
+            self.seqs.insert(0, seq)
+
+
+class HistoryIndex:
+    def __init__(self, history: HistoryBuffer):
+        self.history = history
+        self.ops: Dict[str, _SeqList] = {}
+        self.inversions = 0
+        # timestamp of the newest entry, so appends need not index the buffer
+        self._tail: Optional[datetime] = None
+        seq = history.first_seq
+        for calc in history:
+            self._ops(calc).seqs.append(seq)
+            if self._tail is not None and self._tail > calc.timestamp:
+                self.inversions += 1
+            self._tail = calc.timestamp
+            seq += 1
+        history.add_listener(self)
+
+    def _ops(self, calc: Calculation) -> _SeqList:
+        key = calc.operation.lower()
+        s = self.ops.get(key)
+        if s is None:
+            s = self.ops[key] = _SeqList()
+        return s
+
+    # ---- BufferListener; called after the buffer has changed
+    def on_append(self, seq: int, calc: Calculation) -> None:
+        self._ops(calc).seqs.append(seq)
+        ts = calc.timestamp
+        if self._tail is not None and self._tail > ts:
+            self.inversions += 1
+        self._tail = ts
+
+    def on_appendleft(self, seq: int, calc: Calculation) -> None:
+        self._ops(calc).appendleft(seq)
+        h = self.history
+        if len(h) == 1:
+            self._tail = calc.timestamp
+        elif calc.timestamp > h[1].timestamp:
+            self.inversions += 1
+
+    def on_pop(self, seq: int, calc: Calculation) -> None:
+        key = calc.operation.lower()
+        s = self.ops[key]
+        s.seqs.pop()
+        if not s:
+            del self.ops[key]
+        h = self.history
+        self._tail = h[-1].timestamp if h else None
+        if self._tail is not None and self._tail > calc.timestamp:
+            self.inversions -= 1
+
+    def on_popleft(self, seq: int, calc: Calculation) -> None:
+        key = calc.operation.lower()
+        s = self.ops[key]
+        s.popleft()
+        if not s:
+            del self.ops[key]
+        h = self.history
+        if not h:
+            self._tail = None
+        elif calc.timestamp > h[0].timestamp:
+            self.inversions -= 1
+
+    def on_clear(self) -> None:
+        self.ops.clear()
+        self.inversions = 0
+        self._tail = None
+
+    # ---- queries
+    def query(
+        self,
+        op: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        result_range: Optional[Tuple[Optional[Number], Optional[Number]]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = False,
+    ) -> List[Calculation]:
+        """
+        Entries matching every filter given, oldest first (or newest first),
+        after skipping offset matches and stopping at limit. since is
+        inclusive, until exclusive; result_range is an inclusive (low, high)
+        pair where either end may be None.
+        """
+        rows = self.matches(op, since, until, result_range, newest_first)
+        return list(islice(rows, offset, None if limit is None else offset + limit))
+
+    def matches(
+        self,
+        op: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        result_range: Optional[Tuple[Optional[Number], Optional[Number]]] = None,
+        newest_first: bool = False,
+    ) -> Iterator[Calculation]:
+        """Lazy form of query(), without paging."""
+        h = self.history
+        lo, hi = 0, len(h)
+        scan_time = since is not None or until is not None
+        if scan_time and not self.inversions:
+            if since is not None:
+                lo = bisect_left(h, since, key=_timestamp)
+            if until is not None:
+                hi = max(lo, bisect_left(h, until, lo, key=_timestamp))
+            scan_time = False
+
+        rows: Iterable[Calculation]
+        if op is not None:
+            s = self.ops.get(op.lower())
+            if s is None:
+                return iter(())
+            base, seqs = h.first_seq, s.seqs
+            i = bisect_left(seqs, base + lo, s.start)
+            idx = range(i, bisect_left(seqs, base + hi, i))
+            rows = (h[seqs[k] - base] for k in (reversed(idx) if newest_first else idx))
+        else:
+            idx = range(lo, hi)
+            rows = map(h.__getitem__, reversed(idx) if newest_first else idx)
+
+        if scan_time:
+            rows = (
+                c for c in rows
+                if (since is None or c.timestamp >= since) and (until is None or c.timestamp < until)
+            )
+        if result_range is not None:
+            low, high = result_range
+            rows = (
+                c for c in rows
+                if (low is None or c.result >= low) and (high is None or c.result <= high)
+            )
+        return iter(rows)
@@ -0,0 +1,218 @@
+"""
+Multi-writer history persistence (config.multi_writer), for several
+calculator processes sharing one history_dir:
+
+    history.csv (or .bin)   compacted snapshot
+    segments/               one immutable file per commit, named
+                            <host>-<pid>-<token>-<n>, holding only the
+                            calculations that process added since its last commit
+    history.lock            advisory lock: shared while reading, exclusive to compact
+    segments/folded         during a compaction: the segments already in the new
+                            snapshot (history.csv.compacting until it is renamed)
+
+A commit writes its segment to a temp file and renames it into place, so
+readers see whole segments or none, and no two writers ever touch the same
+file. Loading merges the snapshot and every segment by timestamp. Once
+segment_compact_every segments pile up, whichever writer gets the exclusive
+lock first folds them into the snapshot; the others carry on without waiting.
+The snapshot keeps every committed row: max_history_size only caps what a
+process loads. A compaction interrupted after writing the folded list is
+finished by the next one, and loads in between skip the folded segments, so
+no row is ever read twice.
+"""
+from __future__ import annotations
+from collections import deque
+from contextlib import contextmanager
+from datetime import UTC, datetime
+import heapq
+from itertools import chain
+import os
+from pathlib import Path
+import socket
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from app.calculation import Calculation
+from app.history_buffer import HistoryBuffer
+from app.history_storage import HistoryStorage, _atomic_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no advisory locks on Windows
+    fcntl = None
+
+
+@contextmanager
+def history_lock(path: Path, exclusive: bool = False, blocking: bool = True) -> Iterator[bool]:
+    """flock path for the duration; yields False when non-blocking and already held."""
+    with open(path, "a+b") as fh:
+        if fcntl is None:  # pragma: no cover
+            yield True
+            return
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(fh.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _sort_key(c: Calculation) -> datetime:
+    # naive timestamps (older files) count as UTC so they compare with aware ones
+    ts = c.timestamp
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=UTC)
+
+
+def _segment_names(config, storage: HistoryStorage) -> List[str]:
+    # plain os.listdir: every commit counts the segments, and pathlib's glob is slow at that
+    return [n for n in os.listdir(config.segment_dir) if n.endswith(storage.suffix)]
+
+
+def segment_paths(config, storage: HistoryStorage) -> List[Path]:
+    directory = Path(config.segment_dir)
+    return [directory / n for n in sorted(_segment_names(config, storage))]
+
+
+def _folded_path(config) -> Path:
+    return Path(config.segment_dir) / "folded"
+
+
+def _staged_path(config) -> Path:
+    snapshot = Path(config.history_file)
+    return snapshot.with_name(snapshot.name + ".compacting")
+
+
+def _folded(config) -> Set[str]:
+    try:
+        return set(_folded_path(config).read_text(encoding="utf-8").split())
+    except FileNotFoundError:
+        return set()
+
+
+def _merged(config, storage: HistoryStorage, segments: List[Path]) -> Iterator[Calculation]:
+    # the snapshot is streamed; segments are small, so each is read whole and
+    # sorted (clock steps or a redo can leave one out of order)
+    folded = _folded(config)
+    snapshot = Path(config.history_file)
+    if folded and _staged_path(config).exists():
+        snapshot = _staged_path(config)  # interrupted before the rename: it already has them
+    streams: List[Iterable[Calculation]] = []
+    if snapshot.exists():
+        streams.append(chain.from_iterable(storage.read(snapshot)))
+    for path in segments:
+        if path.name not in folded:
+            rows = [c for chunk in storage.read(path) for c in chunk]
+            streams.append(sorted(rows, key=_sort_key))
+    return heapq.merge(*streams, key=_sort_key)
+
+
+def load_segments(config, storage: HistoryStorage) -> HistoryBuffer:
+    """The snapshot and every committed segment, merged by timestamp; the newest max_history_size kept."""
+    with history_lock(config.lock_file):
+        newest = deque(_merged(config, storage, segment_paths(config, storage)), maxlen=config.max_history_size)
+    return HistoryBuffer(config.max_history_size, newest)
+
+
+def read_segments(config, storage: HistoryStorage) -> List[Calculation]:
+    """Every persisted calculation, merged by timestamp, regardless of max_history_size."""
+    with history_lock(config.lock_file):
+        return list(_merged(config, storage, segment_paths(config, storage)))
+
+
+class SegmentWriter:
+    """
+    Tracks, through HistoryBuffer's listener hooks, which entries this
+    process has not committed yet, and commits them as a new segment.
+    Entries evicted before a commit are still committed; entries undone
+    after one stay committed (other processes may have read them already).
+    """
+
+    def __init__(self, config, storage: HistoryStorage, history: HistoryBuffer):
+        self.config = config
+        self.storage = storage
+        self.directory = Path(config.segment_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = f"{socket.gethostname()}-{os.getpid()}-{os.urandom(4).hex()}"
+        self.commits = 0
+        self.attach(history)
+
+    def attach(self, history: HistoryBuffer, committed: bool = True) -> None:
+        """Follow history, treating everything already in it as committed (or, if not committed, as pending)."""
+        self.history = history
+        # entries from this sequence number on are not committed yet
+        self._committed = history.first_seq + (len(history) if committed else 0)
+        self._evicted: List[Calculation] = []
+        # committed entries that undo took out and redo may put back, by sequence number
+        self._undone: Dict[int, Calculation] = {}
+        history.add_listener(self)
+
+    # ---- BufferListener
+    def on_append(self, seq: int, calc: Calculation) -> None:
+        pass
+
+    def on_appendleft(self, seq: int, calc: Calculation) -> None:
+        # undo is restoring the newest eviction, which may not be committed yet
+        if seq >= self._committed:
+            self._evicted.pop()
+
+    def on_pop(self, seq: int, calc: Calculation) -> None:
+        if seq < self._committed:
+            self._committed = seq
+            self._undone[seq] = calc
+
+    def on_popleft(self, seq: int, calc: Calculation) -> None:
+        if seq >= self._committed:
+            self._evicted.append(calc)
+
+    def on_clear(self) -> None:
+        self._committed = self.history.first_seq
+        self._evicted.clear()
+        self._undone.clear()
+
+    # ---- committing
+    def pending(self) -> List[Calculation]:
+        h = self.history
+        base = h.first_seq
+        rows = list(self._evicted)
+        for seq in range(max(self._committed, base), base + len(h)):
+            calc = h[seq - base]
+            if self._undone.get(seq) is not calc:
+                rows.append(calc)
+        return rows
+
+    def commit(self) -> Optional[Path]:
+        """Write pending entries as a new segment (None if there were none), compacting when due."""
+        rows = self.pending()
+        if not rows:
+            return None
+        self.commits += 1
+        path = self.directory / f"{self.name}-{self.commits:06d}{self.storage.suffix}"
+        self.storage.write(rows, path)
+        self._committed = self.history.first_seq + len(self.history)
+        self._evicted.clear()
+        self._undone.clear()
+        if len(_segment_names(self.config, self.storage)) >= self.config.segment_compact_every:
+            self.compact(blocking=False)
+        return path
+
+    def compact(self, blocking: bool = True) -> bool:
+        """Fold all segments into the snapshot; False if another process holds the lock."""
+        with history_lock(self.config.lock_file, exclusive=True, blocking=blocking) as locked:
+            if not locked:
+                return False
+            # every step can be repeated: the folded list is what makes the
+            # segments dead, and it goes only once they are all gone
+            segments = segment_paths(self.config, self.storage)
+            staged, folded = _staged_path(self.config), _folded_path(self.config)
+            self.storage.write(_merged(self.config, self.storage, segments), staged)
+            tmp = _atomic_path(folded)
+            tmp.write_text("".join(f"{p.name}\n" for p in segments), encoding="utf-8")
+            os.replace(tmp, folded)
+            os.replace(staged, self.config.history_file)
+            for path in segments:
+                path.unlink(missing_ok=True)
+            folded.unlink()
+        return True
@@ -0,0 +1,289 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from array import array
+import csv
+from datetime import datetime, timedelta, UTC
+from decimal import Decimal
+from itertools import chain, islice
+import mmap
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+from app.calculation import Calculation
+
+HISTORY_COLUMNS = ["operation", "operand1", "operand2", "result", "timestamp"]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def calculations_from_columns(ops, operand1, operand2, results, timestamps, number=Decimal) -> List[Calculation]:
+    """
+    Build Calculations column by column, without an intermediate dict per row.
+    datetime.fromisoformat is mapped directly: it beats pandas' to_datetime plus
+    the conversion back to Python datetimes by an order of magnitude.
+    """
+    return list(map(
+        Calculation, ops,
+        map(number, operand1), map(number, operand2), map(number, results),
+        map(datetime.fromisoformat, timestamps),
+    ))
+
+
+def _atomic_path(path: Path) -> Path:
+    # unique per writer, so concurrent saves of one path never share a temp file
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class HistoryStorage(ABC):
+    """
+    A file format for calculation history; selected by CalculatorConfig.history_format.
+    Values are stored as their str() and read back with number (the numeric
+    backend's type: Decimal, float or Fraction).
+    """
+
+    suffix = ""
+    number = Decimal
+
+    @abstractmethod
+    def write(self, history: Iterable[Calculation], path: Path) -> None:
+        """Write history to path atomically (temp file + rename)."""
+
+    @abstractmethod
+    def read(self, path: Path, chunksize: int = 10_000) -> Iterator[List[Calculation]]:
+        """Stream path as lists of at most chunksize Calculations."""
+
+
+class CsvHistoryStorage(HistoryStorage):
+    """
+    Plain CSV with a header row, written and read with the stdlib csv module
+    (pandas stays unloaded). Values are kept as text, so Decimals round-trip
+    exactly instead of going through float.
+    """
+
+    suffix = ".csv"
+
+    def __init__(self, encoding: str = "utf-8", number=Decimal):
+        self.encoding = encoding
+        self.number = number
+
+    def write(self, history: Iterable[Calculation], path: Path) -> None:
+        tmp = _atomic_path(path)
+        with open(tmp, "w", newline="", encoding=self.encoding) as fh:
+            writer = csv.writer(fh, lineterminator="\n")
+            writer.writerow(HISTORY_COLUMNS)
+            writer.writerows(
+                (c.operation, str(c.operand1), str(c.operand2), str(c.result), c.timestamp.isoformat())
+                for c in history
+            )
+        os.replace(tmp, path)
+
+    def read(self, path: Path, chunksize: int = 10_000) -> Iterator[List[Calculation]]:
+        with open(path, newline="", encoding=self.encoding) as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"{path} is empty")
+            try:
+                order = [header.index(col) for col in HISTORY_COLUMNS]
+            except ValueError as e:
+                raise ValueError(f"{path} is missing a history column: {e}") from None
+            while True:
+                rows = list(islice(reader, chunksize))
+                if not rows:
+                    return
+                cols = list(zip(*rows))
+                yield calculations_from_columns(*(cols[i] for i in order), number=self.number)
+
+
+class BinaryHistoryStorage(HistoryStorage):
+    """
+    Columnar little-endian layout read through mmap, stdlib only:
+
+        header      "<8sHQ"  magic, version, row count
+        op names    u32 count, then (u16 length + UTF-8) per name
+        op codes    u32 per row
+        timestamps  i64 microseconds since the Unix epoch per row
+        tz flags    u8 per row (1 = aware, stored as UTC; 0 = naive)
+        operand1, operand2, result
+                    u64 offsets (rows + 1), then the str() of every Decimal
+                    followed by a newline, so values come back exact
+
+    A chunk of a Decimal column is one slice + decode + split, with no per-row
+    parsing beyond the Decimal constructor itself.
+    """
+
+    suffix = ".bin"
+    MAGIC = b"CALCHIST"
+    VERSION = 1
+    _HEADER = struct.Struct("<8sHQ")
+
+    def __init__(self, number=Decimal):
+        self.number = number
+
+    def write(self, history: Iterable[Calculation], path: Path) -> None:
+        tmp = _atomic_path(path)
+        with open(tmp, "wb") as fh:
+            self.dump(history, fh)
+        os.replace(tmp, path)
+
+    def dump(self, history: Iterable[Calculation], fh: BinaryIO) -> None:
+        """Write the file image of history to an open binary stream (app.calculator_snapshot embeds one)."""
+        names: Dict[str, int] = {}
+        # u32 codes: expression templates (see app.expression) are op names too
+        codes, stamps, aware = array("I"), array("q"), array("B")
+        texts: List[List[str]] = [[], [], []]
+        for c in history:
+            codes.append(names.setdefault(c.operation, len(names)))
+            ts = c.timestamp
+            if ts.tzinfo is None:
+                stamps.append((ts - _NAIVE_EPOCH) // _MICROSECOND)
+                aware.append(0)
+            else:
+                stamps.append((ts - _EPOCH) // _MICROSECOND)
+                aware.append(1)
+            texts[0].append(str(c.operand1))
+            texts[1].append(str(c.operand2))
+            texts[2].append(str(c.result))
+
+        fh.write(self._HEADER.pack(self.MAGIC, self.VERSION, len(codes)))
+        fh.write(struct.pack("<I", len(names)))
+        for name in names:
+            raw = name.encode("utf-8")
+            fh.write(struct.pack("<H", len(raw)) + raw)
+        for col in (codes, stamps, aware):
+            fh.write(_le_bytes(col))
+        for values in texts:
+            blob = "".join(v + "\n" for v in values).encode("ascii")
+            offsets = array("Q", [0])
+            pos = 0
+            for v in values:
+                pos += len(v) + 1
+                offsets.append(pos)
+            fh.write(_le_bytes(offsets))
+            fh.write(blob)
+
+    def read(self, path: Path, chunksize: int = 10_000) -> Iterator[List[Calculation]]:
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                raise ValueError(f"{path} is empty")
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+                yield from self._read_mapped(buf, path, chunksize)
+
+    def load(self, buf: memoryview, name: str = "buffer", chunksize: int = 10_000) -> Iterator[List[Calculation]]:
+        """Read a file image written by dump() from a buffer."""
+        return self._read_mapped(buf, name, chunksize)
+
+    def _read_mapped(self, buf: memoryview, path: Path, chunksize: int) -> Iterator[List[Calculation]]:
+        magic, version, rows = self._HEADER.unpack_from(buf, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} is not a binary history file this version can read")
+        pos = self._HEADER.size
+        (count,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        names = []
+        for _ in range(count):
+            (n,) = struct.unpack_from("<H", buf, pos)
+            names.append(bytes(buf[pos + 2:pos + 2 + n]).decode("utf-8"))
+            pos += 2 + n
+
+        codes, pos = _column(buf, pos, "I", rows)
+        stamps, pos = _column(buf, pos, "q", rows)
+        aware, pos = _column(buf, pos, "B", rows)
+        decimals = []
+        for _ in range(3):
+            offsets, pos = _column(buf, pos, "Q", rows + 1)
+            decimals.append((offsets, pos))
+            pos += offsets[rows]
+
+        try:
+            for start in range(0, rows, chunksize):
+                stop = min(start + chunksize, rows)
+                cols = [
+                    bytes(buf[base + offs[start]:base + offs[stop]]).decode("ascii").split("\n")[:-1]
+                    for offs, base in decimals
+                ]
+                ops = [names[i] for i in codes[start:stop]]
+                times = [
+                    (_EPOCH if tz else _NAIVE_EPOCH) + timedelta(microseconds=us)
+                    for us, tz in zip(stamps[start:stop], aware[start:stop])
+                ]
+                number = self.number
+                yield list(map(
+                    Calculation, ops, map(number, cols[0]), map(number, cols[1]),
+                    map(number, cols[2]), times,
+                ))
+        finally:
+            # release the views so the mmap can close
+            for col in (codes, stamps, aware, *(offs for offs, _ in decimals)):
+                col.release()
+
+
+def _le_bytes(col: array) -> bytes:
+    if sys.byteorder == "big":  # pragma: no cover - the format is little-endian
+        col = array(col.typecode, col)
+        col.byteswap()
+    return col.tobytes()
+
+
+def _column(buf: memoryview, pos: int, typecode: str, n: int):
+    """Zero-copy view of n little-endian items of typecode starting at pos."""
+    size = struct.calcsize(typecode) * n
+    view = buf[pos:pos + size].cast(typecode)
+    if sys.byteorder == "big":  # pragma: no cover
+        swapped = array(typecode, view)
+        swapped.byteswap()
+        view.release()
+        view = memoryview(swapped)
+    return view, pos + size
+
+
+STORAGES = {
+    "csv": CsvHistoryStorage,
+    "binary": BinaryHistoryStorage,
+}
+
+
+def get_storage(fmt: str = "csv", encoding: str = "utf-8", number=Decimal) -> HistoryStorage:
+    cls = STORAGES.get(fmt.lower())
+    if not cls:
+        raise ValueError(f"unknown history format: {fmt}")
+    return cls(encoding, number) if cls is CsvHistoryStorage else cls(number)
+
+
+def storage_for_path(path: Path, encoding: str = "utf-8", number=Decimal) -> HistoryStorage:
+    """Pick the storage whose suffix matches path (e.g. .csv, .bin)."""
+    for name, cls in STORAGES.items():
+        if Path(path).suffix == cls.suffix:
+            return get_storage(name, encoding, number)
+    raise ValueError(f"cannot tell the history format of {path}")
+
+
+def convert_history(src: Path, dst: Path, chunksize: int = 100_000) -> int:
+    """Convert a history file between formats (chosen by suffix); returns rows written."""
+    rows = 0
+
+    def _counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    source, target = storage_for_path(src), storage_for_path(dst)
+    target.write(chain.from_iterable(_counted(source.read(Path(src), chunksize))), Path(dst))
+    return rows
+
+
+if __name__ == "__main__":  # pragma: no cover - thin CLI
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert calculator history between formats.")
+    parser.add_argument("src", type=Path)
+    parser.add_argument("dst", type=Path)
+    args = parser.parse_args()
+    print(f"Converted {convert_history(args.src, args.dst)} rows to {args.dst}")
@@ -0,0 +1,173 @@
+from __future__ import annotations
+from bisect import bisect_left
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+# latency bucket upper bounds in seconds, roughly 1-2.5-5 per decade
+BUCKETS: Tuple[float, ...] = tuple(
+    m * 10.0 ** e for e in range(-7, 1) for m in (1, 2.5, 5)
+) + (10.0,)
+# the same bounds in nanoseconds, so observing a timing needs no float math
+_BUCKETS_NS: Tuple[int, ...] = tuple(round(b * 1e9) for b in BUCKETS)
+
+clock = time.perf_counter_ns
+
+
+class Histogram:
+    """Fixed-bucket latency histogram of nanosecond timings; quantiles are interpolated within a bucket."""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, ns: int) -> None:
+        self.counts[bisect_left(_BUCKETS_NS, ns)] += 1
+        self.count += 1
+        self.sum += ns
+        if ns > self.max:
+            self.max = ns
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = _BUCKETS_NS[i - 1] if i else 0
+                hi = _BUCKETS_NS[i] if i < len(BUCKETS) else self.max
+                return min(lo + (hi - lo) * (rank - seen) / n, self.max) / 1e9
+            seen += n
+        return self.max / 1e9  # pragma: no cover - rank never exceeds count
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count / 1e9 if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max / 1e9,
+        }
+
+
+class _Series:
+    __slots__ = ("calls", "errors", "phases")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.phases: Dict[str, Histogram] = {}
+
+
+class Metrics:
+    """
+    Call counters and per-phase latency histograms, keyed by method (perform,
+    undo, ...) and label (the operation name for perform, "all" otherwise).
+    Calculator only creates one when config.instrumentation is on; with it
+    off the hot paths skip timing entirely.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.series: Dict[Tuple[str, str], _Series] = {}
+
+    def _series(self, method: str, label: str) -> _Series:
+        s = self.series.get((method, label))
+        if s is None:
+            s = self.series[method, label] = _Series()
+        return s
+
+    def record(self, method: str, label: str, phases: Iterable[Tuple[str, int]]) -> None:
+        """Count one call and add each (phase, nanoseconds) pair plus their total."""
+        with self._lock:
+            s = self._series(method, label)
+            s.calls += 1
+            hists = s.phases
+            total = 0
+            for phase, ns in phases:
+                total += ns
+                h = hists.get(phase)
+                if h is None:
+                    h = hists[phase] = Histogram()
+                h.observe(ns)
+            h = hists.get("total")
+            if h is None:
+                h = hists["total"] = Histogram()
+            h.observe(total)
+
+    def error(self, method: str, label: str) -> None:
+        with self._lock:
+            self._series(method, label).errors += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        """{method: {label: {"calls", "errors", "phases": {phase: summary}}}}"""
+        out: Dict[str, Dict[str, dict]] = {}
+        with self._lock:
+            for (method, label), s in self.series.items():
+                out.setdefault(method, {})[label] = {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "phases": {phase: h.summary() for phase, h in s.phases.items()},
+                }
+        return out
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            series = sorted(self.series.items())
+            for name, help_text, attr in (
+                ("calculator_calls_total", "Completed calls per method and operation.", "calls"),
+                ("calculator_errors_total", "Failed calls per method and operation.", "errors"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [
+                    f'{name}{{method="{m}",operation="{op}"}} {getattr(s, attr)}' for (m, op), s in series
+                ]
+            name = "calculator_phase_seconds"
+            lines += [f"# HELP {name} Time spent per phase of each call.", f"# TYPE {name} histogram"]
+            for (m, op), s in series:
+                for phase, h in sorted(s.phases.items()):
+                    labels = f'method="{m}",operation="{op}",phase="{phase}"'
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS, h.counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {h.sum / 1e9!r}")
+                    lines.append(f"{name}_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> Path:
+        """Atomically (re)write path, e.g. for the node_exporter textfile collector."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+def format_stats(snapshot: Dict[str, Dict[str, dict]]) -> List[str]:
+    """One line per method/label, latencies in microseconds."""
+    lines = []
+    for method in sorted(snapshot):
+        for label, s in sorted(snapshot[method].items()):
+            total = s["phases"].get("total")
+            head = f"{method} {label}: {s['calls']} calls, {s['errors']} errors"
+            if total:
+                head += f", p50 {total['p50'] * 1e6:.1f}us p99 {total['p99'] * 1e6:.1f}us"
+            phases = ", ".join(
+                f"{phase} {h['mean'] * 1e6:.1f}us"
+                for phase, h in s["phases"].items() if phase != "total"
+            )
+            lines.append(f"{head} (mean {phases})" if phases else head)
+    return lines
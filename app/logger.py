@@ -1,13 +1,74 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+from datetime import datetime, UTC
 from pathlib import Path
 
-def get_logger(log_dir: Path) -> logging.Logger:
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line; calculation records carry their fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        calc = getattr(record, "calculation", None)
+        if calc is not None:
+            out.update(calc.to_dict())
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, separators=(",", ":"))
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() renders the message in the calling thread. Our queue
+    # never leaves the process, so hand the record over as-is and let the
+    # listener thread do all of the formatting.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    if listener._thread is not None:  # not already stopped by hand
+        listener.stop()
+
+
+def get_logger(
+    log_dir: Path,
+    *,
+    fmt: str = "text",
+    use_queue: bool = False,
+    max_bytes: int = 0,
+    backup_count: int = 3,
+    name: str = "calculator",
+) -> logging.Logger:
+    """
+    Configure the logger on first use. The file handler rotates once the log
+    reaches max_bytes (0 disables rotation). With use_queue, records go through
+    a QueueHandler and a QueueListener thread does the formatting and writing.
+    """
     log_file = Path(log_dir) / "calculator.log"
-    logger = logging.getLogger("calculator")
+    logger = logging.getLogger(name)
     if not logger.handlers:
         logger.setLevel(logging.INFO)
-        fh = logging.FileHandler(log_file, encoding="utf-8", delay=True)
-        fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        fh.setFormatter(fmt)
-        logger.addHandler(fh)
+        fh = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        if fmt == "json":
+            fh.setFormatter(JsonFormatter())
+        else:
+            fh.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        if use_queue:
+            q: queue.SimpleQueue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(q, fh)
+            listener.start()
+            atexit.register(_stop_listener, listener)
+            logger.addHandler(_LazyQueueHandler(q))
+            logger.listener = listener  # type: ignore[attr-defined]
+        else:
+            logger.addHandler(fh)
     return logger
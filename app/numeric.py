@@ -0,0 +1,244 @@
+"""
+Numeric backends, selected by CalculatorConfig.numeric_backend:
+
+  decimal   Decimal under the calculator's context (default; exact to precision)
+  float     native binary floats (fastest, ~15-17 significant digits)
+  fraction  exact rationals; only roots that are not rational get rounded,
+            at the calculator's precision
+
+Operations are written against the arithmetic operators every backend
+shares; int_power and nth_root dispatch on the operand type for the two
+operations whose semantics differ.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from decimal import Decimal, getcontext, localcontext
+from fractions import Fraction
+from functools import singledispatch
+import math
+from typing import Any, Callable, Dict, Union
+
+Number = Union[Decimal, float, Fraction]
+
+
+class NumericBackend(ABC):
+    name = ""
+    # constructor that turns str(value) back into an equal value; history readers map it over columns
+    number: Callable[[str], Any]
+
+    @abstractmethod
+    def parse(self, x) -> Number:
+        """Convert user input (str, int, float, Decimal, Fraction); raises on invalid input."""
+
+    def magnitude(self, value: Number) -> Number:
+        return abs(value)
+
+
+class DecimalBackend(NumericBackend):
+    name = "decimal"
+    number = Decimal
+
+    def parse(self, x) -> Decimal:
+        return Decimal(str(x))
+
+    def magnitude(self, value: Decimal) -> Decimal:
+        # exact, whatever the current context
+        return value.copy_abs()
+
+
+class FloatBackend(NumericBackend):
+    name = "float"
+    number = float
+
+    def parse(self, x) -> float:
+        v = float(x) if isinstance(x, (int, float, Decimal, Fraction)) else float(str(x))
+        if not math.isfinite(v):
+            raise ValueError(f"not a finite number: {x}")
+        return v
+
+
+class FractionBackend(NumericBackend):
+    name = "fraction"
+    number = Fraction
+
+    def parse(self, x) -> Fraction:
+        if isinstance(x, (int, Decimal, Fraction)):
+            return Fraction(x)
+        # via str so 0.1 means 1/10, not the binary float closest to it
+        return Fraction(str(x).strip())
+
+
+BACKENDS: Dict[str, type] = {
+    "decimal": DecimalBackend,
+    "float": FloatBackend,
+    "fraction": FractionBackend,
+}
+
+
+def get_backend(name: str = "decimal") -> NumericBackend:
+    cls = BACKENDS.get(name.lower())
+    if not cls:
+        raise ValueError(f"unknown numeric backend: {name}")
+    return cls()
+
+
+# ---- operations whose semantics differ per type
+#
+# Power and Root have dedicated algorithms whose cost is bounded by the
+# working precision, not by the operands. Results must stay within the
+# current context's exponent range (the calculator sets it from
+# config.max_result_digits); a power that could not is refused before any
+# work is done.
+
+# integer Newton roots beyond this many digits fall back to exp(ln(a) / n)
+MAX_NEWTON_DIGITS = 20_000
+
+
+def _log10_abs(a: Decimal) -> float:
+    """log10(|a|) of a nonzero Decimal, without overflowing a float."""
+    adj = a.adjusted()
+    return adj + math.log10(float(a.copy_abs().scaleb(-adj)))
+
+
+def _check_magnitude(log10_result: float) -> None:
+    ctx = getcontext()
+    if log10_result > ctx.Emax + 1 or log10_result < ctx.Etiny() - 1:
+        raise OverflowError(f"power result out of range (|exponent| > {ctx.Emax})")
+
+
+@singledispatch
+def int_power(a, n: int):
+    return a ** n
+
+
+@int_power.register
+def _(a: Decimal, n: int) -> Decimal:
+    if n == 0:
+        return Decimal(1)
+    if not a:
+        if n < 0:
+            raise ZeroDivisionError("zero to a negative power")
+        return Decimal(0)
+    if (abs(a.adjusted()) + 1) * abs(n) > getcontext().Emax:  # only then can it be out of range
+        _check_magnitude(_log10_abs(a) * n)
+    # with an integral exponent, libmpdec squares repeatedly under the context
+    # precision (plus its own guard digits), so this is O(log n) multiplications
+    return a ** n
+
+
+@int_power.register
+def _(a: Fraction, n: int) -> Fraction:
+    digits = max(a.numerator.bit_length(), a.denominator.bit_length()) * abs(n) * math.log10(2)
+    if digits > getcontext().Emax:
+        raise OverflowError("power too large for an exact fraction")
+    return a ** n
+
+
+@singledispatch
+def nth_root(a, b):
+    raise TypeError(f"unsupported operand type: {type(a).__name__}")
+
+
+@nth_root.register
+def _(a: Decimal, b) -> Decimal:
+    b = Decimal(b)
+    if b == b.to_integral_value():
+        return _decimal_root(a, int(b))
+    if a < 0:
+        raise ValueError("fractional root of a negative number")
+    # a ** (1/b) for fractional orders, with guard digits
+    ctx = getcontext()
+    with localcontext() as work:
+        work.prec += 4
+        r = a.__pow__(Decimal(1) / b)
+    return ctx.plus(r)
+
+
+def _decimal_root(a: Decimal, n: int) -> Decimal:
+    """Correctly rounded nth root for a nonzero integer n."""
+    if a < 0:
+        if n % 2 == 0:
+            raise ValueError("even root of a negative number")
+        return _decimal_root(a.copy_negate(), n).copy_negate()
+    if not a:
+        if n < 0:
+            raise ZeroDivisionError("zero to a negative power")
+        return Decimal(0)
+    ctx = getcontext()
+    if n < 0:
+        with localcontext() as work:
+            work.prec += 3
+            r = _decimal_root(a, -n)
+        return ctx.divide(1, r)
+    if n == 1:
+        return +a
+
+    wp = ctx.prec + 2
+    _, digits, e = a.as_tuple()
+    m = int("".join(map(str, digits)))
+    if n * wp > MAX_NEWTON_DIGITS:
+        # the root is close to 1 for such orders; exp and ln stay O(precision)
+        with localcontext() as work:
+            work.prec = wp
+            r = (a.ln() / n).exp()
+        return +r
+    # a = m * 10**e; pick the root's exponent k so that R = iroot(m * 10**(e - n*k))
+    # has at least wp + 1 digits, and round R * 10**k once
+    k = min(e // n, (len(digits) + e) // n - wp - 1)
+    x = m * 10 ** (e - n * k)
+    r = _iroot(x, n)
+    if r ** n == x:
+        while k < 0 and r % 10 == 0:
+            r //= 10
+            k += 1
+    else:
+        # a sticky digit keeps an inexact root from rounding like a tie
+        r, k = r * 10 + 1, k - 1
+    return Decimal(r).scaleb(k)
+
+
+@nth_root.register
+def _(a: float, b) -> float:
+    n = int(b) if b == int(b) else None
+    if a < 0:
+        if n is None or n % 2 == 0:
+            raise ValueError("even or fractional root of a negative number")
+        return -nth_root(-a, b)
+    r = a ** (1.0 / b)
+    if n is not None and r > 0 and math.isfinite(r):
+        # one Newton step cleans up 27 ** (1/3) == 3.0000000000000004
+        r -= (r ** n - a) / (n * r ** (n - 1))
+    return r
+
+
+@nth_root.register
+def _(a: Fraction, b) -> Fraction:
+    b = Fraction(b)
+    if b.denominator == 1:
+        n = abs(b.numerator)
+        if a < 0 and n % 2:
+            return -nth_root(-a, b)
+        if a >= 0:
+            num, den = _iroot(a.numerator, n), _iroot(a.denominator, n)
+            if num ** n == a.numerator and den ** n == a.denominator:
+                root = Fraction(num, den)
+                return root if b > 0 else 1 / root
+    # irrational (or an even root of a negative base): round through Decimal at the current precision
+    approx = nth_root(Decimal(a.numerator) / a.denominator, Decimal(b.numerator) / b.denominator)
+    return Fraction(approx)
+
+
+def _iroot(x: int, n: int) -> int:
+    """Largest r with r ** n <= x (Newton's method on integers)."""
+    if x < 2:
+        return x
+    # start just above the root from a float estimate, so Newton converges quadratically
+    shift = max(x.bit_length() - 64, 0)
+    lg = (math.log2(x >> shift) + shift) / n
+    e = max(int(lg) - 52, 0)
+    r = (int(2 ** (lg - e) * (1 + 2 ** -30)) + 1) << e
+    while True:
+        s = ((n - 1) * r + x // r ** (n - 1)) // n
+        if s >= r:
+            return r
+        r = s
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from collections import deque
+import threading
+from typing import Deque, Optional, Sequence, Tuple
+
+from app.calculation import Calculation
+
+BACKPRESSURE_POLICIES = ("block", "drop", "coalesce")
+
+
+class AsyncDispatcher:
+    """
+    Delivers observer notifications from a background thread.
+
+    perform() only enqueues; the worker drains everything pending at once and
+    hands consecutive calculations to each observer as one update_many batch.
+    When maxsize entries are waiting, the policy decides what happens:
+
+      block     the caller waits for the worker to catch up
+      drop      new calculations are discarded (and counted in .dropped)
+      coalesce  new calculations are merged into the newest pending batch
+
+    Undo/redo/clear/save events are never dropped or merged. An observer that
+    raises is logged and counted in .errors; the others still get the batch.
+    """
+
+    def __init__(self, calculator: "Calculator", maxsize: int = 1024, policy: str = "block"):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"unknown backpressure policy: {policy}")
+        self._calculator = calculator
+        self._maxsize = maxsize
+        self._policy = policy
+        self._queue: Deque[Tuple] = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self.dropped = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="observer-dispatch", daemon=True)
+        self._thread.start()
+
+    # ---- producer side
+    def submit(self, calcs: Sequence[Calculation]) -> None:
+        with self._cond:
+            if len(self._queue) >= self._maxsize:
+                if self._policy == "drop":
+                    self.dropped += len(calcs)
+                    return
+                if self._policy == "coalesce" and self._queue[-1][0] == "calcs":
+                    self._queue[-1][1].extend(calcs)
+                    return
+                self._wait_for_room()
+            self._queue.append(("calcs", list(calcs)))
+            self._cond.notify_all()
+
+    def submit_event(self, event: str, memento: Optional["CalculatorMemento"] = None) -> None:
+        with self._cond:
+            if len(self._queue) >= self._maxsize:
+                self._wait_for_room()
+            self._queue.append(("event", event, memento))
+            self._cond.notify_all()
+
+    def _wait_for_room(self) -> None:
+        while len(self._queue) >= self._maxsize and not self._closed:
+            self._cond.wait()
+
+    def drain(self) -> None:
+        """Block until everything submitted so far has been delivered."""
+        with self._cond:
+            while (self._queue or self._busy) and self._thread.is_alive():
+                self._cond.wait()
+
+    def close(self) -> None:
+        self.drain()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    # ---- worker side
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                items = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                self._deliver(items)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _deliver(self, items) -> None:
+        batch = []
+        for item in items:
+            if item[0] == "calcs":
+                batch.extend(item[1])
+                continue
+            if batch:
+                self._each(lambda ob, b=batch: ob.update_many(self._calculator, b))
+                batch = []
+            _, event, memento = item
+            self._each(lambda ob: ob.on_event(self._calculator, event, memento))
+        if batch:
+            self._each(lambda ob: ob.update_many(self._calculator, batch))
+
+    def _each(self, call) -> None:
+        for ob in tuple(self._calculator.observers):
+            try:
+                call(ob)
+            except Exception:
+                self.errors += 1
+                self._calculator.logger.exception(
+                    "Observer %s failed; continuing with the others", ob.__class__.__name__
+                )
@@ -1,45 +1,66 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from decimal import Decimal, getcontext
+from decimal import Decimal
+import operator
+from typing import Dict, List, Sequence
+
+from app.numeric import int_power, nth_root
 
 class Operation(ABC):
     @abstractmethod
     def execute(self, a: Decimal, b: Decimal) -> Decimal: ...
 
+    def execute_many(self, a: Sequence[Decimal], b: Sequence[Decimal]) -> List[Decimal]:
+        """Batch kernel over paired operands; subclasses override with tighter loops."""
+        return list(map(self.execute, a, b))
+
     def __str__(self) -> str:  # pragma: no cover (stringly)
         return self.__class__.__name__
 
+def _check_divisors(b: Sequence[Decimal], message: str) -> None:
+    if not all(b):
+        raise ZeroDivisionError(message)
+
 class Addition(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         return a + b
 
+    def execute_many(self, a, b):
+        return list(map(operator.add, a, b))
+
 class Subtraction(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         return a - b
 
+    def execute_many(self, a, b):
+        return list(map(operator.sub, a, b))
+
 class Multiplication(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         return a * b
 
+    def execute_many(self, a, b):
+        return list(map(operator.mul, a, b))
+
 class Division(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise ZeroDivisionError("division by zero")
         return a / b
 
+    def execute_many(self, a, b):
+        _check_divisors(b, "division by zero")
+        return list(map(operator.truediv, a, b))
+
 class Power(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
-        return a ** int(b)
+        return int_power(a, int(b))
 
 class Root(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise ZeroDivisionError("zero root")
-        # nth root => a ** (1/b)
-        getcontext().prec += 4
-        result = a.__pow__(Decimal(1) / b)
-        getcontext().prec -= 4
-        return result
+        return nth_root(a, b)
 
 class Modulus(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
@@ -47,22 +68,42 @@ class Modulus(Operation):
             raise ZeroDivisionError("mod by zero")
         return a % b
 
+    def execute_many(self, a, b):
+        _check_divisors(b, "mod by zero")
+        return list(map(operator.mod, a, b))
+
 class IntDivide(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise ZeroDivisionError("int divide by zero")
-        return (a // b)
+        q = a // b
+        # Fraction // Fraction is an int; keep the operand type
+        return q if type(q) is type(a) else type(a)(q)
+
+    def execute_many(self, a, b):
+        _check_divisors(b, "int divide by zero")
+        out = list(map(operator.floordiv, a, b))
+        if out and type(out[0]) is not type(a[0]):
+            out = list(map(type(a[0]), out))
+        return out
 
 class Percent(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         if b == 0:
             raise ZeroDivisionError("percent of zero base")
-        return (a / b) * Decimal(100)
+        return (a / b) * 100
+
+    def execute_many(self, a, b):
+        _check_divisors(b, "percent of zero base")
+        return [(x / y) * 100 for x, y in zip(a, b)]
 
 class AbsDiff(Operation):
     def execute(self, a: Decimal, b: Decimal) -> Decimal:
         return abs(a - b)
 
+    def execute_many(self, a, b):
+        return [abs(x - y) for x, y in zip(a, b)]
+
 FACTORY = {
     "add": Addition,
     "subtract": Subtraction,
@@ -76,8 +117,15 @@ FACTORY = {
     "abs_diff": AbsDiff,
 }
 
+# operations are stateless, so one shared instance per name is enough
+_FLYWEIGHTS: Dict[str, Operation] = {}
+
 def get_operation(name: str) -> Operation:
-    cls = FACTORY.get(name.lower())
-    if not cls:
-        raise ValueError(f"unknown operation: {name}")
-    return cls()
+    key = name.lower()
+    op = _FLYWEIGHTS.get(key)
+    if op is None:
+        cls = FACTORY.get(key)
+        if not cls:
+            raise ValueError(f"unknown operation: {name}")
+        op = _FLYWEIGHTS[key] = cls()
+    return op
@@ -0,0 +1,120 @@
+"""
+Multi-process evaluation of large inputs of (operation, a, b) triples.
+
+The input is cut into chunks of parallel_chunksize and sharded across a
+ProcessPoolExecutor. Each worker builds its own Calculator (and therefore its
+own decimal context and result cache) from the caller's CalculatorConfig.
+Chunks are merged back in input order: results are returned in order and
+every chunk's successful calculations are appended to the caller's history
+as one undo step.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from decimal import Decimal
+from itertools import islice
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+
+ParallelResult = Union[Calculation, Exception]
+
+_worker: Optional[Calculator] = None
+
+
+def worker_config(config: CalculatorConfig) -> CalculatorConfig:
+    """
+    config for a compute-only worker process: no auto-save, segment commits,
+    archive, metrics, logging thread or asynchronous observers.
+    """
+    return replace(
+        config, auto_save=False, async_observers=False, log_queue=False,
+        multi_writer=False, history_archive=False, instrumentation=False,
+    )
+
+
+def init_worker(config: CalculatorConfig) -> None:
+    """ProcessPoolExecutor initializer: build this process's Calculator from config."""
+    global _worker
+    _worker = Calculator(config)
+
+
+def worker_calculator() -> Calculator:
+    """The Calculator init_worker built in this worker process."""
+    return _worker
+
+
+def _run_chunk(chunk: List[Tuple[str, object, object]]) -> List[ParallelResult]:
+    out: List[ParallelResult] = []
+    for op_name, a, b in chunk:
+        try:
+            out.append(_worker.calculate(op_name, a, b))
+        except (OperationError, ValidationError, ValueError) as e:
+            out.append(e)
+    return out
+
+
+def read_calculations(path: Path) -> Iterator[Tuple[str, str, str]]:
+    """Stream "op a b" lines from a file; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            if len(parts) != 3:
+                raise ValidationError(f"{path}:{lineno}: expected 'op a b', got {line!r}")
+            yield tuple(parts)
+
+
+def iter_parallel(
+    calc: Calculator,
+    items: Iterable[Tuple[str, object, object]],
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[List[Union[Decimal, Exception]]]:
+    """
+    Yield per-chunk result lists in input order. A failed calculation yields
+    its exception in place of a result. At most two chunks per worker are in
+    flight, so arbitrarily long inputs stream in bounded memory.
+    """
+    workers = workers or calc.config.parallel_workers or os.cpu_count() or 1
+    chunksize = chunksize or calc.config.parallel_chunksize
+
+    it = iter(items)
+    chunks = iter(lambda: list(islice(it, chunksize)), [])
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(worker_config(calc.config),)) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_run_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield _merge(calc, pending.popleft().result())
+        while pending:
+            yield _merge(calc, pending.popleft().result())
+
+
+def _merge(calc: Calculator, out: List[ParallelResult]) -> List[Union[Decimal, Exception]]:
+    done = [c for c in out if isinstance(c, Calculation)]
+    if done:
+        calc.record_many(done)
+    return [c.result if isinstance(c, Calculation) else c for c in out]
+
+
+def perform_parallel(
+    calc: Calculator,
+    items: Iterable[Tuple[str, object, object]] | Path | str,
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> List[Union[Decimal, Exception]]:
+    """Evaluate items (or an "op a b" file) across processes; results come back in input order."""
+    if isinstance(items, (str, Path)):
+        items = read_calculations(Path(items))
+    return [r for chunk in iter_parallel(calc, items, workers=workers, chunksize=chunksize) for r in chunk]
@@ -0,0 +1,214 @@
+"""
+Recompute a stored history under another configuration and report what changes.
+
+    python -m app.replay history/history.csv --precision 50
+    python -m app.replay history/history.bin --backend fraction --workers 8 --format jsonl
+
+Every stored Calculation is re-evaluated through the operations factory
+(expressions through app.expression) by worker processes, each holding a
+Calculator built from the target config, in chunks of parallel_chunksize
+like app.parallel. Workers only compute: no history, undo state or
+observers are involved, and only differences travel back. The report
+streams in file order: one row per result that changed and per calculation
+that now fails. Expressions that use variables (ans included) cannot be
+replayed on their own and are counted as skipped.
+"""
+from __future__ import annotations
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import csv
+from dataclasses import dataclass, replace
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.history_storage import storage_for_path
+from app.numeric import get_backend
+from app.operations import FACTORY
+from app.parallel import init_worker, worker_calculator, worker_config
+
+OUTPUT_FORMATS = ("csv", "jsonl")
+OUTPUT_COLUMNS = ["row", "operation", "operand1", "operand2", "stored", "replayed", "error"]
+
+# (operation, operand1, operand2, stored result), all as text
+_Row = Tuple[str, str, str, str]
+# (position in chunk, replayed result or None, error or None)
+_Diff = Tuple[int, Optional[str], Optional[str]]
+
+
+@dataclass
+class ReplayDiff:
+    row: int
+    operation: str
+    operand1: str
+    operand2: str
+    stored: str
+    replayed: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        return "error" if self.error is not None else "changed"
+
+
+@dataclass
+class ReplaySummary:
+    rows: int = 0
+    changed: int = 0
+    errors: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (f"Replayed {self.rows} calculations in {self.elapsed:.3f}s ({self.throughput:,.0f}/s): "
+                f"{self.changed} changed, {self.errors} new errors, {self.skipped} skipped")
+
+
+def _same(calc: Calculator, replayed, stored: str) -> bool:
+    # compare as numbers of the target backend, so "4" and 4.0 are the same result
+    try:
+        return calc.backend.parse(stored) == replayed
+    except Exception:
+        return False
+
+
+def _replay_chunk(rows: List[_Row]) -> Tuple[List[_Diff], int]:
+    calc = worker_calculator()
+    diffs: List[_Diff] = []
+    skipped = 0
+    for i, (op, a, b, stored) in enumerate(rows):
+        try:
+            if op.lower() in FACTORY:
+                result = calc.calculate(op, a, b).result
+            else:
+                plan = calc.compile(op)
+                if plan.names:
+                    skipped += 1
+                    continue
+                result = calc.calculate_expression(op).result
+        except (OperationError, ValidationError, ValueError) as e:
+            diffs.append((i, None, str(e)))
+            continue
+        if not _same(calc, result, stored):
+            diffs.append((i, str(result), None))
+    return diffs, skipped
+
+
+def _collect(first: int, rows: List[_Row], future: Future, summary: ReplaySummary) -> Iterator[ReplayDiff]:
+    diffs, skipped = future.result()
+    summary.rows += len(rows)
+    summary.skipped += skipped
+    for i, replayed, error in diffs:
+        if error is None:
+            summary.changed += 1
+        else:
+            summary.errors += 1
+        yield ReplayDiff(first + i + 1, *rows[i], replayed=replayed, error=error)
+
+
+def iter_replay(
+    path: Path,
+    target: CalculatorConfig,
+    summary: ReplaySummary,
+    *,
+    source_backend: str = "decimal",
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[ReplayDiff]:
+    """
+    Yield the differences from replaying the history file at path under
+    target, in file order, counting into summary. path is read with
+    source_backend, the backend it was written with. At most two chunks per
+    worker are in flight, so memory stays bounded for any file size.
+    """
+    workers = workers or target.parallel_workers or os.cpu_count() or 1
+    chunksize = chunksize or target.parallel_chunksize
+    storage = storage_for_path(path, target.default_encoding, get_backend(source_backend).number)
+    chunks = (
+        [(c.operation, str(c.operand1), str(c.operand2), str(c.result)) for c in chunk]
+        for chunk in storage.read(Path(path), chunksize)
+    )
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(worker_config(target),)) as pool:
+        pending: deque = deque()
+        first = 0
+        for rows in chunks:
+            pending.append((first, rows, pool.submit(_replay_chunk, rows)))
+            first += len(rows)
+            if len(pending) >= 2 * workers:
+                yield from _collect(*pending.popleft(), summary)
+        while pending:
+            yield from _collect(*pending.popleft(), summary)
+
+
+def write_diffs(diffs: Iterable[ReplayDiff], out: TextIO, fmt: str = "csv") -> None:
+    if fmt == "jsonl":
+        for d in diffs:
+            rec = {k: getattr(d, k) for k in OUTPUT_COLUMNS if getattr(d, k) is not None}
+            out.write(json.dumps(rec) + "\n")
+        return
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(OUTPUT_COLUMNS)
+    for d in diffs:
+        writer.writerow([d.row, d.operation, d.operand1, d.operand2, d.stored, d.replayed or "", d.error or ""])
+
+
+def run_replay(
+    path: Path,
+    target: CalculatorConfig,
+    out: TextIO,
+    *,
+    fmt: str = "csv",
+    source_backend: str = "decimal",
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> ReplaySummary:
+    """Replay path under target, writing one report row per difference to out."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {fmt}")
+    summary = ReplaySummary()
+    start = time.perf_counter()
+    diffs = iter_replay(
+        path, target, summary, source_backend=source_backend, workers=workers, chunksize=chunksize
+    )
+    write_diffs(diffs, out, fmt)
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", type=Path, help="history file (.csv or .bin)")
+    parser.add_argument("--precision", type=int, help="target precision (default: CALCULATOR_PRECISION)")
+    parser.add_argument("--backend", choices=["decimal", "float", "fraction"],
+                        help="target numeric backend (default: CALCULATOR_NUMERIC_BACKEND)")
+    parser.add_argument("--source-backend", default="decimal", choices=["decimal", "float", "fraction"],
+                        help="backend the history was written with")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CALCULATOR_PARALLEL_WORKERS)")
+    parser.add_argument("--chunksize", type=int)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv")
+    args = parser.parse_args(argv)
+
+    target = CalculatorConfig.from_env()
+    overrides = {"precision": args.precision, "numeric_backend": args.backend}
+    target = replace(target, **{k: v for k, v in overrides.items() if v is not None})
+    summary = run_replay(
+        args.path, target, sys.stdout, fmt=args.format, source_backend=args.source_backend,
+        workers=args.workers, chunksize=args.chunksize,
+    )
+    print(summary, file=sys.stderr)
+    return 1 if summary.errors else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
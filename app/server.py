@@ -0,0 +1,262 @@
+"""
+Asyncio JSON-lines server exposing Calculator over TCP (stdlib only).
+
+    python -m app.server --host 127.0.0.1 --port 8765
+
+Each request is one JSON object per line and gets one JSON line back, in
+request order, so clients may pipeline as many requests as they like:
+
+    {"id": 1, "op": "perform", "operation": "add", "a": "2", "b": "3"}
+    {"id": 1, "ok": true, "result": "5"}
+
+Operations: perform, evaluate (field "expr"), undo, redo, history, summary, save.
+history takes the filters of Calculator.query_history as optional fields
+("operation" for its op argument).
+Requests name a "session"; each named session is its own Calculator with
+history under history_dir/sessions/<name>. Requests without one go to a
+private session of the connection, which is not auto-saved and is discarded
+(directory included) when the connection closes. The configuration is read from the environment
+once, at startup. CPU-heavy work runs in a thread pool, off the event loop; every calculator
+carries its own decimal context, so sessions with different precision can
+share the pool. Request lines are capped at max_request_bytes, and a request
+still running after request_timeout seconds is answered with an error; its
+session stays locked until the work actually finishes.
+On shutdown the server stops accepting, answers every request it has already
+received, then flushes and saves each session's history.
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import itertools
+import json
+import re
+import shutil
+import signal
+from typing import Dict, Optional, Tuple
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+
+# cheap enough to answer inline instead of paying for an executor hop
+_INLINE_OPERATIONS = {"add", "subtract", "multiply", "abs_diff"}
+# optional fields of a history request -> Calculator.query_history keywords
+_HISTORY_FILTERS = {
+    "operation": "op", "since": "since", "until": "until", "result_range": "result_range",
+    "limit": "limit", "offset": "offset", "newest_first": "newest_first",
+    "include_archive": "include_archive",
+}
+_SESSION_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class _Session:
+    def __init__(self, calc: Calculator):
+        self.calc = calc
+        self.lock = asyncio.Lock()
+
+
+class CalculatorServer:
+    def __init__(
+        self,
+        config: CalculatorConfig,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_workers: Optional[int] = None,
+        request_timeout: Optional[float] = 30.0,
+        max_request_bytes: int = 64 * 1024,
+    ):
+        self.config = config
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self.max_request_bytes = max_request_bytes
+        self.sessions: Dict[str, _Session] = {}
+        self._private: Dict[str, _Session] = {}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="calculator")
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._connections: Dict[asyncio.Task, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+        self._conn_ids = itertools.count(1)
+
+    # ---- lifecycle
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=self.max_request_bytes
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await self.start()
+        print(f"Calculator server listening on {self.host}:{self.port}")
+        await stop.wait()
+        await self.stop()
+
+    async def stop(self) -> None:
+        """Stop accepting, finish requests already received, then persist every session."""
+        if self._server is not None:
+            self._server.close()
+        for reader, writer in list(self._connections.values()):
+            # no new bytes; whatever is already buffered is still answered
+            writer.transport.pause_reading()
+            reader.feed_eof()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            # only now: since Python 3.12.1 this also waits for every client to disconnect
+            await self._server.wait_closed()
+        loop = asyncio.get_running_loop()
+        for session in self.sessions.values():
+            async with session.lock:  # a timed-out request may still be running
+                await loop.run_in_executor(self._executor, self._persist, session.calc)
+        self._executor.shutdown()
+
+    @staticmethod
+    def _persist(calc: Calculator) -> None:
+        calc.close()
+        if calc.config.auto_save:
+            calc.save_history()
+
+    @staticmethod
+    def _discard(calc: Calculator) -> None:
+        calc.close()
+        shutil.rmtree(calc.config.history_dir, ignore_errors=True)
+
+    # ---- sessions
+    async def session(self, name: str) -> _Session:
+        session = self.sessions.get(name)
+        if session is None:
+            if not _SESSION_NAME.fullmatch(name):
+                raise ValueError(f"invalid session name: {name!r}")
+            config = replace(self.config, history_dir=self.config.history_dir / "sessions" / name)
+            session = self.sessions[name] = _Session(Calculator(config))
+            # requests that arrive meanwhile queue on the lock until the history is in
+            async with session.lock:
+                try:
+                    await self._offload(session.calc.load_history)
+                except Exception:
+                    del self.sessions[name]
+                    raise
+        return session
+
+    def _private_session(self, conn: str) -> _Session:
+        session = self._private.get(conn)
+        if session is None:
+            # "." is not allowed in session names, so this cannot collide with one
+            config = replace(
+                self.config, history_dir=self.config.history_dir / "sessions" / f".{conn}", auto_save=False
+            )
+            session = self._private[conn] = _Session(Calculator(config))
+        return session
+
+    # ---- connections
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = (reader, writer)
+        conn = f"conn-{next(self._conn_ids)}"
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # over max_request_bytes; the rest of the line cannot be resynchronised
+                    error = {"id": None, "ok": False, "error": "bad request: line too long"}
+                    writer.write(json.dumps(error).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self._respond(line, conn)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(task, None)
+            private = self._private.pop(conn, None)
+            if private is not None:
+                async with private.lock:
+                    await self._offload(self._discard, private.calc)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:  # pragma: no cover - peer already gone
+                pass
+
+    async def _respond(self, line: bytes, conn: str) -> dict:
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"id": None, "ok": False, "error": f"bad request: {e}"}
+        rid = req.get("id")
+        try:
+            name = req.get("session")
+            session = await self.session(str(name)) if name else self._private_session(conn)
+            await session.lock.acquire()
+            work = asyncio.ensure_future(self._dispatch(session.calc, req))
+            work.add_done_callback(lambda _: session.lock.release())
+            try:
+                result = await asyncio.wait_for(asyncio.shield(work), self.request_timeout)
+            except asyncio.TimeoutError:
+                work.add_done_callback(_consume)
+                raise TimeoutError(f"request timed out after {self.request_timeout}s") from None
+            return {"id": rid, "ok": True, "result": result}
+        except Exception as e:
+            return {"id": rid, "ok": False, "error": str(e)}
+
+    async def _dispatch(self, calc: Calculator, req: dict):
+        op = req.get("op")
+        if op == "perform":
+            args = (req["operation"], req["a"], req["b"])
+            if str(args[0]).lower() in _INLINE_OPERATIONS:
+                return str(calc.perform(*args))
+            return str(await self._offload(calc.perform, *args))
+        if op == "evaluate":
+            return str(await self._offload(calc.evaluate, req["expr"], **req.get("vars", {})))
+        if op == "undo":
+            return calc.undo()
+        if op == "redo":
+            return calc.redo()
+        if op == "history":
+            query = {kw: req[field] for field, kw in _HISTORY_FILTERS.items() if field in req}
+            if not query:
+                return [c.to_dict() for c in calc.history_snapshot()]
+            return [c.to_dict() for c in calc.query_history(**query)]
+        if op == "summary":
+            rows = calc.summary(req.get("operation"))
+            return {name: {k: v if k == "count" else str(v) for k, v in st.items()} for name, st in rows.items()}
+        if op == "save":
+            return str(await self._offload(calc.save_history))
+        raise ValueError(f"unknown op: {op!r}")
+
+    async def _offload(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+
+def _consume(task: asyncio.Future) -> None:
+    # nobody awaits a timed-out request any more; keep its error out of the loop's log
+    if not task.cancelled():
+        task.exception()
+
+
+def main(argv=None) -> None:  # pragma: no cover - thin CLI
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the calculator as JSON lines over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="executor threads")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request is answered with an error")
+    args = parser.parse_args(argv)
+    server = CalculatorServer(CalculatorConfig.from_env(), args.host, args.port, args.workers, args.timeout)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
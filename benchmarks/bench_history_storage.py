@@ -0,0 +1,64 @@
+"""
+Compare save/load time and file size of the history storage formats.
+
+    python -m benchmarks.bench_history_storage              # 10^4 .. 10^6 rows
+    python -m benchmarks.bench_history_storage --sizes 10000000
+
+10^7 rows needs several GB of RAM for the Calculation objects alone.
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, UTC
+from decimal import Decimal
+from pathlib import Path
+
+from app.calculation import Calculation
+from app.history_storage import STORAGES, get_storage
+
+OPS = ["add", "subtract", "multiply", "divide", "power", "root"]
+
+
+def synthetic_history(n: int):
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    third = Decimal(1) / Decimal(3)
+    return [
+        Calculation(OPS[i % len(OPS)], Decimal(i), Decimal(i % 97 + 1),
+                    third * i, start + timedelta(microseconds=i))
+        for i in range(n)
+    ]
+
+
+def bench(sizes, formats):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            history = synthetic_history(n)
+            for fmt in formats:
+                storage = get_storage(fmt)
+                path = Path(tmp) / f"history{storage.suffix}"
+                t0 = time.perf_counter()
+                storage.write(history, path)
+                t1 = time.perf_counter()
+                loaded = sum(len(chunk) for chunk in storage.read(path, chunksize=100_000))
+                t2 = time.perf_counter()
+                assert loaded == n
+                rows.append((n, fmt, t1 - t0, t2 - t1, path.stat().st_size))
+                path.unlink()
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    parser.add_argument("--formats", nargs="+", default=sorted(STORAGES), choices=sorted(STORAGES))
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'format':>8} {'save s':>9} {'load s':>9} {'size MB':>9}")
+    for n, fmt, save, load, size in bench(args.sizes, args.formats):
+        print(f"{n:>10} {fmt:>8} {save:>9.3f} {load:>9.3f} {size / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Stress test of multi-writer persistence: N processes hammering one history_dir.
+
+    python -m benchmarks.bench_multi_writer                          # 4 writers x 500 calculations
+    python -m benchmarks.bench_multi_writer --processes 8 --per-process 2000 --compact-every 32
+
+Every writer auto-saves after each calculation (one segment commit each)
+while this process keeps loading the merged history. At the end every
+record must be present exactly once with an intact result; the aggregate
+commit throughput is reported.
+"""
+from __future__ import annotations
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+from app.history_segments import load_segments, read_segments
+
+
+class StressResult(NamedTuple):
+    seconds: float
+    records: int
+    lost: int
+    duplicated: int
+    corrupted: int
+    reads: int
+
+    @property
+    def throughput(self) -> float:
+        return self.records / self.seconds
+
+
+def _config(directory, processes: int, per_process: int, compact_every: int) -> CalculatorConfig:
+    return CalculatorConfig(
+        base_dir=Path(directory), multi_writer=True, cache_size=0,
+        max_history_size=per_process, segment_compact_every=compact_every,
+    )
+
+
+def _writer(directory, worker: int, processes: int, per_process: int, compact_every: int) -> None:
+    calc = Calculator(_config(directory, processes, per_process, compact_every))
+    calc.add_observer(AutoSaveObserver())
+    for i in range(per_process):
+        calc.perform("add", worker, i)
+    calc.close()
+
+
+def stress(directory, processes: int = 4, per_process: int = 500, compact_every: int = 64) -> StressResult:
+    config = _config(directory, processes, per_process, compact_every)
+    reader = Calculator(config)
+    reads = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [
+            pool.submit(_writer, directory, w, processes, per_process, compact_every)
+            for w in range(processes)
+        ]
+        while not all(f.done() for f in futures):
+            # concurrent readers must only ever see whole records
+            load_segments(config, reader.storage)
+            reads += 1
+        wait(futures)
+        for f in futures:
+            f.result()
+    seconds = time.perf_counter() - t0
+
+    # each process only keeps per_process rows in memory; the store keeps them all
+    rows = read_segments(config, reader.storage)
+    seen = Counter((int(c.operand1), int(c.operand2)) for c in rows)
+    expected = {(w, i) for w in range(processes) for i in range(per_process)}
+    return StressResult(
+        seconds=seconds,
+        records=sum(seen.values()),
+        lost=len(expected - seen.keys()),
+        duplicated=sum(n - 1 for n in seen.values()),
+        corrupted=sum(
+            1 for c in rows
+            if c.operation != "add" or c.result != c.operand1 + c.operand2
+        ) + len(seen.keys() - expected),
+        reads=reads,
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--per-process", type=int, default=500)
+    parser.add_argument("--compact-every", type=int, default=64)
+    parser.add_argument("--dir", type=Path, help="history base dir (default: a temporary one)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        r = stress(args.dir or tmp, args.processes, args.per_process, args.compact_every)
+    print(f"{args.processes} writers x {args.per_process}: {r.records} records in {r.seconds:.2f}s "
+          f"({r.throughput:,.0f} commits/s), {r.reads} concurrent loads")
+    print(f"lost {r.lost}, duplicated {r.duplicated}, corrupted {r.corrupted}")
+    if r.lost or r.duplicated or r.corrupted:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-operation throughput of the numeric backends (decimal, float, fraction).
+
+    python -m benchmarks.bench_numeric                  # 20k operand pairs, precision 28
+    python -m benchmarks.bench_numeric --rows 100000 --precision 50 --ops add divide root
+
+Operands are parsed and validated once; the timed part is the operation's
+batch kernel under the calculator's context. Figures are operations/second.
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from decimal import localcontext
+from pathlib import Path
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.numeric import BACKENDS
+from app.operations import FACTORY, get_operation
+
+
+def operands(op: str, n: int):
+    a = [str(i % 1000 + 1) + ".25" for i in range(n)]
+    # keep power/root results in range for every backend
+    b = [str(i % 7 + 2) for i in range(n)] if op in ("power", "root") else [str(i % 97 + 1) + ".5" for i in range(n)]
+    return a, b
+
+
+def bench(ops, backends, rows, precision):
+    table = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            calc = Calculator(CalculatorConfig(
+                base_dir=Path(tmp), numeric_backend=backend, precision=precision, auto_save=False,
+            ))
+            for op in ops:
+                a, b = operands(op, rows)
+                da, db = calc._validate_many(a), calc._validate_many(b)
+                kernel = get_operation(op)
+                with localcontext(calc.context):
+                    t0 = time.perf_counter()
+                    kernel.execute_many(da, db)
+                    table[op, backend] = rows / (time.perf_counter() - t0)
+    return table
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--precision", type=int, default=28)
+    parser.add_argument("--ops", nargs="+", default=list(FACTORY), choices=list(FACTORY))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args(argv)
+
+    table = bench(args.ops, args.backends, args.rows, args.precision)
+    print(f"{'operation':>11}" + "".join(f"{b:>14}" for b in args.backends))
+    for op in args.ops:
+        print(f"{op:>11}" + "".join(f"{table[op, b]:>14,.0f}" for b in args.backends))
+
+
+if __name__ == "__main__":
+    main()
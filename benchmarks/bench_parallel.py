@@ -0,0 +1,66 @@
+"""
+Scaling of app.parallel.perform_parallel from 1 to N worker processes.
+
+    python -m benchmarks.bench_parallel                   # 20k root/power/divide at prec 200
+    python -m benchmarks.bench_parallel --rows 100000 --precision 500 --workers 1 2 4 8
+
+Speedup is relative to the 1-worker run; the serial Calculator.perform loop
+is shown for reference.
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.parallel import perform_parallel
+
+OPS = ["root", "power", "divide"]
+
+
+def workload(n: int):
+    # distinct operands so the result cache never short-circuits the work
+    return [(OPS[i % len(OPS)], i + 2, 3 + i % 5) for i in range(n)]
+
+
+def bench(rows, precision, workers, chunksize):
+    items = workload(rows)
+    out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config = CalculatorConfig(base_dir=Path(tmp), precision=precision, auto_save=False)
+        calc = Calculator(config)
+        t0 = time.perf_counter()
+        for item in items:
+            calc.perform(*item)
+        out.append(("serial", time.perf_counter() - t0))
+        for w in workers:
+            calc = Calculator(config)
+            t0 = time.perf_counter()
+            perform_parallel(calc, items, workers=w, chunksize=chunksize)
+            out.append((w, time.perf_counter() - t0))
+    return out
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    cpus = os.cpu_count() or 1
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--precision", type=int, default=200)
+    parser.add_argument("--chunksize", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cpus} & set(range(1, cpus + 1))))
+    args = parser.parse_args(argv)
+
+    results = bench(args.rows, args.precision, args.workers, args.chunksize)
+    base = dict(results).get(1)
+    print(f"{'workers':>8} {'seconds':>9} {'calc/s':>10} {'speedup':>8}")
+    for w, secs in results:
+        speedup = f"{base / secs:>8.2f}" if base and w != "serial" else f"{'':>8}"
+        print(f"{w!s:>8} {secs:>9.3f} {args.rows / secs:>10,.0f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
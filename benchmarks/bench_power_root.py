@@ -0,0 +1,61 @@
+"""
+Power and Root (Decimal backend) across precisions, against the generic pow.
+
+    python -m benchmarks.bench_power_root                      # precisions 6 .. 200
+    python -m benchmarks.bench_power_root --precisions 28 100 --number 500
+
+"power" is int_power (range check, then repeated squaring) and "root"
+nth_root (integer Newton, correctly rounded); the "builtin" columns time
+the unchecked a ** n and the generic a ** (1/n) under the same context. Figures are microseconds per
+call; each case mixes small and large exponents or orders.
+"""
+from __future__ import annotations
+import argparse
+from decimal import Context, Decimal, localcontext
+import time
+
+from app.numeric import int_power, nth_root
+
+DEFAULT_PRECISIONS = [6, 28, 50, 100, 200]
+BASES = [Decimal("2"), Decimal("1.0000001"), Decimal("123.456"), Decimal("0.75")]
+EXPONENTS = [2, 7, 50, 1000, 10**5]
+ORDERS = [Decimal(2), Decimal(3), Decimal(5), Decimal(12)]
+
+
+def per_call(fn, pairs, number: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(number):
+        for a, b in pairs:
+            fn(a, b)
+    return (time.perf_counter() - t0) / (number * len(pairs)) * 1e6
+
+
+def bench(precisions, number: int):
+    powers = [(a, n) for a in BASES for n in EXPONENTS]
+    roots = [(a, n) for a in BASES for n in ORDERS]
+    rows = []
+    for prec in precisions:
+        with localcontext(Context(prec=prec)):
+            rows.append((
+                prec,
+                per_call(int_power, powers, number),
+                per_call(lambda a, n: a ** n, powers, number),
+                per_call(nth_root, roots, number),
+                per_call(lambda a, n: a ** (1 / n), roots, number),
+            ))
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--precisions", type=int, nargs="+", default=DEFAULT_PRECISIONS)
+    parser.add_argument("--number", type=int, default=200, help="passes over the operand set")
+    args = parser.parse_args(argv)
+
+    print(f"{'precision':>9}{'power':>12}{'builtin':>12}{'root':>12}{'builtin':>12}   (us/call)")
+    for prec, p, pb, r, rb in bench(args.precisions, args.number):
+        print(f"{prec:>9}{p:>12.2f}{pb:>12.2f}{r:>12.2f}{rb:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
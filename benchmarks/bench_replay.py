@@ -0,0 +1,59 @@
+"""
+Scaling of app.replay from 1 to N worker processes.
+
+    python -m benchmarks.bench_replay                     # 20k rows stored at prec 6, replayed at 200
+    python -m benchmarks.bench_replay --rows 100000 --precision 500 --workers 1 2 4 8
+
+The history is written at precision 6 and replayed at --precision, so
+nearly every root and divide shows up in the diff report. Speedup is
+relative to the 1-worker run.
+"""
+from __future__ import annotations
+import argparse
+from dataclasses import replace
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.replay import run_replay
+from benchmarks.bench_parallel import workload
+
+
+def bench(rows, precision, workers, chunksize):
+    out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config = CalculatorConfig(base_dir=Path(tmp), precision=6, auto_save=False, max_history_size=rows)
+        calc = Calculator(config)
+        for item in workload(rows):
+            calc.perform(*item)
+        path = calc.save_history()
+        target = replace(config, precision=precision)
+        for w in workers:
+            summary = run_replay(path, target, io.StringIO(), workers=w, chunksize=chunksize)
+            out.append((w, summary))
+    return out
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    cpus = os.cpu_count() or 1
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--precision", type=int, default=200)
+    parser.add_argument("--chunksize", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cpus} & set(range(1, cpus + 1))))
+    args = parser.parse_args(argv)
+
+    results = bench(args.rows, args.precision, args.workers, args.chunksize)
+    base = results[0][1].elapsed if results and results[0][0] == 1 else None
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'changed':>8} {'speedup':>8}")
+    for w, s in results:
+        speedup = f"{base / s.elapsed:.2f}x" if base else "-"
+        print(f"{w:>8} {s.elapsed:>9.3f} {s.throughput:>10,.0f} {s.changed:>8} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Warm restart: Calculator.restore against load_history, by history size.
+
+    python -m benchmarks.bench_snapshot                        # sizes 10^3 .. 10^5
+    python -m benchmarks.bench_snapshot --sizes 1000 1000000
+
+Each calculator is filled in batches of --batch, so the undo stack holds
+max_undo_depth steps as well. "csv" and "binary" are load_history in each
+history format, which restores no undo state; "restore" also brings back
+the undo/redo stacks. Figures are milliseconds; file sizes are in KiB.
+"""
+from __future__ import annotations
+import argparse
+from dataclasses import replace
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history_storage import get_storage
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def _ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1e3
+
+
+def bench(sizes, batch: int):
+    rows = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = CalculatorConfig(base_dir=Path(tmp), auto_save=False, max_history_size=n, precision=28)
+            calc = Calculator(config)
+            for start in range(0, n, batch):
+                count = min(batch, n - start)
+                calc.perform_many("divide", range(start + 1, start + count + 1), [7] * count)
+            calc.undo()
+
+            timings = {}
+            for fmt in ("csv", "binary"):
+                fmt_config = replace(config, history_format=fmt)
+                get_storage(fmt).write(calc.history, fmt_config.history_file)
+                timings[fmt] = _ms(Calculator(fmt_config).load_history)
+            path = calc.snapshot()
+            fresh = Calculator(config)
+            timings["restore"] = _ms(lambda: fresh.restore(path))
+            assert list(fresh.history) == list(calc.history)
+            rows.append((n, timings["csv"], timings["binary"], timings["restore"], path.stat().st_size / 1024))
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--batch", type=int, default=100, help="calculations per undo step")
+    args = parser.parse_args(argv)
+
+    print(f"{'history':>9}{'csv':>10}{'binary':>10}{'restore':>10}{'snapshot KiB':>14}   (ms)")
+    for n, csv_ms, bin_ms, restore_ms, kib in bench(args.sizes, args.batch):
+        print(f"{n:>9}{csv_ms:>10.1f}{bin_ms:>10.1f}{restore_ms:>10.1f}{kib:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
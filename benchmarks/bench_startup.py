@@ -0,0 +1,75 @@
+"""
+Startup cost of the calculator entry points: import time and peak RSS.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --max-ms 250 --max-mb 60     # exit 1 beyond either
+
+Each module is imported in a fresh interpreter with -X importtime; the
+reported time is the cumulative import time of the module itself, and the
+slowest imports underneath it are listed. Heavy optional dependencies that
+got loaded anyway (pandas, numpy) are flagged.
+"""
+from __future__ import annotations
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+MODULES = ["app.calculator", "app.calculator_repl", "app.server"]
+HEAVY = ["pandas", "numpy"]
+
+_PROBE = (
+    "import {mod}; import json, resource, sys; "
+    "print(json.dumps([resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+    "[m for m in {heavy!r} if m in sys.modules]]))"
+)
+
+
+def probe(module: str) -> Tuple[float, float, List[str], List[Tuple[float, str]]]:
+    """(import ms, peak RSS MB, heavy modules loaded, [(ms, name)] slowest imports)."""
+    import json
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(mod=module, heavy=HEAVY)],
+        capture_output=True, text=True, check=True,
+    )
+    rss_kb, heavy = json.loads(proc.stdout)
+    imports = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            ms = int(cumulative) / 1000
+        except ValueError:
+            continue  # the header line
+        imports.append((ms, name.strip()))
+        if name.strip() == module:
+            total = ms
+    imports.sort(reverse=True)
+    return total, rss_kb / 1024, heavy, imports
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    parser.add_argument("--max-ms", type=float, help="fail if any module takes longer to import")
+    parser.add_argument("--max-mb", type=float, help="fail if any import peaks above this RSS")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        ms, mb, heavy, imports = probe(module)
+        flag = f"  loaded: {', '.join(heavy)}" if heavy else ""
+        print(f"{module:<22} {ms:>8.1f} ms {mb:>8.1f} MB{flag}")
+        for sub_ms, name in imports[1:args.top + 1]:
+            print(f"    {name:<30} {sub_ms:>8.1f} ms")
+        if (args.max_ms is not None and ms > args.max_ms) or (args.max_mb is not None and mb > args.max_mb):
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Load generator for app.server: latency percentiles and throughput.
+
+    python -m benchmarks.load_server                       # in-process server
+    python -m benchmarks.load_server --connect 127.0.0.1:8765 --clients 50 --window 16
+
+Each client keeps up to --window requests in flight on one connection
+(pipelining) and times every request from send to response.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculator_config import CalculatorConfig
+from app.server import CalculatorServer
+
+OPS = ["add", "multiply", "divide", "power", "root"]
+
+
+async def client(host, port, n, window, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = {}
+    sem = asyncio.Semaphore(window)
+
+    async def receive():
+        for _ in range(n):
+            resp = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent.pop(resp["id"]))
+            sem.release()
+
+    receiver = asyncio.create_task(receive())
+    for i in range(n):
+        await sem.acquire()
+        sent[i] = time.perf_counter()
+        req = {"id": i, "op": "perform", "operation": OPS[i % len(OPS)], "a": i + 2, "b": 3}
+        writer.write(json.dumps(req).encode() + b"\n")
+        await writer.drain()
+    await receiver
+    writer.close()
+
+
+async def run(args):
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        server = CalculatorServer(CalculatorConfig(base_dir=Path(tmp.name), auto_save=False))
+        await server.start()
+        host, port = server.host, server.port
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, int(port), args.requests, args.window, latencies) for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - t0
+    if server is not None:
+        await server.stop()
+        tmp.cleanup()
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"latency p50 {q[49] * 1e3:.2f} ms  p99 {q[98] * 1e3:.2f} ms  max {max(latencies) * 1e3:.2f} ms")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connect", metavar="HOST:PORT", help="target a running server")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="per client")
+    parser.add_argument("--window", type=int, default=8, help="pipelined requests in flight per client")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
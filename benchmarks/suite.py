@@ -0,0 +1,231 @@
+"""
+Performance regression suite for Calculator.
+
+    python -m benchmarks.suite                                  # 10^2 .. 10^6
+    python -m benchmarks.suite --sizes 100 10000 --output results.json
+    python -m benchmarks.suite --save-baseline                  # record this machine's numbers
+    python -m benchmarks.suite --threshold 25                   # fail on >25% slowdowns
+    pytest benchmarks --no-cov                                  # same, via pytest
+
+Every metric is seconds per call (lower is better) at a given history size,
+keyed "metric@size". Results are written as JSON and compared with the
+baseline (benchmarks/baseline.json by default). The run fails if any metric
+is more than threshold percent slower. Baselines are machine specific, so
+record one on the machine that will do the comparing.
+"""
+from __future__ import annotations
+import argparse
+from datetime import datetime, UTC
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver, JournalObserver, LoggingObserver
+
+DEFAULT_SIZES = [10**2, 10**3, 10**4, 10**5, 10**6]
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+# next to the baseline rather than the current directory; ignored by git
+DEFAULT_OUTPUT = Path(__file__).with_name("benchmark-results.json")
+DEFAULT_THRESHOLD = 20.0
+
+# name -> (case, largest history size it runs at); a case returns seconds per call
+CASES: Dict[str, Tuple[Callable[[Path, int], float], int]] = {}
+
+
+def benchmark(name: str, max_size: int = 10**6):
+    def register(fn):
+        CASES[name] = (fn, max_size)
+        return fn
+    return register
+
+
+def measure(fn: Callable[[], object], number: int = 1, repeat: int = 5) -> float:
+    """Median over repeat runs of the mean time of number calls to fn."""
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) / number)
+    return statistics.median(runs)
+
+
+def filled(tmp: Path, n: int, **cfg) -> Calculator:
+    """A calculator whose history holds exactly n entries."""
+    config = CalculatorConfig(
+        base_dir=tmp, max_history_size=n, max_undo_depth=1000, auto_save=False, **cfg
+    )
+    calc = Calculator(config)
+    calc.perform_many("add", range(n), [1] * n)
+    return calc
+
+
+# ---- cases
+
+@benchmark("perform")
+def _perform(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    it = iter(range(10**9))
+    # distinct operands, so every call misses the result cache
+    return measure(lambda: calc.perform("add", next(it), 1), number=500)
+
+
+@benchmark("undo")
+def _undo(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    for i in range(200):
+        calc.perform("add", i, 2)
+    runs = []
+    for _ in range(5):
+        runs.append(measure(calc.undo, number=200, repeat=1))
+        while calc.redo():
+            pass
+    return statistics.median(runs)
+
+
+@benchmark("redo")
+def _redo(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    for i in range(200):
+        calc.perform("add", i, 2)
+    runs = []
+    for _ in range(5):
+        while calc.undo():
+            pass
+        runs.append(measure(calc.redo, number=200, repeat=1))
+    return statistics.median(runs)
+
+
+@benchmark("save_history")
+def _save(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    return measure(calc.save_history, repeat=3)
+
+
+@benchmark("load_history")
+def _load(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    calc.save_history()
+    return measure(calc.load_history, repeat=3)
+
+
+@benchmark("get_history_dataframe")
+def _dataframe(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    return measure(calc.get_history_dataframe, repeat=3)
+
+
+@benchmark("summary")
+def _summary(tmp: Path, n: int) -> float:
+    calc = filled(tmp, n)
+    return measure(calc.summary, number=100)
+
+
+def _observed(tmp: Path, n: int, observer, number: int, **cfg) -> float:
+    calc = filled(tmp, n, **cfg)
+    calc.add_observer(observer)
+    it = iter(range(10**9))
+    try:
+        return measure(lambda: calc.perform("add", next(it), 1), number=number, repeat=3)
+    finally:
+        calc.close()
+
+
+@benchmark("observer_logging")
+def _observer_logging(tmp: Path, n: int) -> float:
+    return _observed(tmp, n, LoggingObserver(), 500)
+
+
+@benchmark("observer_journal")
+def _observer_journal(tmp: Path, n: int) -> float:
+    return _observed(tmp, n, JournalObserver(), 500, auto_save_mode="journal")
+
+
+# rewrites the whole history per calculation, so keep it to sizes that finish
+@benchmark("observer_autosave", max_size=10**5)
+def _observer_autosave(tmp: Path, n: int) -> float:
+    return _observed(tmp, n, AutoSaveObserver(), 5)
+
+
+# ---- runner
+
+def run(sizes: List[int], names: Optional[List[str]] = None, log=print) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names or list(CASES):
+            fn, max_size = CASES[name]
+            for n in sizes:
+                if n > max_size:
+                    continue
+                workdir = Path(tmp) / f"{name}-{n}"
+                workdir.mkdir()
+                results[f"{name}@{n}"] = secs = fn(workdir, n)
+                log(f"{name + '@' + str(n):>32} {secs * 1e6:>14.2f} us")
+    return results
+
+
+def write_results(results: Dict[str, float], path: Path) -> None:
+    doc = {
+        "meta": {
+            "created": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: Path) -> Dict[str, float]:
+    return json.loads(Path(path).read_text())["results"]
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Metrics present in both that are more than threshold percent slower than the baseline."""
+    limit = 1 + threshold / 100
+    return [
+        f"{key}: {results[key] * 1e6:.2f} us vs baseline {baseline[key] * 1e6:.2f} us "
+        f"(+{(results[key] / baseline[key] - 1) * 100:.0f}%)"
+        for key in sorted(results.keys() & baseline.keys())
+        if baseline[key] > 0 and results[key] > baseline[key] * limit
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="run only these metrics")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown in percent before a metric counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to --baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.only)
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, load_results(args.baseline), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    print(f"{len(regressions)} regressions beyond {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+pytest entry point for the regression suite (not part of the default `pytest` run):
+
+    pytest benchmarks --no-cov
+    BENCH_SIZES=100,1000,10000 BENCH_THRESHOLD=30 pytest benchmarks --no-cov
+
+BENCH_OUTPUT names the JSON results file and BENCH_BASELINE the baseline.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks import suite
+
+SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "100,1000,10000").split(",")]
+THRESHOLD = float(os.getenv("BENCH_THRESHOLD", suite.DEFAULT_THRESHOLD))
+BASELINE = Path(os.getenv("BENCH_BASELINE", suite.DEFAULT_BASELINE))
+OUTPUT = Path(os.getenv("BENCH_OUTPUT", suite.DEFAULT_OUTPUT))
+
+
+@pytest.fixture(scope="module")
+def results():
+    res = suite.run(SIZES, log=lambda *_: None)
+    suite.write_results(res, OUTPUT)
+    return res
+
+
+def test_every_case_ran(results):
+    expected = {f"{name}@{n}" for name, (_, cap) in suite.CASES.items() for n in SIZES if n <= cap}
+    assert set(results) == expected
+    assert all(secs > 0 for secs in results.values())
+
+
+def test_no_regressions(results):
+    if not BASELINE.exists():
+        pytest.skip(f"no baseline at {BASELINE}; record one with python -m benchmarks.suite --save-baseline")
+    regressions = suite.compare(results, suite.load_results(BASELINE), THRESHOLD)
+    assert not regressions, "\n".join(regressions)
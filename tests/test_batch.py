@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+from app.batch import BatchSummary, read_commands, run_batch
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import JournalObserver
+
+@pytest.fixture
+def calc(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path))
+    yield c
+    c.close()
+
+SCRIPT = """\
+# comment
+add 2 3
+
+multiply 4 5
+divide 1 0
+(1 + 2) * ans
+undo
+redo
+clear
+"""
+
+def test_read_commands_skips_blanks_and_stops_at_exit():
+    assert list(read_commands(["add 1 2\n", "  \n", "# x\n", "exit\n", "add 3 4\n"])) == [(1, "add 1 2")]
+
+def test_csv_output_and_summary(calc):
+    out = io.StringIO()
+    summary = run_batch(calc, io.StringIO(SCRIPT), out, checkpoint_every=2)
+    rows = out.getvalue().splitlines()
+    assert rows[0] == "line,command,result,error"
+    assert rows[1] == "2,add 2 3,5,"
+    assert rows[3].startswith("5,divide 1 0,,")
+    assert rows[4] == "6,(1 + 2) * ans,60,"
+    assert rows[5:] == ["7,undo,True,", "8,redo,True,", "9,clear,,"]
+    assert (summary.lines, summary.errors, summary.checkpoints) == (7, 1, 4)
+    assert "7 commands" in str(summary)
+    # the final checkpoint wrote the (cleared) history
+    assert calc.config.history_file.exists()
+
+def test_jsonl_output_and_fail_fast(calc):
+    out = io.StringIO()
+    summary = run_batch(calc, io.StringIO(SCRIPT), out, fmt="jsonl", fail_fast=True)
+    recs = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert recs[0] == {"line": 2, "command": "add 2 3", "result": "5"}
+    assert recs[-1]["line"] == 5 and "error" in recs[-1]
+    assert summary.lines == 3 and summary.errors == 1
+    # only the successful lines were checkpointed
+    saved = calc.storage.read(calc.config.history_file)
+    assert [c.result for chunk in saved for c in chunk] == [5, 20]
+
+def test_checkpoints_flush_the_journal(tmp_path):
+    cfg = CalculatorConfig(base_dir=tmp_path, auto_save_mode="journal", journal_flush_every=1000)
+    calc = Calculator(cfg)
+    calc.add_observer(JournalObserver())
+    run_batch(calc, io.StringIO("add 1 1\nadd 2 2\nadd 3 3\n"), io.StringIO(), checkpoint_every=2)
+    assert len(cfg.journal_file.read_text().splitlines()) == 3
+    assert not cfg.history_file.exists()
+    calc.close()
+
+def test_unknown_output_format(calc):
+    with pytest.raises(ValueError):
+        run_batch(calc, [], io.StringIO(), fmt="xml")
+
+def test_empty_summary_throughput():
+    assert BatchSummary().throughput == 0.0
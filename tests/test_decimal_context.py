@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, getcontext
+import threading
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError
+
+def _calc(tmp_path, **kw):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, **kw))
+
+def test_calculators_with_different_precision_coexist(tmp_path):
+    before = getcontext().prec
+    low, high = _calc(tmp_path, precision=5), _calc(tmp_path, precision=30)
+    assert low.perform("divide", 1, 3) == Decimal("0.33333")
+    assert high.perform("divide", 1, 3) == Decimal("0." + "3" * 30)
+    assert low.evaluate("1 / 3") == Decimal("0.33333")
+    assert low.perform_many("divide", [2], [3]) == [Decimal("0.66667")]
+    assert getcontext().prec == before
+
+def test_failing_root_leaves_context_alone(tmp_path):
+    calc = _calc(tmp_path, precision=12)
+    before = getcontext().prec
+    with pytest.raises(OperationError):
+        calc.perform("root", -8, 2)
+    assert getcontext().prec == before and calc.context.prec == 12
+    assert calc.perform("divide", 2, 3) == Decimal("0.666666666667")
+
+def test_threads_with_own_calculators(tmp_path):
+    calcs = {p: _calc(tmp_path, precision=p) for p in (4, 8, 16)}
+    def work(p):
+        return {calcs[p].perform("root", 2, 2) for _ in range(200)}
+    with ThreadPoolExecutor(6) as pool:
+        results = dict(zip((4, 8, 16), pool.map(work, (4, 8, 16))))
+    # one distinct value each, correctly rounded to the calculator's precision
+    assert [len(str(next(iter(r))).replace(".", "")) for r in results.values()] == [4, 8, 16]
+
+def test_thread_safe_mode_shares_one_calculator(tmp_path):
+    calc = _calc(tmp_path, thread_safe=True, max_history_size=5000, max_undo_depth=5000, cache_size=16)
+    assert isinstance(calc._lock, type(threading.RLock()))
+    def work(t):
+        for i in range(250):
+            calc.perform("add", t, i)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(8)))
+    assert len(calc.history) == 2000 and len(calc.undo_stack) == 2000
+    assert sum(c.result for c in calc.history) == sum(t + i for t in range(8) for i in range(250))
+    stats = calc.cache_stats()
+    assert stats["hits"] + stats["misses"] == 2000
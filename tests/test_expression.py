@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.expression import CALL, PUSH, compile_expression, tokenize
+
+@pytest.fixture
+def calc(tmp_path):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, precision=28))
+
+@pytest.mark.parametrize("expr,expected", [
+    ("(3 + 4) * 2 ^ 5 % 7", Decimal(0)),
+    ("2 ^ 3 ^ 2", Decimal(512)),
+    ("-2 ^ 2", Decimal(-4)),
+    ("2 ^ -1", Decimal("0.5")),
+    ("7 // 2 + 10 % 4", Decimal(5)),
+    ("root(9, 2) + abs_diff(5, 9)", Decimal(7)),
+    ("+1 - -1", Decimal(2)),
+    (".5e1 * 2.", Decimal(10)),
+    ("percent(50, 200)", Decimal(25)),
+])
+def test_evaluate_values(calc, expr, expected):
+    assert calc.evaluate(expr) == expected
+
+def test_one_history_entry_per_expression(calc):
+    calc.evaluate("(3+4)*2^5%7")
+    assert len(calc.history) == 1 and len(calc.undo_stack) == 1
+    entry = calc.history[0]
+    assert entry.operation == "(3 + 4) * 2 ^ 5 % 7"
+    assert (entry.operand1, entry.operand2, entry.result) == (224, 7, 0)
+    calc.evaluate("-(1 + 2)")
+    assert (calc.history[1].operand1, calc.history[1].operand2) == (-3, 0)
+
+def test_variables_and_ans(calc):
+    calc.perform("add", 2, 3)
+    assert calc.evaluate("ans * 2") == 10
+    assert calc.evaluate("x * 2 + y", x=4, y="0.5") == Decimal("8.5")
+    with pytest.raises(ValidationError, match="Unbound"):
+        calc.evaluate("x + z", x=1)
+    with pytest.raises(ValidationError, match="out of bounds"):
+        calc.evaluate("x + 1", x=10**13)
+    with pytest.raises(ValidationError, match="out of bounds"):
+        calc.evaluate("1e13 + 1")
+
+@pytest.mark.parametrize("src", ["(2 ^ 1e1000000) + 1", "(2 ^ 1e10000000) + 1", "(2 ^ 13) ^ 1e13"])
+def test_oversized_literals_rejected_before_folding(calc, src):
+    with pytest.raises(ValidationError, match="out of bounds"):
+        calc.evaluate(src)
+    with pytest.raises(ValidationError, match="out of bounds"):
+        compile_expression(src, 28, "ROUND_HALF_EVEN", emax=100_000, limit=Decimal("1e12"))
+
+def test_ans_on_empty_history(calc):
+    assert calc.evaluate("ans + 1") == 1
+
+def test_plans_are_cached_and_folded():
+    compile_expression.cache_clear()
+    plan = compile_expression("x * (2 + 3)", 28, "ROUND_HALF_EVEN")
+    assert compile_expression("x * (2 + 3)", 28, "ROUND_HALF_EVEN") is plan
+    assert compile_expression.cache_info().hits == 1
+    assert plan.code[1] == (PUSH, Decimal(5))
+    assert plan.code[-1][0] == CALL and plan.names == {"x"}
+    # division by zero is not folded away; it fails when run
+    assert len(compile_expression("1 / 0 + 1", 28, "ROUND_HALF_EVEN").code) == 5
+
+def test_runtime_errors(calc):
+    with pytest.raises(OperationError):
+        calc.evaluate("1 / 0 + 1")
+    assert len(calc.history) == 0
+
+@pytest.mark.parametrize("bad", ["", "1 +", "(1 + 2", "1 2", "foo(1, 2)", "1 $ 2", ")", "root(1)"])
+def test_syntax_errors(calc, bad):
+    with pytest.raises(ValidationError):
+        calc.evaluate(bad)
+
+def test_tokenize():
+    assert tokenize("a//2") == [("name", "a"), ("sym", "//"), ("num", "2")]
+
+@pytest.mark.parametrize("src,canon", [
+    ("(2^3)^2", "(2 ^ 3) ^ 2"),
+    ("(-2)^2", "(-2) ^ 2"),
+    ("1-(2-3)", "1 - (2 - 3)"),
+    ("-(a*b)", "-(a * b)"),
+    ("ADD(1,2)*3", "(1 + 2) * 3"),
+    ("ROOT(x,2)", "root(x, 2)"),
+])
+def test_canonical_text(src, canon):
+    assert compile_expression(src, 28, "ROUND_HALF_EVEN").source == canon
@@ -0,0 +1,86 @@
+from decimal import Decimal, localcontext
+from fractions import Fraction
+import random
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+
+def _calc(tmp_path, **cfg):
+    cfg.setdefault("auto_save", False)
+    return Calculator(CalculatorConfig(base_dir=tmp_path, **cfg))
+
+def _expected(calc):
+    """summary() computed from scratch over the current history."""
+    groups = {}
+    for c in calc.history:
+        groups.setdefault(c.operation.lower(), []).append(c.result)
+    out = {}
+    for op, rs in sorted(groups.items()):
+        if isinstance(rs[0], Fraction):
+            total, mean = sum(rs), sum(rs) / len(rs)
+        else:
+            with localcontext() as ctx:
+                ctx.prec = 200
+                exact = sum(Decimal(r) for r in rs)
+            total, mean = calc.context.plus(exact), calc.context.divide(exact, len(rs))
+            if isinstance(rs[0], float):
+                total, mean = float(total), float(mean)
+        out[op] = {"count": len(rs), "sum": total, "min": min(rs), "max": max(rs), "mean": mean}
+    return out
+
+@pytest.mark.parametrize("backend", ["decimal", "float", "fraction"])
+def test_summary_tracks_eviction_undo_redo_clear_and_load(tmp_path, backend):
+    calc = _calc(tmp_path, max_history_size=12, numeric_backend=backend)
+    rng = random.Random(3)
+    for step in range(400):
+        action = rng.random()
+        if action < 0.6:
+            calc.perform(rng.choice(["add", "ADD", "divide", "multiply"]), rng.randint(-50, 50), rng.randint(1, 9))
+        elif action < 0.65:
+            calc.perform_many("subtract", [rng.randint(-9, 9) for _ in range(5)], [1] * 5)
+        elif action < 0.8:
+            calc.undo()
+        elif action < 0.95:
+            calc.redo()
+        elif action < 0.97:
+            calc.clear()
+        else:
+            calc.save_history()
+            calc.load_history()
+        assert calc.summary() == _expected(calc), step
+
+def test_summary_for_one_operation(tmp_path):
+    calc = _calc(tmp_path, precision=4)
+    calc.perform("divide", 1, 3)
+    calc.perform("divide", 2, 3)
+    calc.perform("add", 1, 1)
+    assert calc.summary("DIVIDE") == {"divide": {
+        "count": 2, "sum": Decimal("1.000"), "min": Decimal("0.3333"),
+        "max": Decimal("0.6667"), "mean": Decimal("0.5000"),
+    }}
+    assert calc.summary("power") == {}
+    calc.clear()
+    assert calc.summary() == {}
+
+def test_sums_do_not_drift_when_entries_leave(tmp_path):
+    calc = _calc(tmp_path, max_history_size=2, precision=3)
+    calc.perform("add", "1e9", 0)
+    calc.perform("add", "0.001", 0)
+    calc.perform("add", "0.002", 0)  # evicts 1e9
+    assert calc.summary()["add"]["sum"] == Decimal("0.003")
+
+def test_float_infinities_survive_eviction_and_undo(tmp_path):
+    calc = _calc(tmp_path, max_history_size=2, numeric_backend="float")
+    calc.perform("divide", 1e12, 5e-324)
+    calc.perform("divide", -1e12, 5e-324)
+    assert all(v != v for k, v in calc.summary()["divide"].items() if k in ("sum", "mean"))
+    calc.perform("divide", 6, 3)  # evicts +inf
+    assert calc.summary()["divide"]["sum"] == float("-inf")
+    calc.undo()
+    calc.undo()
+    assert calc.summary()["divide"]["sum"] == float("inf")
+    calc.perform("divide", 6, 3)
+    calc.perform("divide", 9, 3)  # evicts +inf again
+    assert calc.summary() == _expected(calc)
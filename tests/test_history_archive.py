@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, UTC
+from decimal import Decimal
+import random
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history_archive import HistoryArchive
+from app.history_storage import storage_for_path
+
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+def _calc(op, i, minutes=None):
+    ts = T0 + timedelta(minutes=i if minutes is None else minutes)
+    return Calculation(op, Decimal(i), Decimal(1), Decimal(i) + 1, ts)
+
+def _brute(rows, op=None, since=None, until=None, result_range=None, limit=None, offset=0, newest_first=False):
+    rows = [
+        c for c in rows
+        if (op is None or c.operation.lower() == op.lower())
+        and (since is None or c.timestamp >= since)
+        and (until is None or c.timestamp < until)
+        and (result_range is None or result_range[0] <= c.result <= result_range[1])
+    ]
+    if newest_first:
+        rows.reverse()
+    return rows[offset:None if limit is None else offset + limit]
+
+def _calculator(tmp_path, size=4):
+    return Calculator(CalculatorConfig(
+        base_dir=tmp_path, max_history_size=size, auto_save=False, history_archive=True,
+    ))
+
+def test_archive_round_trips_rows_and_survives_reopen(tmp_path):
+    archive = HistoryArchive(tmp_path)
+    rows = [_calc("add", 0), _calc("Multiply", 1), Calculation(
+        "add", Decimal("-1.5"), Decimal("2E+3"), Decimal("1998.5"), datetime(2026, 1, 2, 3, 4, 5, 6),
+    )]
+    archive.extend(rows)
+    assert list(archive.matches()) == rows
+    assert list(archive.matches("ADD", newest_first=True)) == [rows[2], rows[0]]
+    assert list(archive.matches("divide")) == []
+    archive.close()
+
+    again = HistoryArchive(tmp_path)
+    assert len(again) == 3 and list(again.matches()) == rows
+    again.append(_calc("add", 3))
+    assert [c.result for c in again.matches(skip=2)] == [Decimal("1998.5"), 4]
+    again.close()
+
+def test_archive_queries_match_brute_force(tmp_path):
+    rng = random.Random(3)
+    for ordered in (True, False):
+        archive = HistoryArchive(tmp_path / str(ordered))
+        rows = [
+            _calc(rng.choice(["add", "Add", "power"]), i, i if ordered else rng.randrange(300))
+            for i in range(300)
+        ]
+        archive.extend(rows)
+        assert archive.ordered is ordered
+        for _ in range(40):
+            q = {
+                "op": rng.choice([None, "add", "power"]),
+                "since": rng.choice([None, T0 + timedelta(minutes=rng.randrange(300))]),
+                "until": rng.choice([None, T0 + timedelta(minutes=rng.randrange(300))]),
+                "result_range": rng.choice([None, (Decimal(50), Decimal(150))]),
+                "newest_first": rng.random() < 0.5,
+            }
+            skip = rng.choice([0, 5, 400])
+            expected = _brute(rows, **q)
+            it = archive.matches(**q, skip=skip)
+            got = []
+            try:
+                while True:
+                    got.append(next(it))
+            except StopIteration as stop:
+                skipped = stop.value
+            assert got == expected[skip:], q
+            assert skipped == min(skip, len(expected))
+        archive.close()
+
+def test_evicted_history_spills_to_archive(tmp_path):
+    calc = _calculator(tmp_path)
+    for i in range(10):
+        calc.perform("add" if i % 2 else "multiply", i, 1)
+    assert len(calc.history) == 4 and len(calc.archive) == 6
+    everything = calc.query_history(include_archive=True)
+    assert [c.operand1 for c in everything] == list(range(10))
+    assert calc.query_history() == calc.history[:]
+
+    q = {"op": "add", "newest_first": True, "include_archive": True}
+    assert [c.operand1 for c in calc.query_history(**q)] == [9, 7, 5, 3, 1]
+    assert [c.operand1 for c in calc.query_history(**q, offset=3, limit=2)] == [3, 1]
+    assert [c.operand1 for c in calc.query_history(include_archive=True, offset=5, limit=3)] == [5, 6, 7]
+    assert [c.operand1 for c in calc.query_history(include_archive=True, offset=8)] == [8, 9]
+    since = T0.replace(year=2000)
+    assert len(calc.query_history(since=since, include_archive=True)) == 10
+    assert len(calc.get_history_dataframe(include_archive=True)) == 10
+    calc.close()
+
+    reopened = _calculator(tmp_path)
+    assert [c.operand1 for c in reopened.query_history(include_archive=True)] == list(range(6))
+    reopened.close()
+
+def test_undo_redo_keep_archive_in_step(tmp_path):
+    calc = _calculator(tmp_path, size=3)
+    for i in range(5):
+        calc.perform("add", i, 1)
+    calc.perform_many("add", list(range(10, 17)), [1] * 7)
+    window = calc.history[:]
+
+    def operands():
+        return [c.operand1 for c in calc.query_history(include_archive=True)]
+
+    assert operands() == [0, 1, 2, 3, 4] + list(range(10, 17))
+    calc.undo()  # the batch, four entries of which went straight to the archive
+    assert operands() == [0, 1, 2, 3, 4] and len(calc.archive) == 2
+    calc.undo()
+    calc.undo()
+    assert operands() == [0, 1, 2] and len(calc.archive) == 0
+    calc.redo()
+    calc.redo()
+    calc.redo()
+    assert calc.history[:] == window
+    assert operands() == [0, 1, 2, 3, 4] + list(range(10, 17))
+    calc.close()
+
+def test_export_history_streams_archive_and_window(tmp_path):
+    calc = _calculator(tmp_path)
+    for i in range(9):
+        calc.perform("subtract", i, 1)
+    for name in ("out.csv", "out.bin"):
+        path = calc.export_history(tmp_path / name)
+        rows = [c for chunk in storage_for_path(path).read(path) for c in chunk]
+        assert [c.operand1 for c in rows] == list(range(9))
+    calc.close()
@@ -0,0 +1,105 @@
+from collections import deque
+import random
+
+import pytest
+
+from app.calculation import Calculation
+from app.history_buffer import HistoryBuffer
+
+def test_append_evicts_oldest_and_wraps():
+    buf = HistoryBuffer(3)
+    assert [buf.append(i) for i in range(5)] == [None, None, None, 0, 1]
+    assert list(buf) == [2, 3, 4]
+    assert list(reversed(buf)) == [4, 3, 2]
+    assert buf == [2, 3, 4]
+    assert buf[0] == 2 and buf[-1] == 4
+    assert buf[1:] == [3, 4]
+    assert buf[::-1] == [4, 3, 2]
+    assert buf.copy() == [2, 3, 4]
+    with pytest.raises(IndexError):
+        buf[3]
+
+def test_pop_appendleft_and_clear():
+    buf = HistoryBuffer(2, [1, 2, 3])
+    assert buf == [2, 3] and buf.capacity == 2
+    with pytest.raises(IndexError):
+        buf.appendleft(0)
+    assert buf.pop() == 3
+    buf.appendleft(1)
+    assert buf == [1, 2]
+    assert buf.popleft() == 1
+    assert buf.extend([7, 8]) == [2]
+    buf.clear()
+    assert len(buf) == 0 and not buf
+    with pytest.raises(IndexError):
+        buf.pop()
+    with pytest.raises(IndexError):
+        buf.popleft()
+    assert "capacity=2" in repr(buf)
+    assert (buf == 5) is False
+
+def test_slots_grow_lazily_and_clear_releases_them():
+    buf = HistoryBuffer(1_000_000)
+    assert len(buf._items) == 0
+    buf.extend(range(20))
+    assert 20 <= len(buf._items) <= 40
+    buf.clear()
+    assert buf._items == [] and buf.first_seq == 20
+    buf.append(1)
+    assert buf == [1] and buf.first_seq == 20
+
+@pytest.mark.parametrize("capacity", [1, 5, 8, 13])
+def test_matches_a_bounded_deque(capacity):
+    rng = random.Random(capacity)
+    buf, model = HistoryBuffer(capacity, range(rng.randint(0, 2 * capacity))), deque(maxlen=capacity)
+    model.extend(range(len(buf._items) + buf.first_seq))
+    for step in range(2_000):
+        action = rng.random()
+        if action < 0.5:
+            buf.append(step)
+            model.append(step)
+        elif action < 0.65 and len(model) < capacity:
+            buf.appendleft(-step)
+            model.appendleft(-step)
+        elif action < 0.8 and model:
+            assert buf.pop() == model.pop()
+        elif action < 0.95 and model:
+            assert buf.popleft() == model.popleft()
+        elif action >= 0.99:
+            buf.clear()
+            model.clear()
+        assert list(buf) == list(model) and len(buf._items) <= capacity, step
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        HistoryBuffer(0)
+
+def test_calculation_is_slotted():
+    assert not hasattr(Calculation.__new__(Calculation), "__dict__")
+
+def test_sequence_numbers_and_listeners():
+    events = []
+
+    class Recorder:
+        def on_append(self, seq, calc): events.append(("append", seq, calc))
+        def on_appendleft(self, seq, calc): events.append(("appendleft", seq, calc))
+        def on_pop(self, seq, calc): events.append(("pop", seq, calc))
+        def on_popleft(self, seq, calc): events.append(("popleft", seq, calc))
+        def on_clear(self): events.append(("clear",))
+
+    buf = HistoryBuffer(2)
+    rec = Recorder()
+    buf.add_listener(rec)
+    buf.extend("abc")
+    assert buf.first_seq == 1
+    buf.pop()
+    buf.appendleft("a")
+    buf.clear()
+    assert buf.first_seq == 2
+    assert events == [
+        ("append", 0, "a"), ("append", 1, "b"), ("popleft", 0, "a"), ("append", 2, "c"),
+        ("pop", 2, "c"), ("appendleft", 0, "a"), ("clear",),
+    ]
+    buf.remove_listener(rec)
+    buf.append("d")
+    assert len(events) == 7
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, UTC
+from decimal import Decimal
+import random
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+from app.history_buffer import HistoryBuffer
+from app.history_index import HistoryIndex
+
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+def _calc(op, i, minutes=None):
+    ts = T0 + timedelta(minutes=i if minutes is None else minutes)
+    return Calculation(op, Decimal(i), Decimal(1), Decimal(i), ts)
+
+def _brute(history, op=None, since=None, until=None, result_range=None, limit=None, offset=0, newest_first=False):
+    rows = [
+        c for c in history
+        if (op is None or c.operation.lower() == op.lower())
+        and (since is None or c.timestamp >= since)
+        and (until is None or c.timestamp < until)
+        and (result_range is None or result_range[0] <= c.result <= result_range[1])
+    ]
+    if newest_first:
+        rows.reverse()
+    return rows[offset:None if limit is None else offset + limit]
+
+def _check(history, index, rng):
+    for _ in range(5):
+        q = {
+            "op": rng.choice([None, "add", "ADD", "multiply", "power"]),
+            "since": rng.choice([None, T0 + timedelta(minutes=rng.randrange(200))]),
+            "until": rng.choice([None, T0 + timedelta(minutes=rng.randrange(200))]),
+            "result_range": rng.choice([None, (Decimal(20), Decimal(120))]),
+            "limit": rng.choice([None, 0, 3]),
+            "offset": rng.choice([0, 2]),
+            "newest_first": rng.random() < 0.5,
+        }
+        assert index.query(**q) == _brute(history, **q), q
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_index_matches_brute_force_through_mutations(ordered):
+    rng = random.Random(7)
+    buf = HistoryBuffer(16)
+    index = HistoryIndex(buf)
+    popped = []
+    for i in range(300):
+        minutes = i if ordered else rng.randrange(200)
+        action = rng.random()
+        if action < 0.6:
+            buf.append(_calc(rng.choice(["add", "Add", "multiply"]), i, minutes))
+        elif action < 0.75 and buf:
+            popped.append(buf.pop())
+        elif action < 0.85 and buf:
+            popped.append(buf.popleft())
+        elif action < 0.95 and popped and len(buf) < buf.capacity:
+            buf.appendleft(popped.pop())
+        elif action < 0.97:
+            buf.clear()
+        _check(buf, index, rng)
+        assert (index.inversions == 0) == all(a.timestamp <= b.timestamp for a, b in zip(buf, buf[1:]))
+
+def test_index_built_over_existing_entries():
+    buf = HistoryBuffer(5, [_calc("add", i) for i in range(8)])
+    index = HistoryIndex(buf)
+    assert buf.first_seq == 3
+    assert [c.result for c in index.query("add", since=T0 + timedelta(minutes=5))] == [5, 6, 7]
+    assert index.query("divide") == []
+
+def test_query_history_across_undo_redo_clear_and_load(tmp_path):
+    calc = Calculator(CalculatorConfig(base_dir=tmp_path, max_history_size=4, auto_save=False))
+    for i in range(6):
+        calc.perform("add" if i % 2 else "multiply", i, 1)
+    assert [c.operand1 for c in calc.query_history("ADD")] == [3, 5]
+    calc.undo()  # brings back the evicted add(1, 1)
+    assert [c.operand1 for c in calc.query_history("add")] == [1, 3]
+    assert [c.operand1 for c in calc.query_history("multiply")] == [2, 4]
+    calc.redo()
+    calc.perform_many("add", [10, 20], [1, 1])
+    assert [c.result for c in calc.query_history("add", newest_first=True, limit=2)] == [21, 11]
+    assert [c.result for c in calc.query_history(result_range=(6, None))] == [6, 11, 21]
+    assert calc.query_history(limit=1, offset=1)[0].result == 6
+
+    mid = calc.history[2].timestamp
+    assert calc.query_history(since=mid) == calc.history[2:]
+    assert calc.query_history(until=mid.isoformat()) == [c for c in calc.history if c.timestamp < mid]
+    naive = mid.replace(tzinfo=None).isoformat()
+    assert calc.query_history(since=naive) == calc.history[2:]
+
+    calc.save_history()
+    calc.clear()
+    assert calc.query_history() == [] and calc.query_history("add") == []
+    calc.load_history()
+    assert [c.result for c in calc.query_history("add")] == [6, 11, 21]
+
+def test_query_history_rejects_bad_arguments(tmp_path):
+    calc = Calculator(CalculatorConfig(base_dir=tmp_path, auto_save=False))
+    with pytest.raises(ValidationError):
+        calc.query_history(since="yesterday")
+    with pytest.raises(ValidationError):
+        calc.query_history(result_range=("x", 1))
+    with pytest.raises(ValidationError):
+        calc.query_history(result_range=(1,))
+    with pytest.raises(ValidationError):
+        calc.query_history(limit=-1)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+
+def _saved(tmp_path, n, **kw):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, max_history_size=1000, **kw))
+    c.perform_many("add", list(range(n)), [0] * n)
+    c.save_history()
+    return c
+
+def test_iter_history_streams_chunks(tmp_path):
+    c = _saved(tmp_path, 25)
+    chunks = list(c.iter_history(chunksize=10))
+    assert [len(ch) for ch in chunks] == [10, 10, 5]
+    flat = [x for ch in chunks for x in ch]
+    assert flat == list(c.history)
+    assert flat[0].timestamp.tzinfo is not None
+
+def test_load_history_keeps_only_tail(tmp_path):
+    c = _saved(tmp_path, 25)
+    small = Calculator(CalculatorConfig(base_dir=tmp_path, max_history_size=4))
+    small.load_history()
+    assert [x.result for x in small.history] == [21, 22, 23, 24]
+
+def test_load_history_keeps_exact_decimals(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, precision=30))
+    c.perform("divide", 1, 3)
+    c.perform("add", "0.1", "12345678901.123456789")
+    c.save_history()
+    c2 = Calculator(c.config)
+    c2.load_history()
+    assert [x.result for x in c2.history] == [x.result for x in c.history]
+    assert c2.history[1].operand2 == Decimal("12345678901.123456789")
+
+def test_iter_history_from_explicit_path(tmp_path):
+    c = _saved(tmp_path, 3)
+    other = tmp_path / "copy.csv"
+    other.write_bytes(c.config.history_file.read_bytes())
+    assert sum(map(len, c.iter_history(path=other))) == 3
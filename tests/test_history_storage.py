@@ -0,0 +1,73 @@
+from datetime import datetime, UTC
+from decimal import Decimal
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+from app.history_storage import (
+    BinaryHistoryStorage, convert_history, get_storage, storage_for_path,
+)
+
+def _calcs(n):
+    return [
+        Calculation("divide" if i % 2 else "add", Decimal(i), Decimal("3.000"),
+                    Decimal(1) / Decimal(3) + i, datetime(2024, 1, 1, 12, 0, i % 60, i, tzinfo=UTC))
+        for i in range(n)
+    ]
+
+def test_binary_round_trip_is_exact(tmp_path):
+    calcs = _calcs(7) + [
+        Calculation("power", Decimal("1E+3"), Decimal("-0"), Decimal("NaN"), datetime(1960, 5, 1, 3, 4, 5)),
+    ]
+    path = tmp_path / "h.bin"
+    storage = BinaryHistoryStorage()
+    storage.write(calcs, path)
+    chunks = list(storage.read(path, chunksize=3))
+    assert [len(c) for c in chunks] == [3, 3, 2]
+    back = [x for c in chunks for x in c]
+    assert [c.to_dict() for c in back] == [c.to_dict() for c in calcs]
+    assert back[-1].timestamp.tzinfo is None
+
+def test_binary_empty_history(tmp_path):
+    path = tmp_path / "h.bin"
+    BinaryHistoryStorage().write([], path)
+    assert list(BinaryHistoryStorage().read(path)) == []
+
+def test_binary_rejects_foreign_files(tmp_path):
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"not a history file at all")
+    with pytest.raises(ValueError):
+        list(BinaryHistoryStorage().read(bad))
+    bad.write_bytes(b"")
+    with pytest.raises(ValueError):
+        list(BinaryHistoryStorage().read(bad))
+
+def test_calculator_uses_configured_format(tmp_path):
+    cfg = CalculatorConfig(base_dir=tmp_path, history_format="binary")
+    assert cfg.history_file.suffix == ".bin"
+    c = Calculator(cfg)
+    c.add_observer(AutoSaveObserver())
+    c.perform("divide", 2, 3)
+    assert (cfg.history_dir / "calculator_history.bin").exists()
+    c.save_history()
+    c2 = Calculator(cfg)
+    c2.load_history()
+    assert list(c2.history) == list(c.history)
+
+def test_convert_between_formats(tmp_path):
+    calcs = _calcs(5)
+    get_storage("csv").write(calcs, tmp_path / "a.csv")
+    assert convert_history(tmp_path / "a.csv", tmp_path / "b.bin") == 5
+    assert convert_history(tmp_path / "b.bin", tmp_path / "c.csv", chunksize=2) == 5
+    back = [x for c in get_storage("csv").read(tmp_path / "c.csv") for x in c]
+    assert back == calcs
+
+def test_unknown_formats(tmp_path):
+    with pytest.raises(ValueError):
+        get_storage("xml")
+    with pytest.raises(ValueError):
+        storage_for_path(tmp_path / "h.txt")
+    assert CalculatorConfig(base_dir=tmp_path, history_format="xml").history_format == "csv"
@@ -47,3 +47,33 @@ def test_save_and_load_history(temp_calc, tmp_path):
     c2.load_history()
     df2 = c2.get_history_dataframe()
     assert len(df2.index) >= 2  # allow prior history lines too depending on your implementation
+
+def test_undo_redo_restores_evicted_entries(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, max_history_size=2))
+    for i in range(3):
+        c.perform("add", i, 0)
+    assert [x.result for x in c.history] == [1, 2]
+    assert c.undo() is True
+    assert [x.result for x in c.history] == [0, 1]
+    assert c.redo() is True
+    assert [x.result for x in c.history] == [1, 2]
+    assert c.redo() is False
+
+def test_mementos_store_deltas_and_depth_is_bounded(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, max_undo_depth=3))
+    for i in range(5):
+        c.perform("add", i, 1)
+    assert len(c.undo_stack) == 3
+    assert all(len(m.appended) == 1 and not m.evicted for m in c.undo_stack)
+    while c.undo():
+        pass
+    assert [x.result for x in c.history] == [1, 2]
+    # a new calculation drops the redo branch
+    c.perform("add", 0, 0)
+    assert c.redo() is False
+
+def test_failed_operation_leaves_undo_stack_alone(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path))
+    with pytest.raises(Exception):
+        c.perform("divide", 1, 0)
+    assert c.undo() is False
@@ -0,0 +1,67 @@
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import LoggingObserver
+from app.instrumentation import BUCKETS, Histogram, format_stats
+
+@pytest.fixture
+def calc(tmp_path):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, instrumentation=True))
+
+def test_disabled_by_default(tmp_path):
+    calc = Calculator(CalculatorConfig(base_dir=tmp_path))
+    calc.perform("add", 1, 2)
+    assert calc.metrics is None and calc.stats() == {} and calc.write_metrics() is None
+
+def test_perform_phases_per_operation(calc):
+    calc.add_observer(LoggingObserver())
+    for i in range(5):
+        calc.perform("add", i, 1)
+    calc.perform("Divide", 1, 4)
+    with pytest.raises(Exception):
+        calc.perform("divide", 1, 0)
+    with pytest.raises(Exception):
+        calc.perform("bogus", 1, 0)
+    stats = calc.stats()["perform"]
+    assert stats["add"]["calls"] == 5 and stats["add"]["errors"] == 0
+    assert stats["divide"] == {**stats["divide"], "calls": 1, "errors": 1}
+    assert stats["unknown"]["errors"] == 1
+    phases = stats["add"]["phases"]
+    assert set(phases) == {"validate", "execute", "record", "notify", "total"}
+    assert phases["total"]["count"] == 5
+    assert 0 < phases["total"]["p50"] <= phases["total"]["p99"] <= phases["total"]["max"]
+
+def test_undo_redo_save_load(calc):
+    calc.perform("add", 1, 2)
+    calc.undo(); calc.redo(); calc.undo(); calc.undo()
+    calc.save_history()
+    calc.load_history()
+    stats = calc.stats()
+    assert stats["undo"]["all"]["calls"] == 2  # the no-op undo is not counted
+    assert stats["redo"]["all"]["calls"] == 1
+    assert set(stats["save_history"]["all"]["phases"]) == {"write", "notify", "total"}
+    assert set(stats["load_history"]["all"]["phases"]) == {"read", "swap", "total"}
+    lines = format_stats(stats)
+    assert any(line.startswith("perform add: 1 calls, 0 errors, p50") for line in lines)
+
+def test_prometheus_dump(calc, tmp_path):
+    calc.perform("multiply", 3, 4)
+    calc.close()  # writes config.metrics_file
+    text = calc.config.metrics_file.read_text()
+    assert '# TYPE calculator_phase_seconds histogram' in text
+    assert 'calculator_calls_total{method="perform",operation="multiply"} 1' in text
+    assert 'calculator_phase_seconds_bucket{method="perform",operation="multiply",phase="total",le="+Inf"} 1' in text
+    assert 'calculator_phase_seconds_count{method="perform",operation="multiply",phase="execute"} 1' in text
+    out = calc.write_metrics(tmp_path / "custom.prom")
+    assert out.read_text() == text
+
+def test_histogram_quantiles():
+    h = Histogram()
+    assert h.quantile(0.5) == 0.0
+    for _ in range(99):
+        h.observe(2_000)  # 2us
+    h.observe(20 * 10**9)  # beyond the last bucket
+    assert BUCKETS[3] < h.quantile(0.5) <= BUCKETS[4]
+    assert h.quantile(1.0) == 20.0
+    assert h.summary()["count"] == 100
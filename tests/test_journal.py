@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import JournalObserver
+
+def _calc(tmp_path, **kw):
+    cfg = CalculatorConfig(base_dir=tmp_path, auto_save_mode="journal", **kw)
+    c = Calculator(cfg)
+    obs = JournalObserver()
+    c.add_observer(obs)
+    return c, obs
+
+def _reloaded(c):
+    c2 = Calculator(c.config)
+    c2.load_history()
+    return [(x.operation, x.result) for x in c2.history]
+
+def test_journal_replays_appends_undo_redo(tmp_path):
+    c, obs = _calc(tmp_path, journal_flush_every=2)
+    c.perform("add", 1, 2)
+    c.perform("multiply", 3, 4)
+    c.perform("subtract", 9, 1)
+    c.undo(); c.undo(); c.redo()
+    obs.flush()
+    assert c.config.journal_file.exists()
+    assert not c.config.history_file.exists()
+    assert _reloaded(c) == [(x.operation, x.result) for x in c.history]
+
+def test_journal_undo_restores_evicted_head(tmp_path):
+    c, obs = _calc(tmp_path, max_history_size=2)
+    for i in range(3):
+        c.perform("add", i, 0)
+    c.undo()
+    obs.flush()
+    assert [x.result for x in c.history] == [0, 1]
+    assert _reloaded(c) == [("add", 0), ("add", 1)]
+
+def test_journal_clear_and_save(tmp_path):
+    c, obs = _calc(tmp_path)
+    c.perform("add", 1, 1)
+    c.clear()
+    c.perform("add", 2, 2)
+    obs.flush()
+    assert _reloaded(c) == [("add", 4)]
+    c.save_history()
+    assert not c.config.journal_file.exists()
+    assert _reloaded(c) == [("add", 4)]
+
+def test_journal_background_compaction(tmp_path):
+    c, obs = _calc(tmp_path, journal_flush_every=3, journal_compact_every=5)
+    for i in range(12):
+        c.perform("add", i, 1)
+    obs.flush()
+    assert c.config.history_file.exists()
+    lines = c.config.journal_file.read_text().splitlines()
+    assert len(lines) == 2
+    assert _reloaded(c) == [("add", i + 1) for i in range(12)]
+
+def test_journal_ignores_torn_tail(tmp_path):
+    c, obs = _calc(tmp_path)
+    c.perform("add", 1, 1)
+    obs.flush()
+    with open(c.config.journal_file, "a") as fh:
+        fh.write('{"event": "app')
+    assert _reloaded(c) == [("add", 2)]
+
+def test_journal_save_waits_for_compaction(tmp_path):
+    c, _ = _calc(tmp_path, max_history_size=1, journal_flush_every=1, journal_compact_every=2)
+    c.perform_many("add", [7, 8], [0, 0])
+    c.perform("add", 1, 0)
+    c.save_history()
+    c.close()
+    assert _reloaded(c) == [("add", 1)]
+
+@pytest.mark.parametrize("async_observers", [False, True])
+def test_journal_random_ops_reload_equal(tmp_path, async_observers):
+    rng = random.Random(1234)
+    for run in range(40):
+        c, _ = _calc(
+            tmp_path / f"{run}", max_history_size=rng.randint(1, 4), journal_flush_every=rng.randint(1, 3),
+            journal_compact_every=rng.randint(1, 4), async_observers=async_observers,
+        )
+        for _ in range(rng.randint(1, 25)):
+            op = rng.choice(["perform", "perform", "many", "undo", "redo", "clear", "save"])
+            if op == "perform":
+                c.perform("add", rng.randint(0, 99), 0)
+            elif op == "many":
+                c.perform_many("add", [rng.randint(0, 99) for _ in range(3)], [0, 0, 0])
+            elif op in ("undo", "redo"):
+                getattr(c, op)()
+            elif op == "clear":
+                c.clear()
+            else:
+                c.save_history()
+        c.close()
+        assert _reloaded(c) == [(x.operation, x.result) for x in c.history], run
+
+@pytest.mark.parametrize("mode", ["journal", "bogus"])
+def test_auto_save_mode_env(tmp_path, monkeypatch, mode):
+    monkeypatch.setenv("CALCULATOR_AUTO_SAVE_MODE", mode)
+    cfg = CalculatorConfig.from_env(tmp_path)
+    assert cfg.auto_save_mode == ("journal" if mode == "journal" else "snapshot")
+
+def test_journal_not_matching_the_snapshot(tmp_path):
+    c, obs = _calc(tmp_path)
+    c.perform_many("add", [1, 2, 3], [0, 0, 0])
+    c.undo()
+    obs.flush()
+    c.config.history_file.write_text("operation,operand1,operand2,result,timestamp\n")
+    c.config.journal_file.write_text(c.config.journal_file.read_text().split("\n", 3)[3])
+    with pytest.raises(ValueError, match=r"history.journal:1: journal undo does not match"):
+        Calculator(c.config).load_history()
+
+def test_journal_undo_beyond_a_smaller_history(tmp_path):
+    c, obs = _calc(tmp_path, max_history_size=5)
+    c.perform_many("add", [1, 2, 3], [0, 0, 0])
+    c.undo()
+    obs.flush()
+    with pytest.raises(ValueError, match="history.journal:4"):
+        Calculator(CalculatorConfig(base_dir=tmp_path, auto_save_mode="journal", max_history_size=2)).load_history()
@@ -0,0 +1,82 @@
+import json
+import logging
+from types import SimpleNamespace
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import LoggingObserver
+from app.logger import get_logger
+
+class _ListLogger:
+    def __init__(self):
+        self.records = []
+    def info(self, msg, *args, **kw):
+        self.records.append(msg % args)
+
+def _fake_calculator(**cfg):
+    config = SimpleNamespace(log_sample_every=1, log_rate_limit=0.0, **cfg)
+    return SimpleNamespace(config=config, logger=_ListLogger())
+
+def test_json_lines_through_queue_listener(tmp_path):
+    logger = get_logger(tmp_path, fmt="json", use_queue=True, name="calculator.test.json")
+    c = Calculator(CalculatorConfig(base_dir=tmp_path))
+    c.logger = logger
+    c.add_observer(LoggingObserver())
+    c.perform("add", 2, 3)
+    logger.listener.stop()
+    lines = [json.loads(x) for x in (tmp_path / "calculator.log").read_text().splitlines()]
+    calc_line = [x for x in lines if x.get("operation") == "add"][0]
+    assert calc_line["result"] == "5" and calc_line["level"] == "INFO"
+    assert calc_line["msg"] == "Calculated add(2, 3) = 5"
+
+def test_json_formatter_includes_exceptions(tmp_path):
+    logger = get_logger(tmp_path, fmt="json", name="calculator.test.exc")
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        logger.exception("failed")
+    logger.handlers[0].flush()
+    rec = json.loads((tmp_path / "calculator.log").read_text())
+    assert "ValueError: bad" in rec["exc"]
+
+def test_log_rotation_by_size(tmp_path):
+    logger = get_logger(tmp_path, max_bytes=200, backup_count=2, name="calculator.test.rotate")
+    for i in range(50):
+        logger.info("line %d with some padding to fill the file", i)
+    logger.handlers[0].close()
+    assert (tmp_path / "calculator.log.1").exists()
+    assert not (tmp_path / "calculator.log.3").exists()
+
+def test_sampling_keeps_one_in_n():
+    calc = _fake_calculator()
+    calc.config.log_sample_every = 3
+    obs = LoggingObserver()
+    c = SimpleNamespace(operation="add", operand1=1, operand2=1, result=2)
+    for _ in range(7):
+        obs.update(calc, c)
+    assert len(calc.logger.records) == 3
+    assert obs.suppressed == 4
+
+def test_rate_limit_token_bucket(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.history.time.monotonic", lambda: clock[0])
+    calc = _fake_calculator()
+    calc.config.log_rate_limit = 2.0
+    obs = LoggingObserver()
+    c = SimpleNamespace(operation="add", operand1=1, operand2=1, result=2)
+    for _ in range(5):
+        obs.update(calc, c)
+    assert len(calc.logger.records) == 2
+    clock[0] += 1.0
+    for _ in range(5):
+        obs.update(calc, c)
+    assert len(calc.logger.records) == 4
+    assert obs.suppressed == 6
+
+def test_logging_env_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("CALCULATOR_LOG_FORMAT", "json")
+    monkeypatch.setenv("CALCULATOR_LOG_MAX_BYTES", "1024")
+    monkeypatch.setenv("CALCULATOR_LOG_SAMPLE_EVERY", "0")
+    cfg = CalculatorConfig.from_env(tmp_path)
+    assert (cfg.log_format, cfg.log_max_bytes, cfg.log_sample_every) == ("json", 1024, 1)
+    assert CalculatorConfig(base_dir=tmp_path, log_format="xml").log_format == "text"
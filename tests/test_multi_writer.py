@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+from app.history_segments import history_lock, read_segments, segment_paths
+from benchmarks.bench_multi_writer import stress
+
+def _config(tmp_path, **kw):
+    kw.setdefault("max_history_size", 100)
+    return CalculatorConfig(base_dir=tmp_path, multi_writer=True, auto_save=False, **kw)
+
+def _operands(calc):
+    return [int(c.operand1) for c in calc.history]
+
+def test_writers_sharing_a_directory_keep_each_others_records(tmp_path):
+    a, b = Calculator(_config(tmp_path)), Calculator(_config(tmp_path))
+    for i in range(3):
+        a.perform("add", i, 0)
+        b.perform("add", 10 + i, 0)
+        a.save_history()
+        b.save_history()
+    assert a.save_history() == a.config.segment_dir  # nothing new to commit
+    assert len(segment_paths(a.config, a.storage)) == 6
+
+    fresh = Calculator(_config(tmp_path))
+    fresh.load_history()
+    assert _operands(fresh) == [0, 10, 1, 11, 2, 12]
+    # a loaded history counts as committed: saving again writes nothing
+    assert fresh.save_history() == fresh.config.segment_dir
+
+def test_commits_follow_eviction_undo_and_redo(tmp_path):
+    calc = Calculator(_config(tmp_path, max_history_size=2))
+    for i in range(4):
+        calc.perform("add", i, 0)  # 0 and 1 are evicted before the first commit
+    calc.save_history()
+    calc.undo()  # 3 stays committed...
+    calc.redo()  # ...so putting it back commits nothing new
+    calc.perform("add", 4, 0)
+    calc.undo()
+    calc.perform("add", 5, 0)  # replaces an uncommitted entry
+    calc.undo()
+    calc.undo()  # takes 3 out and restores 1 from eviction
+    calc.perform("add", 6, 0)
+    calc.save_history()
+
+    reader = Calculator(_config(tmp_path))
+    reader.load_history()
+    assert _operands(reader) == [0, 1, 2, 3, 6]
+
+def test_clear_drops_uncommitted_entries(tmp_path):
+    calc = Calculator(_config(tmp_path))
+    calc.perform("add", 1, 0)
+    calc.save_history()
+    calc.perform("add", 2, 0)
+    calc.clear()
+    calc.perform("add", 3, 0)
+    calc.save_history()
+    calc.load_history()
+    assert _operands(calc) == [1, 3]
+
+def test_compaction_folds_segments_into_the_snapshot(tmp_path):
+    calc = Calculator(_config(tmp_path, segment_compact_every=4))
+    calc.add_observer(AutoSaveObserver())
+    for i in range(5):
+        calc.perform("multiply", i, 2)
+    assert Path(calc.config.history_file).exists()
+    assert len(segment_paths(calc.config, calc.storage)) == 1
+
+    with history_lock(calc.config.lock_file):  # a reader holds the lock
+        assert calc.segments.compact(blocking=False) is False
+    assert calc.segments.compact() is True
+    assert segment_paths(calc.config, calc.storage) == []
+    calc.load_history()
+    assert [c.result for c in calc.history] == [0, 2, 4, 6, 8]
+
+def test_compaction_keeps_rows_beyond_max_history_size(tmp_path):
+    a, b = Calculator(_config(tmp_path, max_history_size=2)), Calculator(_config(tmp_path, max_history_size=2))
+    for i in range(3):
+        a.perform("add", i, 0)
+        b.perform("add", 10 + i, 0)
+        a.save_history()
+        b.save_history()
+    assert a.segments.compact() is True
+    assert [int(c.operand1) for c in read_segments(a.config, a.storage)] == [0, 10, 1, 11, 2, 12]
+    a.load_history()
+    assert _operands(a) == [2, 12]
+
+@pytest.mark.parametrize("crash_at", ["rename", "unlink"])
+def test_interrupted_compaction_neither_loses_nor_repeats_rows(tmp_path, monkeypatch, crash_at):
+    calc = Calculator(_config(tmp_path))
+    for i in range(3):
+        calc.perform("add", i, 0)
+        calc.save_history()
+    real_replace = os.replace
+    def replace(src, dst):
+        if crash_at == "rename" and Path(dst) == calc.config.history_file:
+            raise OSError("crash")
+        real_replace(src, dst)
+    def unlink(self, missing_ok=False):
+        raise OSError("crash")
+    monkeypatch.setattr(os, "replace", replace)
+    if crash_at == "unlink":
+        monkeypatch.setattr(Path, "unlink", unlink)
+    with pytest.raises(OSError):
+        calc.segments.compact()
+    monkeypatch.undo()
+
+    calc.perform("add", 3, 0)
+    calc.save_history()
+    assert [int(c.operand1) for c in read_segments(calc.config, calc.storage)] == [0, 1, 2, 3]
+    assert calc.segments.compact() is True
+    assert segment_paths(calc.config, calc.storage) == []
+    assert not (calc.config.segment_dir / "folded").exists()
+    assert [int(c.operand1) for c in read_segments(calc.config, calc.storage)] == [0, 1, 2, 3]
+
+def test_config_keeps_single_writer_features_out_of_multi_writer_mode(tmp_path):
+    cfg = _config(tmp_path, auto_save_mode="journal", history_archive=True, segment_compact_every=0)
+    assert (cfg.auto_save_mode, cfg.history_archive, cfg.segment_compact_every) == ("snapshot", False, 64)
+
+def test_concurrent_writer_processes_lose_nothing(tmp_path):
+    result = stress(tmp_path, processes=4, per_process=60, compact_every=16)
+    assert result.records == 240
+    assert (result.lost, result.duplicated, result.corrupted) == (0, 0, 0)
+    assert result.throughput > 0
@@ -0,0 +1,81 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.history import JournalObserver
+from app.numeric import get_backend, nth_root
+
+def _calc(tmp_path, backend, **kw):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, numeric_backend=backend, precision=10, **kw))
+
+CASES = [
+    ("add", 2, 3, 5), ("subtract", 2, 3, -1), ("multiply", 4, 5, 20), ("divide", 3, 4, 0.75),
+    ("power", 2, 10, 1024), ("root", 27, 3, 3), ("modulus", 7, 4, 3), ("int_divide", 7, 2, 3),
+    ("percent", 1, 4, 25), ("abs_diff", 2, 9, 7),
+]
+
+@pytest.mark.parametrize("backend,kind", [("decimal", Decimal), ("float", float), ("fraction", Fraction)])
+@pytest.mark.parametrize("op,a,b,expected", CASES)
+def test_every_operation_on_every_backend(tmp_path, backend, kind, op, a, b, expected):
+    calc = _calc(tmp_path, backend)
+    result = calc.perform(op, a, b)
+    assert isinstance(result, kind)
+    assert float(result) == pytest.approx(expected)
+    assert calc.perform_many(op, [a], [b]) == [result]
+
+def test_fraction_is_exact(tmp_path):
+    calc = _calc(tmp_path, "fraction")
+    assert calc.perform("divide", 1, 3) == Fraction(1, 3)
+    assert calc.perform("add", "0.1", "0.2") == Fraction(3, 10)
+    assert calc.perform("root", "9/4", 2) == Fraction(3, 2)
+    assert calc.perform("root", 4, -2) == Fraction(1, 2)
+    assert calc.evaluate("1/3 + 1/6") == Fraction(1, 2)
+    # irrational roots are rounded at the calculator's precision
+    assert calc.perform("root", 2, 2) == Fraction("1.414213562")
+    with pytest.raises(OperationError, match="too large"):
+        calc.perform("power", 3, 10**9)
+
+def test_float_validation(tmp_path):
+    calc = _calc(tmp_path, "float")
+    for bad in ("nan", "inf", "abc"):
+        with pytest.raises(ValidationError):
+            calc.perform("add", bad, 1)
+    with pytest.raises(ValidationError, match="out of bounds"):
+        calc.perform_many("add", [1, 2e12], [1, 1])
+    with pytest.raises(OperationError):
+        calc.perform("root", -8, 2)
+    assert calc.evaluate("2 ^ 0.5 + ans") == 1.0 + 0.0
+    assert calc.perform("root", -8, 3) == -2.0
+
+@pytest.mark.parametrize("fmt", ["csv", "binary"])
+@pytest.mark.parametrize("backend", ["float", "fraction"])
+def test_history_round_trips(tmp_path, fmt, backend):
+    calc = _calc(tmp_path, backend, history_format=fmt)
+    calc.perform("divide", 1, 3)
+    calc.perform("multiply", "2.5", 4)
+    saved = list(calc.history)
+    calc.save_history()
+    calc.clear()
+    calc.load_history()
+    assert list(calc.history) == saved
+    assert type(calc.history[0].result) is type(saved[0].result)
+
+def test_journal_replay_keeps_fractions(tmp_path):
+    calc = _calc(tmp_path, "fraction", auto_save_mode="journal", journal_flush_every=1)
+    calc.add_observer(JournalObserver())
+    calc.perform("divide", 2, 3)
+    calc.close()
+    again = _calc(tmp_path, "fraction")
+    again.load_history()
+    assert again.history[0].result == Fraction(2, 3)
+
+def test_backend_registry():
+    assert get_backend("FLOAT").name == "float"
+    with pytest.raises(ValueError):
+        get_backend("complex")
+    with pytest.raises(TypeError):
+        nth_root(4, 2)
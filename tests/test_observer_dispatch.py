@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver, HistoryObserver, JournalObserver
+from app.observer_dispatch import AsyncDispatcher
+
+class _Recorder(HistoryObserver):
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.batches = []
+        self.events = []
+        self.thread = None
+    def update(self, calculator, calc):  # pragma: no cover - batches only
+        self.update_many(calculator, [calc])
+    def update_many(self, calculator, calcs):
+        self.thread = threading.current_thread()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append([c.result for c in calcs])
+    def on_event(self, calculator, event, memento=None):
+        self.events.append(event)
+
+class _Broken(HistoryObserver):
+    def update(self, calculator, calc):
+        raise RuntimeError("boom")
+
+def _calc(tmp_path, **kw):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, async_observers=True, **kw))
+
+def test_async_delivery_off_the_calling_thread(tmp_path):
+    c = _calc(tmp_path)
+    rec = _Recorder()
+    c.add_observer(rec)
+    c.perform("add", 1, 1)
+    c.perform_many("add", [1, 2], [1, 1])
+    c.undo()
+    c.close()
+    assert rec.thread is not threading.current_thread()
+    assert sum(rec.batches, []) == [2, 2, 3]
+    assert rec.events == ["undo"]
+    c.close()  # second close is a no-op
+
+def test_failing_observer_does_not_stall_others(tmp_path):
+    c = _calc(tmp_path)
+    rec = _Recorder()
+    c.add_observer(_Broken())
+    c.add_observer(rec)
+    c.perform("add", 2, 2)
+    c.flush()
+    assert sum(rec.batches, []) == [4]
+    assert c._dispatcher.errors == 1
+    c.close()
+
+def _stalled(tmp_path, policy):
+    gate = threading.Event()
+    c = _calc(tmp_path, observer_queue_size=1, observer_backpressure=policy)
+    rec = _Recorder(gate)
+    c.add_observer(rec)
+    c.perform("add", 0, 0)
+    while rec.thread is None:  # worker is now parked inside the observer
+        threading.Event().wait(0.001)
+    return c, rec, gate
+
+def test_drop_policy_discards_when_full(tmp_path):
+    c, rec, gate = _stalled(tmp_path, "drop")
+    for i in range(1, 4):
+        c.perform("add", i, 0)
+    gate.set()
+    c.close()
+    assert sum(rec.batches, []) == [0, 1]
+    assert c.history_snapshot()[-1].result == 3
+
+def test_coalesce_policy_merges_into_pending_batch(tmp_path):
+    c, rec, gate = _stalled(tmp_path, "coalesce")
+    for i in range(1, 4):
+        c.perform("add", i, 0)
+    gate.set()
+    c.close()
+    assert rec.batches == [[0], [1, 2, 3]]
+
+def test_block_policy_waits_for_worker(tmp_path):
+    c, rec, gate = _stalled(tmp_path, "block")
+    c.perform("add", 1, 0)
+    threading.Timer(0.05, gate.set).start()
+    c.perform("add", 2, 0)  # blocks until the timer releases the worker
+    c.close()
+    assert sum(rec.batches, []) == [0, 1, 2]
+
+def test_async_journal_and_autosave_stay_consistent(tmp_path):
+    c = _calc(tmp_path, auto_save_mode="journal", journal_compact_every=3)
+    c.add_observer(JournalObserver())
+    c.add_observer(AutoSaveObserver())
+    for i in range(10):
+        c.perform("add", i, 0)
+    c.undo()
+    c.close()
+    c2 = Calculator(CalculatorConfig(base_dir=tmp_path))
+    c2.load_history()
+    assert [x.result for x in c2.history] == list(range(9))
+
+def test_unknown_policy_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncDispatcher(None, 1, "bogus")
+    assert CalculatorConfig(base_dir=tmp_path, observer_backpressure="bogus").observer_backpressure == "block"
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.parallel import iter_parallel, perform_parallel, read_calculations, worker_config
+
+@pytest.fixture
+def calc(tmp_path):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, precision=28, max_history_size=1000))
+
+def test_results_and_history_keep_input_order(calc):
+    items = [("add", i, 1) for i in range(50)] + [("root", 2, 2), ("divide", 1, 0), ("nope", 1, 2)]
+    results = perform_parallel(calc, items, workers=2, chunksize=7)
+    assert results[:50] == [Decimal(i + 1) for i in range(50)]
+    assert results[50] == calc.perform("root", 2, 2)
+    assert isinstance(results[51], OperationError)
+    assert isinstance(results[52], ValueError)
+    # failures are not recorded; each chunk is one undo step
+    assert [c.result for c in calc.history][:51] == results[:51]
+    assert len(calc.undo_stack) == 8 + 1
+
+def test_workers_use_the_callers_precision(tmp_path):
+    calc = Calculator(CalculatorConfig(base_dir=tmp_path, precision=5))
+    assert perform_parallel(calc, [("divide", 1, 3)], workers=1) == [Decimal("0.33333")]
+
+def test_iter_parallel_streams_chunks(calc):
+    chunks = list(iter_parallel(calc, (("multiply", i, 2) for i in range(10)), workers=1, chunksize=4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+
+def test_file_input(calc, tmp_path):
+    path = tmp_path / "calcs.txt"
+    path.write_text("# header\nadd 1 2\n\npower 2 10\n")
+    assert perform_parallel(calc, path, workers=1) == [Decimal(3), Decimal(1024)]
+    path.write_text("add 1\n")
+    with pytest.raises(ValidationError, match="calcs.txt:1"):
+        list(read_calculations(path))
+
+def test_worker_chunk_in_process(calc):
+    from app import parallel
+    parallel.init_worker(calc.config)
+    out = parallel._run_chunk([("add", 1, 2), ("divide", 1, 0)])
+    assert out[0].result == 3 and isinstance(out[1], OperationError)
+
+def test_worker_config_is_compute_only(tmp_path):
+    cfg = CalculatorConfig(base_dir=tmp_path, history_archive=True, instrumentation=True, async_observers=True)
+    worker = Calculator(worker_config(cfg))
+    assert worker.archive is None and worker.segments is None and worker.metrics is None
+    assert not worker_config(CalculatorConfig(base_dir=tmp_path, multi_writer=True)).multi_writer
+    caller = Calculator(cfg)
+    assert perform_parallel(caller, [("add", 1, 2)], workers=1) == [Decimal(3)]
+    assert caller.history[-1].result == 3
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError, ValidationError
+from app.history import AutoSaveObserver, HistoryObserver, JournalObserver
+from app.operations import FACTORY, get_operation
+
+class _CountingObserver(HistoryObserver):
+    def __init__(self):
+        self.batches = []
+    def update(self, calculator, calc):  # pragma: no cover - batches only here
+        self.batches.append([calc])
+    def update_many(self, calculator, calcs):
+        self.batches.append(list(calcs))
+
+@pytest.fixture
+def calc(tmp_path):
+    return Calculator(CalculatorConfig(base_dir=tmp_path))
+
+@pytest.mark.parametrize("name", sorted(FACTORY))
+def test_batch_kernels_match_scalar(name):
+    a = [Decimal(x) for x in ("9", "2.5", "8", "100")]
+    b = [Decimal(x) for x in ("2", "3", "3", "7")]
+    op = get_operation(name)
+    assert op.execute_many(a, b) == [op.execute(x, y) for x, y in zip(a, b)]
+
+@pytest.mark.parametrize("seq", [
+    [1, 2, 3],
+    np.array([1, 2, 3]),
+    pd.Series([1.0, 2.0, 3.0]),
+])
+def test_perform_many_accepts_sequences(calc, seq):
+    obs = _CountingObserver()
+    calc.add_observer(obs)
+    assert calc.perform_many("multiply", seq, [2, 2, 2]) == [2, 4, 6]
+    assert [c.result for c in calc.history] == [2, 4, 6]
+    assert len(obs.batches) == 1 and len(obs.batches[0]) == 3
+    assert len(calc.undo_stack) == 1
+
+def test_perform_many_single_undo_step(calc):
+    calc.perform("add", 1, 1)
+    calc.perform_many("add", [1, 2], [3, 4])
+    assert calc.undo() is True
+    assert [c.result for c in calc.history] == [2]
+    assert calc.redo() is True
+    assert [c.result for c in calc.history] == [2, 4, 6]
+
+def test_perform_many_larger_than_capacity(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, max_history_size=3))
+    c.perform_many("add", [1, 2], [0, 0])
+    c.perform_many("add", range(10, 15), [0] * 5)
+    assert [x.result for x in c.history] == [12, 13, 14]
+    c.undo()
+    assert [x.result for x in c.history] == [1, 2]
+    c.redo()
+    assert [x.result for x in c.history] == [12, 13, 14]
+
+def test_perform_many_is_atomic(calc):
+    with pytest.raises(OperationError):
+        calc.perform_many("divide", [1, 2], [1, 0])
+    with pytest.raises(ValidationError, match="out of bounds"):
+        calc.perform_many("add", [1, 1e13], [1, 1])
+    with pytest.raises(ValidationError, match="Invalid number"):
+        calc.perform_many("add", [1, "x"], [1, 1])
+    with pytest.raises(ValidationError, match=r"Invalid number: x \(index 2\)"):
+        calc.perform_many("add", (v for v in [1, 2, "x"]), [1, 1, 1])
+    with pytest.raises(ValidationError, match=r"out of bounds: .* \(index 1\)"):
+        calc.perform_many("add", (v for v in [1, 1e13]), [1, 1])
+    with pytest.raises(ValidationError, match="lengths differ"):
+        calc.perform_many("add", [1, 2], [1])
+    assert calc.perform_many("add", [], []) == []
+    assert len(calc.history) == 0 and len(calc.undo_stack) == 0
+
+def test_perform_many_persists_through_observers(tmp_path):
+    cfg = CalculatorConfig(base_dir=tmp_path, auto_save_mode="journal")
+    c = Calculator(cfg)
+    journal = JournalObserver()
+    c.add_observer(journal)
+    c.add_observer(AutoSaveObserver())
+    c.perform_many("subtract", [5, 6, 7], [1, 1, 1])
+    journal.flush()
+    assert (tmp_path / "history" / "calculator_history.csv").exists()
+    c2 = Calculator(cfg)
+    c2.load_history()
+    assert [x.result for x in c2.history] == [4, 5, 6]
@@ -0,0 +1,101 @@
+from decimal import Decimal, localcontext
+from fractions import Fraction
+import random
+import time
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError
+from app.numeric import _iroot, int_power, nth_root
+
+def _calc(tmp_path, **kw):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, auto_save=False, **kw))
+
+def _reference(fn, prec):
+    """fn() computed with 60 extra digits, then rounded to prec."""
+    with localcontext() as ctx:
+        ctx.prec = prec + 60
+        exact = fn()
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return +exact
+
+@pytest.mark.parametrize("prec", [6, 28, 50, 200])
+def test_roots_are_correctly_rounded(prec):
+    rng = random.Random(prec)
+    for _ in range(40):
+        a = Decimal(rng.randint(1, 10**12)).scaleb(rng.randint(-20, 20))
+        n = rng.choice([2, 3, 5, 7, 12])
+        with localcontext() as ctx:
+            ctx.prec = prec
+            got = nth_root(a, Decimal(n))
+        assert got == _reference(lambda: a ** (Decimal(1) / n), prec), (a, n)
+
+@pytest.mark.parametrize("prec", [6, 28, 200])
+def test_powers_match_a_high_precision_reference(prec):
+    rng = random.Random(prec)
+    for _ in range(40):
+        a = Decimal(rng.randint(-10**6, 10**6)).scaleb(rng.randint(-6, 0)) or Decimal(3)
+        n = rng.randint(-300, 300)
+        with localcontext() as ctx:
+            ctx.prec = prec
+            got = int_power(a, n)
+        assert got == _reference(lambda: a ** n, prec), (a, n)
+
+def test_exact_and_signed_roots(tmp_path):
+    calc = _calc(tmp_path, precision=10)
+    assert str(calc.perform("root", 27, 3)) == "3"
+    assert str(calc.perform("root", "0.001", 3)) == "0.1"
+    assert calc.perform("root", -27, 3) == -3
+    assert calc.perform("root", -32, -5) == Decimal("-0.5")
+    assert calc.perform("root", 16, -2) == Decimal("0.25")
+    assert calc.perform("root", 0, 3) == 0
+    assert calc.perform("root", 8, "1.5") == 4
+    assert calc.perform("root", 2, 10**9) == Decimal("1.000000001")
+    for a, b in ((-16, 2), (-8, "1.5"), (0, -2), (4, 0)):
+        with pytest.raises(OperationError):
+            calc.perform("root", a, b)
+
+def test_power_refuses_out_of_range_results_up_front(tmp_path):
+    calc = _calc(tmp_path)
+    t0 = time.perf_counter()
+    with pytest.raises(OperationError, match="out of range"):
+        calc.perform("power", 9, 999999999999)
+    with pytest.raises(OperationError, match="out of range"):
+        calc.perform("power", "0.5", 10**12)
+    assert time.perf_counter() - t0 < 0.5
+    assert calc.perform("power", 0, 0) == 1
+    assert calc.perform("power", 2, -2) == Decimal("0.25")
+    assert calc.perform("power", "1.0000001", 10**9) == Decimal("2.68810E+43")
+    with pytest.raises(OperationError, match="negative power"):
+        calc.perform("power", 0, -1)
+
+def test_result_digit_budget_is_configurable(tmp_path, monkeypatch):
+    calc = _calc(tmp_path, max_result_digits=50)
+    assert calc.perform("power", 10, 40) == Decimal("1E+40")
+    with pytest.raises(OperationError):
+        calc.perform("power", 10, 60)
+    with pytest.raises(OperationError):
+        calc.evaluate("2 * 10 ^ 60")
+    assert CalculatorConfig(base_dir=tmp_path, max_result_digits=0).max_result_digits == 100_000
+    monkeypatch.setenv("CALCULATOR_MAX_RESULT_DIGITS", "25")
+    assert CalculatorConfig.from_env(tmp_path).max_result_digits == 25
+
+def test_other_backends(tmp_path):
+    flt = _calc(tmp_path, numeric_backend="float")
+    assert flt.perform("root", 27, 3) == 3.0
+    assert flt.perform("root", 8, "1.5") == pytest.approx(4.0)
+    with pytest.raises(OperationError):
+        flt.perform("power", 10, 400)
+    frac = _calc(tmp_path, numeric_backend="fraction", max_result_digits=100)
+    assert frac.perform("root", "-8/27", 3) == Fraction(-2, 3)
+    with pytest.raises(OperationError, match="too large"):
+        frac.perform("power", 3, 300)
+
+def test_integer_root_helper():
+    for x in (2, 10**50 + 7, 3**400, 2**4000 - 1):
+        for n in (2, 3, 17, 1000):
+            r = _iroot(x, n)
+            assert r ** n <= x < (r + 1) ** n
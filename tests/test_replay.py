@@ -0,0 +1,75 @@
+from dataclasses import replace
+import io
+import json
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.replay import ReplaySummary, iter_replay, main, run_replay
+
+def _history(tmp_path, fmt="csv"):
+    cfg = CalculatorConfig(base_dir=tmp_path, auto_save=False, history_format=fmt, precision=6)
+    calc = Calculator(cfg)
+    calc.perform("add", 2, 2)
+    calc.perform("divide", 1, 3)
+    calc.perform("power", 10, 50)
+    calc.perform("multiply", 3, 4)
+    calc.evaluate("1 / 7 + 1")
+    calc.evaluate("ans * 2")
+    calc.perform("root", 2, 2)
+    return calc.save_history(), cfg
+
+def test_same_config_reports_nothing(tmp_path):
+    path, cfg = _history(tmp_path)
+    summary = ReplaySummary()
+    assert list(iter_replay(path, cfg, summary, workers=1)) == []
+    assert (summary.rows, summary.changed, summary.errors, summary.skipped) == (7, 0, 0, 1)
+
+@pytest.mark.parametrize("fmt", ["csv", "binary"])
+def test_higher_precision_changes_inexact_results_in_order(tmp_path, fmt):
+    path, cfg = _history(tmp_path, fmt)
+    summary = ReplaySummary()
+    diffs = list(iter_replay(path, replace(cfg, precision=20), summary, workers=2, chunksize=2))
+    assert [(d.row, d.operation, d.status) for d in diffs] == [
+        (2, "divide", "changed"), (5, "1 / 7 + 1", "changed"), (7, "root", "changed"),
+    ]
+    assert diffs[0].stored == "0.333333" and diffs[0].replayed == "0.33333333333333333333"
+    assert summary.changed == 3 and summary.rows == 7
+
+def test_tighter_limits_and_other_backends_report_new_errors(tmp_path):
+    path, cfg = _history(tmp_path)
+    summary = ReplaySummary()
+    diffs = list(iter_replay(path, replace(cfg, max_input_value=100, max_result_digits=20), summary, workers=1))
+    assert [(d.row, d.status) for d in diffs] == [(3, "error")]
+    assert "out of range" in diffs[0].error
+
+    summary = ReplaySummary()
+    diffs = list(iter_replay(path, replace(cfg, numeric_backend="float"), summary, workers=1))
+    # add/multiply/power agree as floats; the six-digit stored quotients do not
+    assert [d.row for d in diffs] == [2, 5, 7]
+    assert summary.errors == 0
+
+def test_run_replay_writes_csv_and_jsonl(tmp_path):
+    path, cfg = _history(tmp_path)
+    out = io.StringIO()
+    summary = run_replay(path, replace(cfg, precision=8), out, workers=1)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "row,operation,operand1,operand2,stored,replayed,error"
+    assert lines[1] == "2,divide,1,3,0.333333,0.33333333,"
+    assert "3 changed" in str(summary) and summary.throughput > 0
+
+    out = io.StringIO()
+    run_replay(path, replace(cfg, max_input_value=5), out, fmt="jsonl", workers=1)
+    rec = json.loads(out.getvalue().splitlines()[0])
+    assert rec["row"] == 3 and "replayed" not in rec and rec["error"]
+    with pytest.raises(ValueError):
+        run_replay(path, cfg, out, fmt="xml")
+
+def test_cli(tmp_path, monkeypatch, capsys):
+    path, _ = _history(tmp_path)
+    monkeypatch.setenv("CALCULATOR_PRECISION", "6")
+    assert main([str(path), "--workers", "1", "--precision", "12"]) == 0
+    captured = capsys.readouterr()
+    assert captured.out.count("\n") == 4 and "Replayed 7 calculations" in captured.err
+    assert main([str(path), "--workers", "1", "--backend", "fraction"]) == 0
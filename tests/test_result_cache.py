@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.operations import get_operation
+from app.result_cache import ResultCache
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(2)
+    cache.put("a", Decimal(1))
+    cache.put("b", Decimal(2))
+    assert cache.get("a") == 1          # "a" is now most recent
+    cache.put("c", Decimal(3))          # evicts "b"
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
+    cache.clear()
+    assert cache.stats()["size"] == 0 and cache.hits == 0
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(0)
+    cache.put("a", Decimal(1))
+    assert cache.get("a") is None and len(cache) == 0
+
+def test_operations_are_flyweights():
+    assert get_operation("add") is get_operation("ADD")
+
+def test_calculator_reuses_results(tmp_path):
+    c = Calculator(CalculatorConfig(base_dir=tmp_path, cache_size=8))
+    assert c.perform("power", 2, 10) == 1024
+    assert c.perform("power", "2", "10") == 1024
+    # same value, different text: must not reuse "2" for "2.0"
+    assert str(c.perform("add", "1.0", 1)) == "2.0"
+    assert str(c.perform("add", "1", 1)) == "2"
+    st = c.cache_stats()
+    assert st["hits"] == 1 and st["misses"] == 3
+    assert len(c.history) == 4
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+
+from app.calculator_config import CalculatorConfig
+from app.server import CalculatorServer
+
+async def _client(server):
+    return await asyncio.open_connection(server.host, server.port)
+
+async def _ask(reader, writer, *reqs):
+    writer.write(b"".join(json.dumps(r).encode() + b"\n" for r in reqs))
+    await writer.drain()
+    return [json.loads(await reader.readline()) for _ in reqs]
+
+def _run(tmp_path, scenario, **cfg):
+    async def main():
+        server = CalculatorServer(CalculatorConfig(base_dir=tmp_path, precision=10, **cfg))
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+def test_pipelined_requests_answer_in_order(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        out = await _ask(r, w,
+            {"id": 1, "op": "perform", "operation": "add", "a": "2", "b": "3"},
+            {"id": 2, "op": "perform", "operation": "divide", "a": "1", "b": "3"},
+            {"id": 3, "op": "evaluate", "expr": "ans * x", "vars": {"x": 3}},
+            {"id": 4, "op": "undo"},
+            {"id": 5, "op": "redo"},
+            {"id": 6, "op": "history"},
+            {"id": 7, "op": "perform", "operation": "divide", "a": "1", "b": "0"},
+            {"id": 8, "op": "nope"},
+        )
+        w.close()
+        return out
+    out = _run(tmp_path, scenario)
+    assert [o["id"] for o in out] == list(range(1, 9))
+    assert out[0]["result"] == "5"
+    assert out[1]["result"] == "0.3333333333"  # the session precision, not the thread default
+    assert out[2]["result"] == "0.9999999999"
+    assert out[3]["result"] is True and out[4]["result"] is True
+    assert [h["operation"] for h in out[5]["result"]] == ["add", "divide", "ans * x"]
+    assert out[6]["ok"] is False and "division by zero" in out[6]["error"]
+    assert out[7] == {"id": 8, "ok": False, "error": "unknown op: 'nope'"}
+
+def test_sessions_are_isolated_and_shareable(tmp_path):
+    async def scenario(server):
+        (r1, w1), (r2, w2) = await _client(server), await _client(server)
+        add = {"op": "perform", "operation": "add", "a": 1, "b": 1}
+        await _ask(r1, w1, add, {**add, "session": "shared"})
+        await _ask(r2, w2, {**add, "session": "shared"})
+        (private,) = await _ask(r2, w2, {"op": "history"})
+        (shared,) = await _ask(r1, w1, {"op": "history", "session": "shared"})
+        (bad,) = await _ask(r1, w1, {"op": "history", "session": "../etc"})
+        w1.close(); w2.close()
+        return private, shared, bad
+    private, shared, bad = _run(tmp_path, scenario)
+    assert private["result"] == []
+    assert len(shared["result"]) == 2
+    assert "invalid session name" in bad["error"]
+
+def test_bad_json(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        w.write(b"not json\n\n[1]\n")
+        out = [json.loads(await r.readline()) for _ in range(2)]
+        w.close()
+        return out
+    out = _run(tmp_path, scenario)
+    assert all(o["ok"] is False and o["id"] is None for o in out)
+
+def test_shutdown_answers_buffered_requests_and_saves(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        reqs = [{"id": i, "op": "perform", "operation": "power", "a": 2, "b": i, "session": "s"} for i in range(20)]
+        w.write(b"".join(json.dumps(q).encode() + b"\n" for q in reqs))
+        await w.drain()
+        await asyncio.sleep(0.05)
+        await server.stop()
+        lines = (await r.read()).splitlines()
+        return [json.loads(line) for line in lines]
+    async def main():
+        server = CalculatorServer(CalculatorConfig(base_dir=tmp_path, max_history_size=100))
+        await server.start()
+        return await scenario(server)
+    out = asyncio.run(main())
+    assert [o["result"] for o in out] == [str(2 ** i) for i in range(20)]
+    saved = tmp_path / "history" / "sessions" / "s" / "history.csv"
+    assert len(saved.read_text().splitlines()) == 21
+
+def test_sessions_reload_saved_history(tmp_path):
+    async def first(server):
+        r, w = await _client(server)
+        await _ask(r, w, {"op": "perform", "operation": "add", "a": 1, "b": 2, "session": "keep"},
+                   {"op": "save", "session": "keep"})
+        w.close()
+    async def second(server):
+        r, w = await _client(server)
+        (h,) = await _ask(r, w, {"op": "history", "session": "keep"})
+        w.close()
+        return h
+    _run(tmp_path, first, auto_save=False)
+    assert len(_run(tmp_path, second, auto_save=False)["result"]) == 1
+
+def test_history_request_filters(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        out = await _ask(r, w,
+            {"op": "perform", "operation": "add", "a": 1, "b": 1},
+            {"op": "perform", "operation": "multiply", "a": 3, "b": 3},
+            {"op": "perform", "operation": "add", "a": 5, "b": 5},
+            {"op": "history", "operation": "add", "newest_first": True, "limit": 1},
+            {"op": "history", "result_range": [5, None]},
+        )
+        w.close()
+        return out
+    out = _run(tmp_path, scenario)
+    assert [h["result"] for h in out[3]["result"]] == ["10"]
+    assert [h["result"] for h in out[4]["result"]] == ["9", "10"]
+
+def test_summary_request(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        out = await _ask(r, w,
+            {"op": "perform", "operation": "add", "a": 1, "b": 1},
+            {"op": "perform", "operation": "add", "a": 2, "b": 2},
+            {"op": "summary", "operation": "add"},
+        )
+        w.close()
+        return out
+    out = _run(tmp_path, scenario)
+    assert out[2]["result"] == {"add": {"count": 2, "sum": "6", "min": "2", "max": "4", "mean": "3"}}
+
+def test_private_sessions_are_dropped_on_disconnect(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        await _ask(r, w, {"op": "perform", "operation": "add", "a": 1, "b": 1}, {"op": "save"})
+        assert len(server._private) == 1
+        w.close()
+        await w.wait_closed()
+        await r.read()
+        return server
+    server = _run(tmp_path, scenario)
+    assert server._private == {} and server.sessions == {}
+    assert list((tmp_path / "history" / "sessions").iterdir()) == []
+
+def test_slow_requests_time_out_and_keep_the_session_locked(tmp_path, monkeypatch):
+    from app.calculator import Calculator
+    save = Calculator.save_history
+    monkeypatch.setattr(Calculator, "save_history", lambda self: time.sleep(0.3) or save(self))
+    async def scenario(server):
+        server.request_timeout = 0.05
+        r, w = await _client(server)
+        out = await _ask(r, w, {"id": 1, "op": "save", "session": "s"}, {"id": 2, "op": "history", "session": "s"})
+        w.close()
+        return out
+    slow, after = _run(tmp_path, scenario)
+    assert slow["ok"] is False and "timed out" in slow["error"]
+    assert after["ok"] is True
+
+def test_oversized_request_line(tmp_path):
+    async def scenario(server):
+        r, w = await _client(server)
+        w.write(b'{"op": "evaluate", "expr": "' + b"1 + " * 100 + b'1"}\n')
+        out = json.loads(await r.readline())
+        rest = await r.read()
+        return out, rest
+    async def main():
+        server = CalculatorServer(CalculatorConfig(base_dir=tmp_path), max_request_bytes=256)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    out, rest = asyncio.run(main())
+    assert out["error"] == "bad request: line too long" and rest == b""
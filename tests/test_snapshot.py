@@ -0,0 +1,135 @@
+from fractions import Fraction
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.calculator_snapshot import read_snapshot
+from app.history import JournalObserver
+
+def _calc(tmp_path, **kw):
+    return Calculator(CalculatorConfig(base_dir=tmp_path, auto_save=False, **kw))
+
+def _state(calc):
+    return (
+        list(calc.history),
+        [(m.appended, m.evicted, m.spilled) for m in calc.undo_stack],
+        [(m.appended, m.evicted, m.spilled) for m in calc.redo_stack],
+    )
+
+def test_restore_brings_back_history_and_undo_redo(tmp_path):
+    calc = _calc(tmp_path, max_history_size=4, precision=12)
+    for i in range(6):
+        calc.perform("divide", i, 7)
+    calc.perform_many("add", [1, 2, 3], [1, 1, 1])
+    calc.undo()
+    calc.undo()
+    path = calc.snapshot()
+
+    again = _calc(tmp_path)
+    again.restore(path)
+    assert _state(again) == _state(calc)
+    assert again.config.precision == 12 and again.history.capacity == 4
+    # shared calculations come back as one object
+    assert again.undo_stack[-1].appended[0] is again.history[-1]
+
+    for c in (calc, again):
+        c.redo()
+        c.undo()
+        c.undo()
+    assert _state(again) == _state(calc)
+    assert again.query_history("divide") == calc.query_history("divide")
+    assert again.summary() == calc.summary()
+
+def test_snapshot_stores_each_calculation_once(tmp_path):
+    calc = _calc(tmp_path, max_history_size=3)
+    for i in range(5):
+        calc.perform("add", i, 1)
+    snap = read_snapshot(calc.snapshot(tmp_path / "s" / "state.snap"))
+    table = {id(c) for c in snap.history}
+    table |= {id(c) for m in snap.undo for c in (*m.appended, *m.evicted)}
+    assert len(table) == 5
+
+def test_restore_applies_backend_and_limits(tmp_path):
+    calc = _calc(tmp_path, numeric_backend="fraction", max_input_value=50, max_undo_depth=2)
+    calc.perform("divide", 1, 3)
+    calc.perform("add", 1, 1)
+    calc.perform("multiply", 2, 2)
+    path = calc.snapshot(tmp_path / "f.snap")
+
+    decimal = _calc(tmp_path)
+    decimal.perform("add", 100, 1)
+    decimal.restore(path)
+    assert decimal.history[0].result == Fraction(1, 3)
+    assert len(decimal.undo_stack) == 2 and decimal.undo_stack.maxlen == 2
+    assert decimal.perform("divide", 1, 6) == Fraction(1, 6)
+    with pytest.raises(Exception, match="out of bounds"):
+        decimal.perform("add", 100, 1)
+
+def test_restore_rejects_other_files(tmp_path):
+    calc = _calc(tmp_path)
+    calc.perform("add", 1, 2)
+    with pytest.raises(ValueError):
+        calc.restore(calc.save_history())
+    (tmp_path / "tiny").write_bytes(b"x")
+    with pytest.raises(ValueError):
+        calc.restore(tmp_path / "tiny")
+    assert [c.result for c in calc.history] == [3]
+
+def test_restore_leaves_a_shared_config_alone(tmp_path):
+    src = _calc(tmp_path, precision=7, max_history_size=5)
+    src.perform("divide", 1, 3)
+    path = src.snapshot()
+    shared = CalculatorConfig(base_dir=tmp_path, auto_save=False, precision=20)
+    a, b = Calculator(shared), Calculator(shared)
+    a.restore(path)
+    assert a.config.precision == 7 and a.history.capacity == 5
+    assert shared.precision == b.config.precision == 20 and b.context.prec == 20
+
+def test_snapshot_refused_with_history_archive(tmp_path):
+    calc = _calc(tmp_path, history_archive=True)
+    calc.perform("add", 1, 2)
+    with pytest.raises(ValueError, match="archive"):
+        calc.snapshot()
+
+def test_truncated_or_corrupt_snapshots_raise_value_error(tmp_path):
+    calc = _calc(tmp_path, precision=28)
+    for i in range(20):
+        calc.perform("add", i, 1)
+    path = calc.snapshot()
+    data = path.read_bytes()
+    for cut in range(0, len(data), 5):
+        path.write_bytes(data[:cut])
+        with pytest.raises(ValueError):
+            _calc(tmp_path).restore(path)
+    path.write_bytes(data.replace(b'"precision": 28', b'"precision": []'))
+    with pytest.raises(ValueError, match="corrupt"):
+        calc.restore(path)
+    assert calc.config.precision == 28 and len(calc.history) == 20
+
+def test_restore_resets_the_journal(tmp_path):
+    calc = _calc(tmp_path, auto_save_mode="journal")
+    journal = JournalObserver()
+    calc.add_observer(journal)
+    for i in range(3):
+        calc.perform("add", i, 0)
+    calc.save_history()
+    calc.snapshot()
+    calc.clear()
+    calc.restore()
+    calc.undo()
+    journal.flush()
+    fresh = _calc(tmp_path)
+    fresh.load_history()
+    assert list(fresh.history) == list(calc.history) and len(calc.history) == 2
+
+def test_restored_rows_are_committed_by_the_next_multi_writer_save(tmp_path):
+    calc = _calc(tmp_path, multi_writer=True)
+    calc.perform("add", 1, 2)
+    path = calc.snapshot(tmp_path / "state.snap")
+    other = _calc(tmp_path / "other", multi_writer=True)
+    other.restore(path)
+    other.save_history()
+    reader = _calc(tmp_path / "other", multi_writer=True)
+    reader.load_history()
+    assert [c.result for c in reader.history] == [3]
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def _run(code: str, tmp_path) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=tmp_path, env={"PYTHONPATH": str(ROOT)}, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip()
+
+def test_core_paths_do_not_import_pandas(tmp_path):
+    out = _run("""
+        import sys
+        import app.calculator_repl, app.batch, app.server
+        from app.calculator import Calculator
+        from app.calculator_config import CalculatorConfig
+        from app.history import AutoSaveObserver, JournalObserver
+        calc = Calculator(CalculatorConfig(base_dir="."))
+        calc.add_observer(AutoSaveObserver())
+        calc.perform("add", 1, 2)
+        calc.save_history()
+        calc.load_history()
+        print("pandas" in sys.modules, "numpy" in sys.modules)
+        calc.get_history_dataframe()
+        print("pandas" in sys.modules)
+    """, tmp_path)
+    assert out.splitlines() == ["False False", "True"]
+
+def test_startup_benchmark_probe():
+    from benchmarks.bench_startup import probe
+    ms, mb, heavy, imports = probe("app.calculator")
+    assert ms > 0 and mb > 0 and heavy == []
+    assert any(name == "app.operations" for _, name in imports)